@@ -0,0 +1,429 @@
+"""
+Offline analytics over the persisted attempt history.
+
+Sessions and their attempts are written to an SQLite attempt log when
+``ATTEMPT_LOG_DB`` points at a database file. This module also reports on
+that log from the command line::
+
+    python -m autodebugger.analytics attempts.db --by error_type
+    python -m autodebugger.analytics attempts.db --by model --level attempts
+
+The report lists the fix rate, attempts, latency and token spend by error
+signature, error type, model or snippet size. The log is read in chunks and
+aggregated with vectorized pandas operations. Latency percentiles come from
+mergeable quantile sketches (relative-error log buckets, as in DDSketch), so
+memory does not grow with the number of attempts.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import argparse
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from autodebugger.history import error_signature
+
+if TYPE_CHECKING:
+    from autodebugger.pipeline import SessionResult
+
+logger = logging.getLogger(__name__)
+
+SESSIONS = "sessions"
+ATTEMPTS = "attempts"
+
+DIMENSIONS = ("signature", "error_type", "model", "size")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    error_type TEXT NOT NULL,
+    model TEXT NOT NULL,
+    code_lines INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    tokens INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    number INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    error_type TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    PRIMARY KEY (session_id, number)
+);
+"""
+
+_QUERIES = {
+    SESSIONS: (
+        "SELECT signature, error_type, model, code_lines, attempts, success, seconds, tokens "
+        "FROM sessions"
+    ),
+    ATTEMPTS: (
+        "SELECT a.signature, a.error_type, s.model, s.code_lines, 1 AS attempts, a.success, "
+        "a.seconds, a.tokens FROM attempts a JOIN sessions s ON s.id = a.session_id"
+    ),
+}
+
+_SIZE_BINS = [0, 10, 50, 200, 1000, np.inf]
+_SIZE_LABELS = ["1-10", "11-50", "51-200", "201-1000", ">1000"]
+
+_ERROR_TYPE_PATTERN = re.compile(r"^([A-Za-z_][\w.]*)(?::|$)")
+
+
+def error_type(signature: str) -> str:
+    """
+    Return the exception class of an error signature.
+
+    Args:
+        signature: Error signature from :func:`autodebugger.history.error_signature`.
+
+    Returns:
+        str: The exception name, "none" for no error, or "other".
+
+    Example:
+        >>> error_type("NameError: name 'x' is not defined")
+        'NameError'
+    """
+    if not signature:
+        return "none"
+    match = _ERROR_TYPE_PATTERN.match(signature)
+    return match.group(1) if match else "other"
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative error guarantee.
+
+    Values are counted in logarithmic buckets ``(gamma^(i-1), gamma^i]`` with
+    ``gamma = (1 + a) / (1 - a)``, so every quantile is returned within a
+    relative error ``a`` of the true value, and sketches built on separate
+    chunks of data merge by adding their bucket counts.
+
+    Args:
+        relative_accuracy: Relative error ``a`` of the returned quantiles.
+
+    Example:
+        >>> sketch = QuantileSketch()
+        >>> sketch.add_many(np.array([1.0, 2.0, 3.0, 4.0]))
+        >>> round(sketch.quantile(0.5), 1)
+        2.0
+    """
+
+    # Values at or below this count as zero
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def bucket(self, value: float) -> int:
+        """Return the bucket index of a positive value."""
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Count a value (negative values count as zero)."""
+        self.count += count
+        if value <= self.MIN_VALUE:
+            self.zeros += count
+        else:
+            index = self.bucket(value)
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def add_many(self, values: np.ndarray) -> None:
+        """Count an array of values in one vectorized pass."""
+        values = np.asarray(values, dtype=float)
+        positive = values[values > self.MIN_VALUE]
+        self.zeros += int(values.size - positive.size)
+        self.count += int(values.size)
+        if positive.size:
+            indexes, counts = np.unique(
+                np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True
+            )
+            for index, count in zip(indexes.tolist(), counts.tolist()):
+                self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """
+        Add the counts of another sketch.
+
+        Raises:
+            ValueError: If the sketches have different accuracies.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracies")
+        self.count += other.count
+        self.zeros += other.zeros
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile.
+
+        Args:
+            q: Quantile between 0 and 1.
+
+        Returns:
+            float: The estimate (NaN for an empty sketch).
+        """
+        if not self.count:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return 2 * self._gamma**index / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.bins) / (self._gamma + 1)
+
+
+class AttemptLog:
+    """
+    SQLite store of finished sessions and their attempts.
+
+    Args:
+        path: Database file (``":memory:"`` for a throwaway store).
+    """
+
+    def __init__(self, path: str) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def record(self, result: "SessionResult", seconds: float, model: str = "") -> None:
+        """
+        Store a finished session.
+
+        Args:
+            result: The session and its attempts.
+            seconds: Wall-clock duration of the session.
+            model: Name of the model that suggested the fixes.
+        """
+        first_error = result.attempts[0].error if result.attempts else ""
+        signature = error_signature(first_error)
+        attempts = [
+            (
+                attempt.number,
+                error_signature(attempt.error),
+                attempt.success is True,
+                attempt.seconds,
+                attempt.tokens,
+            )
+            for attempt in result.attempts
+        ]
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO sessions (recorded_at, signature, error_type, model, code_lines, "
+                "attempts, success, seconds, tokens) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    signature,
+                    error_type(signature),
+                    model or "unknown",
+                    len(result.code_input.splitlines()),
+                    len(result.attempts),
+                    result.success,
+                    seconds,
+                    sum(attempt[4] for attempt in attempts),
+                ),
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO attempts (session_id, number, signature, error_type, "
+                "success, seconds, tokens) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (cursor.lastrowid, number, sig, error_type(sig), success, spent, tokens)
+                    for number, sig, success, spent, tokens in attempts
+                ],
+            )
+
+    def chunks(self, level: str = SESSIONS, chunk_size: int = 100_000) -> Iterable[pd.DataFrame]:
+        """
+        Read the log in chunks.
+
+        Args:
+            level: :data:`SESSIONS` or :data:`ATTEMPTS`.
+            chunk_size: Rows per chunk.
+
+        Returns:
+            Iterable[pd.DataFrame]: Frames with the columns ``signature``,
+            ``error_type``, ``model``, ``code_lines``, ``attempts``,
+            ``success``, ``seconds`` and ``tokens``.
+        """
+        return pd.read_sql_query(_QUERIES[level], self._connection, chunksize=chunk_size)
+
+
+_attempt_log: Optional[AttemptLog] = None
+_attempt_log_lock = threading.Lock()
+
+
+def get_attempt_log() -> Optional[AttemptLog]:
+    """
+    Return the shared attempt log configured by ``ATTEMPT_LOG_DB``.
+
+    Returns:
+        Optional[AttemptLog]: The log, or None if it is not configured.
+    """
+    global _attempt_log
+    path = os.getenv("ATTEMPT_LOG_DB")
+    if not path:
+        return None
+    with _attempt_log_lock:
+        if _attempt_log is None or _attempt_log.path != path:
+            logger.info(f"Opening attempt log at {path}")
+            _attempt_log = AttemptLog(path)
+        return _attempt_log
+
+
+def _with_size(chunk: pd.DataFrame) -> pd.DataFrame:
+    sizes = pd.cut(chunk["code_lines"], _SIZE_BINS, labels=_SIZE_LABELS, include_lowest=True)
+    return chunk.assign(size=sizes.astype(str))
+
+
+def summarize(
+    chunks: Iterable[pd.DataFrame],
+    by: str = "error_type",
+    quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+    relative_accuracy: float = 0.01,
+) -> pd.DataFrame:
+    """
+    Aggregate the attempt log by one dimension.
+
+    Counts and sums are added chunk by chunk, and latencies go into one
+    quantile sketch per group, so only the groups are held in memory.
+
+    Args:
+        chunks: Frames from :meth:`AttemptLog.chunks`.
+        by: One of :data:`DIMENSIONS`.
+        quantiles: Latency quantiles to report.
+        relative_accuracy: Relative error of the latency quantiles.
+
+    Returns:
+        pd.DataFrame: One row per group, most frequent first, with ``rows``,
+        ``fix_rate``, ``attempts`` (mean per row), ``tokens`` (total),
+        ``tokens_per_row`` and for each quantile ``q`` the ``p{q}_seconds`` of
+        all rows and the ``p{q}_time_to_fix`` of the successful ones.
+
+    Raises:
+        ValueError: If ``by`` is not a known dimension.
+    """
+    if by not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension {by!r}; use one of {', '.join(DIMENSIONS)}")
+    totals: Optional[pd.DataFrame] = None
+    latency: Dict[str, QuantileSketch] = {}
+    time_to_fix: Dict[str, QuantileSketch] = {}
+
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk = _with_size(chunk) if by == "size" else chunk
+        sums = chunk.groupby(by).agg(
+            rows=("success", "size"),
+            fixed=("success", "sum"),
+            attempts=("attempts", "sum"),
+            tokens=("tokens", "sum"),
+        )
+        totals = sums if totals is None else totals.add(sums, fill_value=0)
+        fixed = chunk["success"].astype(bool)
+        for sketches, rows in ((latency, chunk), (time_to_fix, chunk[fixed])):
+            for group, values in rows.groupby(by)["seconds"]:
+                sketch = sketches.setdefault(str(group), QuantileSketch(relative_accuracy))
+                sketch.add_many(values.to_numpy())
+
+    columns = ["rows", "fix_rate", "attempts", "tokens", "tokens_per_row"]
+    columns += [f"p{q * 100:g}_{name}" for name in ("seconds", "time_to_fix") for q in quantiles]
+    if totals is None:
+        return pd.DataFrame(columns=columns).rename_axis(by)
+
+    totals.index = totals.index.astype(str)
+    report = pd.DataFrame(index=totals.index)
+    report["rows"] = totals["rows"].astype(int)
+    report["fix_rate"] = totals["fixed"] / totals["rows"]
+    report["attempts"] = totals["attempts"] / totals["rows"]
+    report["tokens"] = totals["tokens"].astype(int)
+    report["tokens_per_row"] = totals["tokens"] / totals["rows"]
+    for name, sketches in (("seconds", latency), ("time_to_fix", time_to_fix)):
+        for q in quantiles:
+            report[f"p{q * 100:g}_{name}"] = [
+                sketches[group].quantile(q) if group in sketches else float("nan")
+                for group in report.index
+            ]
+    return report.rename_axis(by).sort_values("rows", ascending=False)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point printing an analytics report.
+
+    Args:
+        argv: Command-line arguments (default: ``sys.argv[1:]``).
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(description="Report on the persisted attempt history.")
+    parser.add_argument(
+        "database", nargs="?", default=os.getenv("ATTEMPT_LOG_DB"), help="Attempt log file"
+    )
+    parser.add_argument("--by", choices=DIMENSIONS, default="error_type", help="Group rows by")
+    parser.add_argument(
+        "--level", choices=(SESSIONS, ATTEMPTS), default=SESSIONS, help="Rows to aggregate"
+    )
+    parser.add_argument("--limit", type=int, default=20, help="Groups shown (0: all)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows read at a time")
+    parser.add_argument("--csv", help="Also write the full report to this CSV file")
+    args = parser.parse_args(argv)
+
+    if not args.database or not os.path.exists(args.database):
+        parser.error("an existing attempt log is required (argument or ATTEMPT_LOG_DB)")
+    log = AttemptLog(args.database)
+    try:
+        report = summarize(log.chunks(args.level, args.chunk_size), by=args.by)
+    finally:
+        log.close()
+
+    if args.csv:
+        report.to_csv(args.csv)
+    shown = report.head(args.limit) if args.limit else report
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(shown.to_string(float_format=lambda value: f"{value:.3g}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,14 +10,28 @@ Website: ruslanmv.com
 """
 
 import base64
+import functools
 import logging
-import subprocess
 from typing import List, Tuple
 
 import pandas as pd
 import streamlit as st
-
-from autodebugger.utils import get_chatbot_suggestion
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from autodebugger.metrics import configure_from_env, export_to_file_from_env
+from autodebugger.optimize import optimize_code
+from autodebugger.oracles import TestOracle
+from autodebugger.pipeline import SessionObserver, run_debug_session
+from autodebugger.runners import get_runner
+from autodebugger.scheduler import (
+    LLM,
+    SANDBOX,
+    SchedulerOverloadedError,
+    WaitCallback,
+    get_scheduler,
+)
+from autodebugger.sandbox import run_code
+from autodebugger.utils import MODEL_ID, get_chatbot_suggestion
 
 # Configure logging
 logging.basicConfig(
@@ -26,53 +40,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-
-def run_code(code: str) -> Tuple[bool, str]:
-    """
-    Execute Python code and capture the output or error.
-
-    This function runs the provided Python code in a subprocess and returns
-    whether it executed successfully along with the output or error message.
-
-    Args:
-        code: Python code string to execute.
-
-    Returns:
-        Tuple[bool, str]: A tuple containing:
-            - bool: True if execution was successful, False otherwise.
-            - str: Standard output if successful, error message if failed.
-
-    Example:
-        >>> success, output = run_code("print('Hello World')")
-        >>> print(f"Success: {success}, Output: {output}")
-        Success: True, Output: Hello World
-    """
-    logger.info("Executing code in subprocess")
-
-    try:
-        result = subprocess.run(
-            ["python", "-c", code],
-            capture_output=True,
-            text=True,
-            timeout=30,  # 30 second timeout for safety
-        )
-
-        if result.returncode == 0:
-            logger.info("Code executed successfully")
-            return True, result.stdout
-        else:
-            logger.warning(f"Code execution failed with error: {result.stderr}")
-            return False, result.stderr
-
-    except subprocess.TimeoutExpired:
-        error_msg = "Code execution timed out (30 seconds)"
-        logger.error(error_msg)
-        return False, error_msg
-
-    except Exception as e:
-        error_msg = f"Unexpected error during code execution: {str(e)}"
-        logger.error(error_msg)
-        return False, error_msg
+# Languages offered in the sidebar and their syntax highlighting names
+LANGUAGES = {"Python": "python", "C": "c", "C++": "cpp", "JavaScript": "javascript"}
 
 
 def create_download_link(df: pd.DataFrame, filename: str = "log.csv") -> str:
@@ -126,12 +95,110 @@ def display_log_data(log_data: List[List]) -> None:
     st.markdown(download_link, unsafe_allow_html=True)
 
 
+class StreamlitSessionObserver(SessionObserver):
+    """
+    Render debugging progress into Streamlit placeholders.
+
+    Args:
+        fixed_code_placeholder: Streamlit placeholder for displaying suggested code.
+        output_zone_placeholder: Streamlit placeholder for displaying execution output.
+        language: Programming language of the code (default: "Python").
+    """
+
+    def __init__(
+        self,
+        fixed_code_placeholder: st.delta_generator.DeltaGenerator,
+        output_zone_placeholder: st.delta_generator.DeltaGenerator,
+        language: str = "Python",
+    ) -> None:
+        self.fixed_code_placeholder = fixed_code_placeholder
+        self.output_zone_placeholder = output_zone_placeholder
+        self.highlight = LANGUAGES.get(language, "python")
+
+    def attempt_started(self, attempt: int) -> None:
+        self.output_zone_placeholder.write(f"🔄 Attempt {attempt}: Running code...")
+
+    def code_succeeded(self, attempt: int, code: str, output: str) -> None:
+        self.output_zone_placeholder.success(
+            f"✅ Code executed successfully!\n\n**Output:**\n```\n{output}\n```"
+        )
+        self.fixed_code_placeholder.write("**Suggested code:**")
+        st.markdown("### 💡 Final Working Code")
+        st.code(code, language=self.highlight)
+
+    def error_encountered(self, attempt: int, error: str) -> None:
+        self.output_zone_placeholder.warning(f"❌ Error encountered:\n```\n{error}\n```")
+
+    def fix_received(self, attempt: int, code: str) -> None:
+        self.output_zone_placeholder.info("🔄 Trying again with the fixed code...")
+
+    def candidate_finished(self, attempt: int, code: str, success: bool, output: str) -> None:
+        if success:
+            self.output_zone_placeholder.success(
+                f"✅ Code executed successfully!\n\n**Output:**\n```\n{output}\n```"
+            )
+        else:
+            self.output_zone_placeholder.warning(f"⚠️ Still has errors:\n```\n{output}\n```")
+
+        self.fixed_code_placeholder.write("**Suggested code:**")
+        st.markdown(f"### 💡 Attempt {attempt}")
+        st.code(code, language=self.highlight)
+
+    def session_failed(self, max_attempts: int) -> None:
+        self.output_zone_placeholder.error(
+            f"❌ Failed to fix code after {max_attempts} attempts. Please review manually."
+        )
+
+    def session_stopped(self, attempt: int, reason: str) -> None:
+        self.output_zone_placeholder.error(
+            f"⛔ Stopped after attempt {attempt}: {reason}. Please review manually."
+        )
+
+
+def _suggest_with_spinner(error: str, code: str, language: str = "Python") -> str:
+    """Request a fix from the model while showing a spinner."""
+    if get_script_run_ctx() is None:
+        # Speculative requests run on a worker thread that cannot draw widgets
+        return get_chatbot_suggestion(error, code, language)
+    with st.spinner("🤖 AI is analyzing and fixing the code..."):
+        return get_chatbot_suggestion(error, code, language)
+
+
+def _identity() -> Tuple[str, str]:
+    """Return the scheduler user (the browser session) and tenant (``X-Tenant`` header)."""
+    ctx = get_script_run_ctx()
+    user = ctx.session_id if ctx is not None else "anonymous"
+    try:
+        tenant = st.context.headers.get("X-Tenant") or "default"
+    except Exception:
+        tenant = "default"
+    return user, tenant
+
+
+def _queue_notice(
+    output_zone_placeholder: st.delta_generator.DeltaGenerator, resource: str
+) -> WaitCallback:
+    """Build a callback showing the queue position while waiting for a slot."""
+
+    def notice(position: int, wait: float) -> None:
+        if get_script_run_ctx() is None:
+            return  # background request, e.g. a speculative fix or an oracle shard
+        output_zone_placeholder.info(
+            f"⏳ Waiting for a {resource} slot: position {position} in the queue, "
+            f"about {wait:.0f}s"
+        )
+
+    return notice
+
+
 def debug_and_run_code(
     code_input: str,
     max_attempts: int,
     run_option: str,
     fixed_code_placeholder: st.delta_generator.DeltaGenerator,
     output_zone_placeholder: st.delta_generator.DeltaGenerator,
+    tests: str = "",
+    language: str = "Python",
 ) -> List[List]:
     """
     Debug and run code with automatic error correction.
@@ -142,85 +209,117 @@ def debug_and_run_code(
     Args:
         code_input: Original Python code provided by the user.
         max_attempts: Maximum number of debugging attempts.
-        run_option: Whether to run code locally ("Yes") or just suggest fixes ("No").
+        run_option: Whether to run code locally ("Yes"), just suggest fixes ("No")
+            or make working code faster with verified benchmarks ("Optimize").
         fixed_code_placeholder: Streamlit placeholder for displaying suggested code.
         output_zone_placeholder: Streamlit placeholder for displaying execution output.
+        tests: Optional assertions or test functions the fixed code must pass.
+        language: Programming language of the code (default: "Python").
 
     Returns:
         List[List]: Log data containing attempt history with codes, errors, and results.
     """
     log_data: List[List] = []
+    scheduler = get_scheduler()
+    user, tenant = _identity()
 
     if run_option == "Yes":
-        logger.info(f"Starting code debugging with max {max_attempts} attempts")
-        code = code_input
-        attempt = 1
-        success = False
-        error = ""
-
-        while not success and attempt <= max_attempts:
-            output_zone_placeholder.write(f"🔄 Attempt {attempt}: Running code...")
-            success, output = run_code(code)
-
-            if success:
-                output_zone_placeholder.success(
-                    f"✅ Code executed successfully!\n\n**Output:**\n```\n{output}\n```"
-                )
-                fixed_code_placeholder.write("**Suggested code:**")
-                st.markdown("### 💡 Final Working Code")
-                st.code(code, language="python")
-                log_data.append([attempt, code_input, code, "", success])
-                logger.info(f"Code succeeded on attempt {attempt}")
-                break
-            else:
-                error = output
-                logger.info(f"Attempt {attempt} failed, requesting AI fix")
-                output_zone_placeholder.warning(f"❌ Error encountered:\n```\n{error}\n```")
-
-                with st.spinner("🤖 AI is analyzing and fixing the code..."):
-                    suggestion = get_chatbot_suggestion(error, code)
-
-                code = suggestion
-                output_zone_placeholder.info("🔄 Trying again with the fixed code...")
-
-                success, output = run_code(code)
-
-                if success:
-                    output_zone_placeholder.success(
-                        f"✅ Code executed successfully!\n\n**Output:**\n```\n{output}\n```"
-                    )
-                else:
-                    output_zone_placeholder.warning(
-                        f"⚠️ Still has errors:\n```\n{output}\n```"
-                    )
-
-                fixed_code_placeholder.write("**Suggested code:**")
-                st.markdown(f"### 💡 Attempt {attempt}")
-                st.code(code, language="python")
-
-                log_data.append([attempt, code_input, code, error, success])
-                attempt += 1
-
-        if not success:
+        suggest = scheduler.wrap(
+            LLM,
+            functools.partial(_suggest_with_spinner, language=language),
+            user,
+            tenant,
+            _queue_notice(output_zone_placeholder, "model"),
+        )
+        run = scheduler.wrap(
+            SANDBOX,
+            get_runner(language),
+            user,
+            tenant,
+            _queue_notice(output_zone_placeholder, "sandbox"),
+        )
+        oracle = None
+        if tests.strip() and language == "Python":
+            try:
+                oracle = TestOracle(tests, run=run)
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+                return log_data
+        observer = StreamlitSessionObserver(
+            fixed_code_placeholder, output_zone_placeholder, language
+        )
+        result = run_debug_session(
+            code_input,
+            max_attempts,
+            suggest=suggest,
+            run=run,
+            observer=observer,
+            oracle=oracle,
+            model=MODEL_ID.value,
+        )
+        log_data = result.log_rows()
+
+    elif run_option == "Optimize":
+        if language != "Python":
+            st.error("⚠️ Optimize mode benchmarks Python code only.")
+            return log_data
+        suggest = scheduler.wrap(
+            LLM,
+            _suggest_with_spinner,
+            user,
+            tenant,
+            _queue_notice(output_zone_placeholder, "model"),
+        )
+        run = scheduler.wrap(
+            SANDBOX,
+            get_runner(language),
+            user,
+            tenant,
+            _queue_notice(output_zone_placeholder, "sandbox"),
+        )
+        output_zone_placeholder.write("⏱️ Profiling and benchmarking the original code...")
+        optimization, error = optimize_code(code_input, suggest, run=run)
+        if optimization is None:
             output_zone_placeholder.error(
-                f"❌ Failed to fix code after {max_attempts} attempts. Please review manually."
+                f"❌ The code must run before it can be optimized:\n```\n{error}\n```"
             )
-            logger.warning(f"Code debugging failed after {max_attempts} attempts")
+            return log_data
+
+        best = optimization.best
+        if best is None:
+            output_zone_placeholder.warning(
+                "⚠️ No candidate was both correct and measurably faster; keeping the original."
+            )
+        else:
+            output_zone_placeholder.success(f"✅ Optimized: {best.reason}")
+        speedup_column, memory_column = st.columns(2)
+        speedup_column.metric("Speedup", f"{optimization.speedup:.2f}x")
+        memory_column.metric("Peak memory change", f"{optimization.memory_delta / 1024:+.1f} KiB")
+        st.markdown("### 💡 Verified Optimized Code")
+        st.code(optimization.final_code, language="python")
+
+        for number, candidate in enumerate(optimization.candidates, start=1):
+            verdict = "Accepted" if candidate.accepted else "Rejected"
+            log_data.append([number, code_input, candidate.code, candidate.reason, verdict])
 
     else:
         # Skip execution, just get AI suggestion
         logger.info("Skipping execution, requesting AI code review")
         output_zone_placeholder.info("⏭️ Code execution skipped.")
 
+        review = scheduler.wrap(
+            LLM,
+            get_chatbot_suggestion,
+            user,
+            tenant,
+            _queue_notice(output_zone_placeholder, "model"),
+        )
         with st.spinner("🤖 AI is analyzing and optimizing your code..."):
-            code = code_input
-            error = ""
-            suggestion = get_chatbot_suggestion(error, code)
-            code = suggestion
+            code = review("", code_input, language)
 
         fixed_code_placeholder.write("**Suggested fix applied:**")
-        st.markdown("### 💡 AI-Optimized Code")
-        st.code(code, language="python")
+        st.markdown("### 💡 AI-Reviewed Code (not executed)")
+        st.code(code, language=LANGUAGES.get(language, "python"))
 
         log_data.append([1, code_input, code, "", "Not Executed"])
 
@@ -234,6 +333,9 @@ def main() -> None:
     This function sets up the Streamlit UI and handles user interactions
     for the Auto Error Debugger Assistant.
     """
+    # Expose metrics if METRICS_PORT is configured
+    configure_from_env()
+
     # Page configuration
     st.set_page_config(
         page_title="Auto Error Debugger Assistant",
@@ -264,10 +366,19 @@ def main() -> None:
             help="Number of times to attempt fixing the code",
         )
 
+        language = st.selectbox(
+            "Language",
+            options=list(LANGUAGES),
+            help="C and C++ use the local compiler, JavaScript uses Node.js",
+        )
+
         run_option = st.selectbox(
             "Execute Code Locally",
-            options=("Yes", "No"),
-            help="Choose 'Yes' to run and debug, 'No' for code review only",
+            options=("Yes", "No", "Optimize"),
+            help=(
+                "Choose 'Yes' to run and debug, 'No' for code review only, 'Optimize' to "
+                "benchmark AI rewrites of working Python code and keep only faster ones"
+            ),
         )
 
         st.markdown("---")
@@ -296,6 +407,13 @@ def main() -> None:
         placeholder="# Enter your Python code here\nprint('Hello, World!')",
     )
 
+    tests = st.text_area(
+        "🧪 Tests (optional):",
+        height=120,
+        placeholder="# Assertions or test_* functions the fixed code must pass\nassert add(2, 3) == 5",
+        help="Only used when executing Python code locally",
+    )
+
     # Placeholders for dynamic content
     fixed_code_placeholder = st.empty()
     output_zone_placeholder = st.empty()
@@ -309,16 +427,24 @@ def main() -> None:
 
         logger.info("Starting debug process")
 
-        log_data = debug_and_run_code(
-            code_input,
-            max_attempts,
-            run_option,
-            fixed_code_placeholder,
-            output_zone_placeholder,
-        )
+        try:
+            log_data = debug_and_run_code(
+                code_input,
+                max_attempts,
+                run_option,
+                fixed_code_placeholder,
+                output_zone_placeholder,
+                tests,
+                language,
+            )
+        except SchedulerOverloadedError as e:
+            output_zone_placeholder.error(f"🚦 {e}")
+            logger.warning(f"Request rejected by admission control: {e}")
+            return
 
         # Display log data
         display_log_data(log_data)
+        export_to_file_from_env()
 
         logger.info("Debug process completed")
 
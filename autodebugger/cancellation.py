@@ -0,0 +1,189 @@
+"""
+Cooperative cancellation of debugging sessions.
+
+A :class:`CancellationToken` is made current for the duration of a session
+with :func:`cancel_scope`. Blocking operations look it up with
+:func:`current_token` and give up as soon as it is cancelled: the sandbox kills
+the process group of the running program, model calls stop waiting for the
+provider, and the scheduler drops requests still queued for a slot. Each of
+them raises :class:`CancelledError`, which ends the session and releases the
+slots it held.
+
+The current token is a context variable; work submitted to other threads
+carries it along when run with :func:`propagate`.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_current: "contextvars.ContextVar[Optional[CancellationToken]]" = contextvars.ContextVar(
+    "autodebugger_cancellation", default=None
+)
+
+
+class CancelledError(Exception):
+    """Raised when an operation is abandoned because its session was cancelled."""
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag with callbacks.
+
+    Args:
+        parent: Token whose cancellation also cancels this one.
+
+    Example:
+        >>> token = CancellationToken()
+        >>> token.cancel("stopped by the user")
+        >>> token.cancelled
+        True
+    """
+
+    def __init__(self, parent: Optional["CancellationToken"] = None) -> None:
+        self.reason = ""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_handle = 0
+        self._parent_handle: Optional[int] = None
+        self._parent = parent
+        if parent is not None:
+            self._parent_handle = parent.on_cancel(lambda: self.cancel(parent.reason))
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled."""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Cancel the token and run its callbacks once.
+
+        Args:
+            reason: Why the work was cancelled, reported to the user.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = list(self._callbacks.values()), {}
+        logger.info(f"Cancelling: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancellation callback failed: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> int:
+        """
+        Register a callback run when the token is cancelled.
+
+        The callback runs immediately if the token is already cancelled.
+
+        Args:
+            callback: Function without arguments, e.g. killing a process.
+
+        Returns:
+            int: Handle to pass to :meth:`remove`.
+        """
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 1
+            if not self._event.is_set():
+                self._callbacks[handle] = callback
+                return handle
+        callback()
+        return handle
+
+    def remove(self, handle: int) -> None:
+        """Unregister a callback that is no longer needed."""
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def detach(self) -> None:
+        """Stop following the parent token."""
+        if self._parent is not None and self._parent_handle is not None:
+            self._parent.remove(self._parent_handle)
+            self._parent_handle = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sleep until the token is cancelled or the timeout expires.
+
+        Returns:
+            bool: Whether the token was cancelled.
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raise if the token was cancelled.
+
+        Raises:
+            CancelledError: With the cancellation reason.
+        """
+        if self._event.is_set():
+            raise CancelledError(self.reason)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Return the token of the running session, if any."""
+    return _current.get()
+
+
+def check_cancelled() -> None:
+    """
+    Raise if the running session was cancelled.
+
+    Raises:
+        CancelledError: With the cancellation reason.
+    """
+    token = _current.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def cancel_scope(token: Optional[CancellationToken]) -> Iterator[Optional[CancellationToken]]:
+    """
+    Make a token current for the duration of a ``with`` block.
+
+    Example:
+        >>> with cancel_scope(CancellationToken()) as token:
+        ...     check_cancelled()
+    """
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def propagate(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Bind a function to the current context, so a worker thread running it
+    sees the current token.
+
+    Args:
+        func: Function to run on another thread.
+
+    Returns:
+        Callable: The function running in a copy of the current context.
+    """
+    context = contextvars.copy_context()
+
+    def bound(*args: Any, **kwargs: Any) -> T:
+        return context.copy().run(func, *args, **kwargs)
+
+    return bound
@@ -0,0 +1,151 @@
+"""
+Record and replay of model calls.
+
+This module makes runs against the model repeatable. In record mode every
+prompt sent to the model is appended to a cassette file together with the raw
+response and how long the call took; in replay mode the cassette answers the
+same prompts with the recorded responses, after the original latency scaled by
+a factor, without credentials or network access. Production sessions recorded
+once can then be replayed offline to compare pipeline changes.
+
+Enable it with ``LLM_CASSETTE`` (the file), ``LLM_CASSETTE_MODE`` (``record``
+or ``replay``) and ``LLM_CASSETTE_LATENCY`` (latency factor for replay,
+default 1; 0 answers immediately).
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, DefaultDict, Dict, List, Optional
+
+from autodebugger.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when a prompt was not recorded."""
+
+
+def prompt_key(prompt: str) -> str:
+    """Return the key a prompt is recorded under."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    A file of recorded model calls (one JSON object per line).
+
+    A prompt recorded several times is replayed with its responses in
+    recording order, the last one repeating once they are used up.
+
+    Args:
+        path: Cassette file.
+        mode: ``"record"`` to append live calls, ``"replay"`` to answer from the file.
+        latency_scale: Factor applied to the recorded latency when replaying.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, latency_scale: float = 1.0) -> None:
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r}; use {RECORD!r} or {REPLAY!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: DefaultDict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._played: Dict[str, int] = {}
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+        logger.info(f"Loaded {len(self)} recorded model calls from {self.path}")
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def play(self, prompt: str, params: Dict[str, Any], call: Callable[[], Any]) -> Any:
+        """
+        Answer a model call from the cassette or record it.
+
+        Args:
+            prompt: The prompt sent to the model.
+            params: Generation parameters, stored for reference.
+            call: Makes the live call and returns the raw model response.
+
+        Returns:
+            The recorded response (replay) or the live one (record).
+
+        Raises:
+            CassetteMissError: If the prompt was not recorded (replay mode).
+        """
+        key = prompt_key(prompt)
+        if self.mode == RECORD:
+            start = time.perf_counter()
+            response = call()
+            entry = {
+                "key": key,
+                "prompt": prompt,
+                "params": params,
+                "response": response,
+                "seconds": round(time.perf_counter() - start, 4),
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+                self._entries[key].append(entry)
+            return response
+
+        with self._lock:
+            entries = self._entries.get(key)
+            record_cache_lookup("cassette", bool(entries))
+            if not entries:
+                raise CassetteMissError(f"Prompt {key[:12]} is not on cassette {self.path}")
+            index = self._played.get(key, 0)
+            self._played[key] = index + 1
+            entry = entries[min(index, len(entries) - 1)]
+        delay = entry.get("seconds", 0.0) * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+        return entry["response"]
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Return the cassette configured by ``LLM_CASSETTE`` and ``LLM_CASSETTE_MODE``.
+
+    Returns:
+        Optional[Cassette]: The shared cassette, or None for live calls only.
+    """
+    global _cassette
+    path = os.getenv("LLM_CASSETTE")
+    if not path:
+        return None
+    mode = os.getenv("LLM_CASSETTE_MODE", REPLAY).lower()
+    scale = float(os.getenv("LLM_CASSETTE_LATENCY", "1"))
+    with _cassette_lock:
+        if _cassette is None or (_cassette.path, _cassette.mode) != (path, mode):
+            _cassette = Cassette(path, mode, scale)
+        _cassette.latency_scale = scale
+        return _cassette
@@ -0,0 +1,338 @@
+"""
+Fix attempt history.
+
+This module remembers every version of the code tried during a debugging
+session, keyed by a hash of the normalized code, together with a signature of
+the error it produced. The pipeline uses it to recognize suggestions that
+leave the code unchanged or return to a version that already failed, without
+executing them again.
+
+Versions are kept in a :class:`VersionStore`: content-addressed, with each
+version stored as a line diff against the one before it (optionally
+compressed), so a session's memory grows with the size of the edits rather
+than with the size of the file times the number of attempts.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import difflib
+import hashlib
+import io
+import json
+import os
+import re
+import tokenize
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+# Tokens that do not change what the code does
+_IGNORED_TOKENS = (tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER)
+
+_ADDRESS_PATTERN = re.compile(r"0x[0-9a-fA-F]+")
+_LINE_PATTERN = re.compile(r"line \d+")
+
+NOOP = "no-op suggestion"
+REPEAT = "repeated suggestion"
+
+
+def normalize_code(code: str) -> str:
+    """
+    Normalize code so that comment and whitespace edits compare equal.
+
+    Args:
+        code: Python source code.
+
+    Returns:
+        str: One token per line, without comments or blank lines. Code that
+        cannot be tokenized falls back to its stripped non-empty lines.
+    """
+    try:
+        tokens = tokenize.generate_tokens(io.StringIO(code).readline)
+        return "\n".join(
+            (
+                tokenize.tok_name[token.type]
+                if token.type in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT)
+                else token.string
+            )
+            for token in tokens
+            if token.type not in _IGNORED_TOKENS
+        )
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return "\n".join(line.strip() for line in code.splitlines() if line.strip())
+
+
+def code_hash(code: str) -> str:
+    """
+    Hash the normalized form of a piece of code.
+
+    Args:
+        code: Python source code.
+
+    Returns:
+        str: Hex digest identifying the code up to formatting.
+    """
+    return hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest()[:16]
+
+
+def error_signature(output: str) -> str:
+    """
+    Reduce an error message to the part that identifies the failure.
+
+    Keeps the final exception line of a traceback and masks memory addresses
+    and line numbers, which change between otherwise identical failures.
+
+    Args:
+        output: Error output of a failed run.
+
+    Returns:
+        str: The error signature ("" for empty output).
+
+    Example:
+        >>> error_signature('Traceback ...\\nNameError: name "x" is not defined')
+        'NameError: name "x" is not defined'
+    """
+    lines = [line.strip() for line in output.strip().splitlines() if line.strip()]
+    if not lines:
+        return ""
+    signature = _ADDRESS_PATTERN.sub("0x?", lines[-1])
+    return _LINE_PATTERN.sub("line ?", signature)
+
+
+# A delta is a list of copied line ranges of the parent and inserted text
+_Delta = List[Union[Tuple[int, int], str]]
+
+
+@dataclass
+class _StoredVersion:
+    parent: Optional[str]
+    payload: bytes
+    depth: int
+
+
+class VersionStore:
+    """
+    Content-addressed store of code versions, kept as diffs between versions.
+
+    Each version is stored as the line ranges it shares with its parent (by
+    default the version stored before it) plus the inserted text. A full copy
+    is kept instead when it is smaller than the diff or when the chain of diffs
+    leading to the version reaches ``max_chain``, which bounds the cost of
+    rebuilding a version.
+
+    Args:
+        compress: Compress stored versions with zlib (default:
+            ``HISTORY_COMPRESSION``).
+        max_chain: Diffs applied at most to rebuild a version.
+
+    Example:
+        >>> store = VersionStore()
+        >>> key = store.put("x = 1\nprint(y)\n")
+        >>> store.get(store.put("x = 1\nprint(x)\n"))
+        'x = 1\nprint(x)\n'
+    """
+
+    def __init__(self, compress: Optional[bool] = None, max_chain: int = 32) -> None:
+        if compress is None:
+            compress = os.getenv("HISTORY_COMPRESSION", "0").lower() in ("1", "true", "yes")
+        self.compress = compress
+        self.max_chain = max_chain
+        self._versions: Dict[str, _StoredVersion] = {}
+        self._latest: Optional[Tuple[str, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._versions
+
+    @property
+    def stored_bytes(self) -> int:
+        """Bytes held by the stored versions."""
+        return sum(len(version.payload) for version in self._versions.values())
+
+    @staticmethod
+    def key(code: str) -> str:
+        """Return the key a version is stored under (the hash of its exact text)."""
+        return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+    def _encode(self, data: Union[str, _Delta]) -> bytes:
+        raw = (data if isinstance(data, str) else json.dumps(data)).encode("utf-8")
+        return zlib.compress(raw) if self.compress else raw
+
+    def _decode(self, payload: bytes) -> str:
+        return (zlib.decompress(payload) if self.compress else payload).decode("utf-8")
+
+    def _lines(self, key: str) -> List[str]:
+        if self._latest is not None and self._latest[0] == key:
+            return self._latest[1]
+        chain = []
+        while True:
+            version = self._versions[key]
+            if version.parent is None:
+                break
+            chain.append(version)
+            key = version.parent
+        lines = self._decode(version.payload).splitlines(keepends=True)
+        for version in reversed(chain):
+            rebuilt: List[str] = []
+            for part in json.loads(self._decode(version.payload)):
+                if isinstance(part, str):
+                    rebuilt.append(part)
+                else:
+                    rebuilt.extend(lines[part[0] : part[1]])
+            lines = rebuilt
+        return lines
+
+    def put(self, code: str, parent: Optional[str] = None) -> str:
+        """
+        Store a version of the code.
+
+        Args:
+            code: The code.
+            parent: Key of the version to diff against (default: the version
+                stored last).
+
+        Returns:
+            str: The key of the version, to be passed to :meth:`get`.
+        """
+        key = self.key(code)
+        lines = code.splitlines(keepends=True)
+        if key not in self._versions:
+            if parent is None and self._latest is not None:
+                parent = self._latest[0]
+            stored = _StoredVersion(None, self._encode(code), 0)
+            if parent is not None and self._versions[parent].depth < self.max_chain:
+                delta: _Delta = []
+                matcher = difflib.SequenceMatcher(None, self._lines(parent), lines)
+                for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                    if tag == "equal":
+                        delta.append((i1, i2))
+                    elif j2 > j1:
+                        delta.append("".join(lines[j1:j2]))
+                payload = self._encode(delta)
+                if len(payload) < len(stored.payload):
+                    stored = _StoredVersion(parent, payload, self._versions[parent].depth + 1)
+            self._versions[key] = stored
+        self._latest = (key, lines)
+        return key
+
+    def get(self, key: str) -> str:
+        """
+        Rebuild a stored version.
+
+        Args:
+            key: Key returned by :meth:`put`.
+
+        Returns:
+            str: The code.
+
+        Raises:
+            KeyError: If no version is stored under the key.
+        """
+        return "".join(self._lines(key))
+
+
+@dataclass
+class HistoryEntry:
+    """
+    A version of the code tried in a session.
+
+    Attributes:
+        version: Key of the code in ``versions``.
+        error: Error output of its run.
+        signature: Error signature of its run.
+        versions: Store holding the code.
+    """
+
+    version: str
+    error: str
+    signature: str
+    versions: VersionStore = field(repr=False, compare=False)
+
+    @property
+    def code(self) -> str:
+        """The code as suggested."""
+        return self.versions.get(self.version)
+
+
+class AttemptHistory:
+    """
+    Failed code versions of one session, keyed by normalized-code hash.
+
+    Args:
+        max_prompt_entries: Failed versions quoted when re-prompting the model.
+        versions: Store keeping the code of the versions (default: a new one).
+    """
+
+    def __init__(
+        self, max_prompt_entries: int = 3, versions: Optional[VersionStore] = None
+    ) -> None:
+        self.max_prompt_entries = max_prompt_entries
+        self.versions = versions if versions is not None else VersionStore()
+        self._entries: Dict[str, HistoryEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, code: str, error: str) -> None:
+        """
+        Remember a code version that failed.
+
+        Args:
+            code: The code that was executed.
+            error: Its error output.
+        """
+        self._entries[code_hash(code)] = HistoryEntry(
+            self.versions.put(code), error, error_signature(error), self.versions
+        )
+
+    def lookup(self, code: str) -> Optional[HistoryEntry]:
+        """
+        Return the entry of an equivalent code version that already failed.
+
+        Args:
+            code: Candidate code.
+
+        Returns:
+            Optional[HistoryEntry]: The earlier failure, or None if the code is new.
+        """
+        return self._entries.get(code_hash(code))
+
+    def rejection(self, current: str, candidate: str) -> str:
+        """
+        Decide whether a suggested fix is worth executing.
+
+        Args:
+            current: The failing code the fix was requested for.
+            candidate: The suggested fix.
+
+        Returns:
+            str: :data:`NOOP` if the fix does not change the code, :data:`REPEAT`
+            if it is a version that already failed, "" otherwise.
+        """
+        if code_hash(candidate) == code_hash(current):
+            return NOOP
+        if self.lookup(candidate) is not None:
+            return REPEAT
+        return ""
+
+    def reprompt(self, error: str) -> str:
+        """
+        Extend an error message with the fixes that were already tried.
+
+        Args:
+            error: Error of the current code.
+
+        Returns:
+            str: The error followed by the most recent failed versions.
+        """
+        entries: List[HistoryEntry] = list(self._entries.values())[-self.max_prompt_entries :]
+        tried = "\n\n".join(
+            f"```python\n{entry.code}\n```\nfailed with: {entry.signature}" for entry in entries
+        )
+        return (
+            f"{error}\n\nThese versions were already tried and failed, "
+            f"suggest a different fix:\n\n{tried}"
+        )
@@ -0,0 +1,287 @@
+"""
+Fix knowledge base.
+
+This module persists the ``(error signature, original code, fixed code)``
+pairs of successful sessions in an indexed SQLite store and retrieves similar
+past fixes with MinHash signatures and locality-sensitive hashing (LSH) over
+the normalized code. An exact match is applied without asking the model;
+similar fixes are shown to the model as examples.
+
+Enable it by pointing ``FIX_KNOWLEDGE_DB`` at a database file.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set
+
+from autodebugger.history import code_hash, error_signature, normalize_code
+from autodebugger.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fixes (
+    id INTEGER PRIMARY KEY,
+    signature TEXT NOT NULL,
+    code_hash TEXT NOT NULL,
+    original TEXT NOT NULL,
+    fixed TEXT NOT NULL,
+    minhash BLOB NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (code_hash, signature)
+);
+CREATE INDEX IF NOT EXISTS fixes_signature ON fixes (signature);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    fix_id INTEGER NOT NULL REFERENCES fixes (id),
+    PRIMARY KEY (band, bucket, fix_id)
+);
+"""
+
+
+def shingles(code: str) -> Set[str]:
+    """
+    Split code into overlapping token n-grams.
+
+    Args:
+        code: Python source code.
+
+    Returns:
+        Set[str]: Token shingles of the normalized code.
+    """
+    tokens = normalize_code(code).split("\n")
+    if len(tokens) <= SHINGLE_SIZE:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i : i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(features: Set[str]) -> List[int]:
+    """
+    Compute the MinHash signature of a set of shingles.
+
+    Args:
+        features: Shingles from :func:`shingles`.
+
+    Returns:
+        List[int]: ``NUM_PERMUTATIONS`` minimum hash values.
+    """
+    hashes = [
+        int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        for item in features
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures."""
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERMUTATIONS
+
+
+def _band_buckets(signature: Sequence[int]) -> List[str]:
+    return [
+        hashlib.blake2b(
+            repr(tuple(signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND])).encode(),
+            digest_size=8,
+        ).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+@dataclass
+class KnownFix:
+    """
+    A stored fix matching a query.
+
+    Attributes:
+        signature: Error signature the fix was recorded for.
+        original: Code that produced the error.
+        fixed: Code that ran successfully.
+        similarity: Estimated Jaccard similarity with the queried code.
+        exact: Whether the code and error signature match exactly.
+    """
+
+    signature: str
+    original: str
+    fixed: str
+    similarity: float
+    exact: bool = False
+
+
+class FixKnowledgeBase:
+    """
+    SQLite-backed store of successful fixes with similarity search.
+
+    Args:
+        path: Database file (``":memory:"`` for a throwaway store).
+        min_similarity: Minimum code similarity for a fix with a different
+            error signature to be returned as an example.
+        max_example_chars: Longest code quoted in a few-shot example.
+    """
+
+    def __init__(
+        self, path: str, min_similarity: float = 0.5, max_example_chars: int = 2000
+    ) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.min_similarity = min_similarity
+        self.max_example_chars = max_example_chars
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM fixes").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def add(self, error: str, original: str, fixed: str) -> None:
+        """
+        Store a successful fix.
+
+        Args:
+            error: Error output of the original code.
+            original: Code that failed.
+            fixed: Code that ran successfully.
+        """
+        signature = error_signature(error)
+        key = code_hash(original)
+        hashes = minhash(shingles(original))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO fixes (signature, code_hash, original, fixed, minhash) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (code_hash, signature) "
+                "DO UPDATE SET fixed = excluded.fixed",
+                (signature, key, original, fixed, array("Q", hashes).tobytes()),
+            )
+            fix_id = self._connection.execute(
+                "SELECT id FROM fixes WHERE code_hash = ? AND signature = ?", (key, signature)
+            ).fetchone()[0]
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets (band, bucket, fix_id) VALUES (?, ?, ?)",
+                [(band, bucket, fix_id) for band, bucket in enumerate(_band_buckets(hashes))],
+            )
+        logger.debug(f"Stored fix for {signature!r}")
+
+    def lookup(self, error: str, code: str, limit: int = 3) -> List[KnownFix]:
+        """
+        Find stored fixes for a failing piece of code.
+
+        Candidates are fixes sharing an LSH bucket with the code or recorded for
+        the same error signature. They are ranked by code similarity, with
+        same-signature fixes first.
+
+        Args:
+            error: Error output of the failing code.
+            code: The failing code.
+            limit: Maximum number of fixes returned.
+
+        Returns:
+            List[KnownFix]: Matching fixes, best first; an exact match, if any,
+            comes first and has ``exact`` set.
+        """
+        signature = error_signature(error)
+        key = code_hash(code)
+        hashes = minhash(shingles(code))
+        buckets = _band_buckets(hashes)
+        clause = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+        params = [value for pair in enumerate(buckets) for value in pair]
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, signature, code_hash, original, fixed, minhash FROM fixes "
+                f"WHERE id IN (SELECT fix_id FROM lsh_buckets WHERE {clause}) "
+                "UNION SELECT id, signature, code_hash, original, fixed, minhash FROM fixes "
+                "WHERE signature = ? LIMIT 200",
+                (*params, signature),
+            ).fetchall()
+
+        matches: Dict[int, KnownFix] = {}
+        for fix_id, fix_signature, fix_key, original, fixed, blob in rows:
+            score = similarity(hashes, array("Q", blob))
+            same_signature = fix_signature == signature
+            if not same_signature and score < self.min_similarity:
+                continue
+            matches[fix_id] = KnownFix(
+                fix_signature, original, fixed, score, same_signature and fix_key == key
+            )
+
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (item[1].exact, item[1].signature == signature, item[1].similarity),
+            reverse=True,
+        )[:limit]
+        if ranked and ranked[0][1].exact:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "UPDATE fixes SET uses = uses + 1 WHERE id = ?", (ranked[0][0],)
+                )
+        record_cache_lookup("fix_knowledge", bool(ranked) and ranked[0][1].exact)
+        return [fix for _, fix in ranked]
+
+    def with_examples(self, error: str, matches: Sequence[KnownFix]) -> str:
+        """
+        Extend an error message with similar past fixes as few-shot examples.
+
+        Args:
+            error: Error of the current code.
+            matches: Fixes returned by :meth:`lookup`.
+
+        Returns:
+            str: The error followed by the examples (unchanged if none fit).
+        """
+        examples = [
+            f"```python\n{match.original}\n```\nfailed with: {match.signature}\n"
+            f"and was fixed as:\n```python\n{match.fixed}\n```"
+            for match in matches
+            if len(match.original) + len(match.fixed) <= self.max_example_chars
+        ]
+        if not examples:
+            return error
+        return f"{error}\n\nSimilar errors were fixed like this:\n\n" + "\n\n".join(examples)
+
+
+_default_knowledge_base: Optional[FixKnowledgeBase] = None
+_default_lock = threading.Lock()
+
+
+def get_knowledge_base() -> Optional[FixKnowledgeBase]:
+    """
+    Return the shared knowledge base configured by ``FIX_KNOWLEDGE_DB``.
+
+    Returns:
+        Optional[FixKnowledgeBase]: The store, or None if it is not configured.
+    """
+    global _default_knowledge_base
+    path = os.getenv("FIX_KNOWLEDGE_DB")
+    if not path:
+        return None
+    with _default_lock:
+        if _default_knowledge_base is None or _default_knowledge_base.path != path:
+            logger.info(f"Opening fix knowledge base at {path}")
+            _default_knowledge_base = FixKnowledgeBase(path)
+        return _default_knowledge_base
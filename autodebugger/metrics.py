@@ -0,0 +1,532 @@
+"""
+Lightweight metrics for the debugging pipeline.
+
+This module provides thread-safe counters and histograms for every stage of a
+debugging session (sandbox spawn and run, LLM requests, token usage, cache
+lookups, attempts per session) and exports them in the Prometheus text
+exposition format, either from a local HTTP endpoint or to a file that can be
+picked up by a node-exporter textfile collector.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+TOKEN_BUCKETS: Tuple[float, ...] = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+ATTEMPT_BUCKETS: Tuple[float, ...] = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects it."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a ``{name="value",...}`` label block (empty if no labels)."""
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape_label(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Base class holding the name, help text and label names of a metric."""
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        """Return the exposition lines for this metric."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Drop all recorded samples."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increment the counter.
+
+        Args:
+            amount: Non-negative amount to add (default: 1).
+            **labels: Label values, one per configured label name.
+
+        Raises:
+            ValueError: If the amount is negative or labels do not match.
+        """
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        key = self._label_values(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """A cumulative histogram with fixed bucket boundaries."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(float(b) for b in buckets)
+        if not bounds or not math.isinf(bounds[-1]):
+            bounds.append(math.inf)
+        self.buckets: Tuple[float, ...] = tuple(bounds)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record a single observation.
+
+        Args:
+            value: Observed value (seconds, tokens, attempts, ...).
+            **labels: Label values, one per configured label name.
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Return the number of observations for the given labels."""
+        key = self._label_values(labels)
+        with self._lock:
+            return sum(self._counts.get(key, ()))
+
+    def quantile(self, q: float, **labels: str) -> float:
+        """
+        Estimate a quantile by linear interpolation inside the matching bucket.
+
+        Args:
+            q: Quantile in ``[0, 1]`` (e.g. 0.95 for p95).
+            **labels: Label values, one per configured label name.
+
+        Returns:
+            float: Estimated quantile, or ``nan`` if nothing was observed.
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            counts = list(self._counts.get(key, ()))
+        total = sum(counts)
+        if not total:
+            return math.nan
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if cumulative + count >= rank and count:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return lower
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            keys = sorted(self._counts)
+            snapshot = [(k, list(self._counts[k]), self._sums[k]) for k in keys]
+        lines: List[str] = []
+        names = self.labelnames + ("le",)
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+class MetricsRegistry:
+    """A collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Add a metric to the registry.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.register(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all recorded samples, keeping the registered metrics."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+SANDBOX_SPAWN_SECONDS = REGISTRY.histogram(
+    "autodebugger_sandbox_spawn_seconds",
+    "Time to start the sandbox subprocess.",
+)
+SANDBOX_BUILD_SECONDS = REGISTRY.histogram(
+    "autodebugger_sandbox_build_seconds",
+    "Time to compile a program that was not in the build cache.",
+    ["language"],
+)
+WORKER_REQUESTS = REGISTRY.counter(
+    "autodebugger_worker_requests",
+    "Runs sent to remote sandbox workers, by result (ok, busy or error).",
+    ["result"],
+)
+SANDBOX_RUN_SECONDS = REGISTRY.histogram(
+    "autodebugger_sandbox_run_seconds",
+    "Time from sandbox start until the program exits or times out.",
+    ["outcome"],
+)
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "autodebugger_llm_request_seconds",
+    "Latency of model generation requests.",
+    ["outcome"],
+)
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    "autodebugger_llm_prompt_tokens",
+    "Prompt tokens sent per model request.",
+    buckets=TOKEN_BUCKETS,
+)
+LLM_COMPLETION_TOKENS = REGISTRY.histogram(
+    "autodebugger_llm_completion_tokens",
+    "Completion tokens generated per model request.",
+    buckets=TOKEN_BUCKETS,
+)
+LLM_PLANNED_NEW_TOKENS = REGISTRY.histogram(
+    "autodebugger_llm_planned_new_tokens",
+    "Output cap (MAX_NEW_TOKENS) planned per model request.",
+    buckets=TOKEN_BUCKETS,
+)
+LLM_OVERSIZED_REQUESTS = REGISTRY.counter(
+    "autodebugger_llm_oversized_requests",
+    "Requests too large for the token budget, by action (split or rejected).",
+    ["action"],
+)
+LLM_RETRIES = REGISTRY.counter(
+    "autodebugger_llm_retries",
+    "Retried model requests by reason (HTTP status or error type).",
+    ["reason"],
+)
+LLM_CIRCUIT_REJECTIONS = REGISTRY.counter(
+    "autodebugger_llm_circuit_rejections",
+    "Model requests rejected while the circuit breaker was open.",
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "autodebugger_cache_requests",
+    "Cache lookups by cache name and result (hit or miss).",
+    ["cache", "result"],
+)
+QUICKFIX_RULES = REGISTRY.counter(
+    "autodebugger_quickfix_rules",
+    "Quick-fix rule evaluations by rule and result (hit or miss).",
+    ["rule", "result"],
+)
+SKIPPED_SUGGESTIONS = REGISTRY.counter(
+    "autodebugger_skipped_suggestions",
+    "Suggested fixes not executed, by reason (no-op or repeated suggestion).",
+    ["reason"],
+)
+EARLY_STOPS = REGISTRY.counter(
+    "autodebugger_early_stops",
+    "Sessions stopped before max_attempts, by reason.",
+    ["reason"],
+)
+ORACLE_SHARDS = REGISTRY.counter(
+    "autodebugger_oracle_shards",
+    "Test oracle shards by result (pass, fail or cancelled).",
+    ["result"],
+)
+SPECULATIVE_FIXES = REGISTRY.counter(
+    "autodebugger_speculative_fixes",
+    "Speculative fix requests by result (used, discarded, cancelled or failed).",
+    ["result"],
+)
+SCHEDULER_WAIT_SECONDS = REGISTRY.histogram(
+    "autodebugger_scheduler_wait_seconds",
+    "Time requests waited for a model or sandbox slot.",
+    ["resource"],
+)
+SCHEDULER_REJECTIONS = REGISTRY.counter(
+    "autodebugger_scheduler_rejections",
+    "Requests rejected by admission control, by resource and reason.",
+    ["resource", "reason"],
+)
+SESSION_ATTEMPTS = REGISTRY.histogram(
+    "autodebugger_session_attempts",
+    "Fix attempts used per debugging session.",
+    ["outcome"],
+    buckets=ATTEMPT_BUCKETS,
+)
+SESSIONS = REGISTRY.counter(
+    "autodebugger_sessions",
+    "Debugging sessions by outcome (success or failure).",
+    ["outcome"],
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Record a cache lookup so hit rates can be derived per cache.
+
+    Args:
+        cache: Name of the cache (e.g. ``"fix_store"``).
+        hit: Whether the lookup was served from the cache.
+    """
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_session(attempts: int, success: bool) -> None:
+    """
+    Record the outcome of a finished debugging session.
+
+    Args:
+        attempts: Number of fix attempts the session used.
+        success: Whether the session ended with working code.
+    """
+    outcome = "success" if success else "failure"
+    SESSIONS.inc(outcome=outcome)
+    SESSION_ATTEMPTS.observe(attempts, outcome=outcome)
+
+
+def render_prometheus(registry: MetricsRegistry = REGISTRY) -> str:
+    """Render the registry in the Prometheus text exposition format."""
+    return registry.render()
+
+
+def write_metrics_file(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """
+    Atomically write the current metrics to a file.
+
+    The file is written next to its destination and renamed into place, so a
+    textfile collector never reads a partially written snapshot.
+
+    Args:
+        path: Destination file (conventionally ending in ``.prom``).
+        registry: Registry to export (default: the global registry).
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(registry.render())
+    os.replace(tmp_path, path)
+    logger.debug(f"Metrics written to {path}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the registry on ``/metrics``."""
+
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self) -> None:  # noqa: N802 - name required by BaseHTTPRequestHandler
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        logger.debug(f"Metrics request: {format % args}")
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve ``/metrics`` from a background thread.
+
+    Calling this more than once returns the already running server, which
+    keeps Streamlit reruns from trying to bind the port again.
+
+    Args:
+        port: TCP port to listen on (0 picks a free port).
+        addr: Interface to bind (default: localhost only).
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+            thread = threading.Thread(
+                target=_server.serve_forever, name="autodebugger-metrics", daemon=True
+            )
+            thread.start()
+            logger.info(f"Serving metrics on http://{addr}:{_server.server_port}/metrics")
+        return _server
+
+
+def configure_from_env() -> None:
+    """
+    Start the metrics endpoint if ``METRICS_PORT`` is set.
+
+    ``METRICS_ADDR`` selects the bind address (default: ``127.0.0.1``).
+    """
+    port = os.getenv("METRICS_PORT")
+    if port:
+        start_metrics_server(int(port), os.getenv("METRICS_ADDR", "127.0.0.1"))
+
+
+def export_to_file_from_env() -> None:
+    """Write a metrics snapshot to ``METRICS_FILE`` if it is set."""
+    path = os.getenv("METRICS_FILE")
+    if path:
+        try:
+            write_metrics_file(path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics file {path}: {e}")
@@ -0,0 +1,303 @@
+"""
+Performance optimization with before/after benchmarking.
+
+This module asks the model to make working code faster and only accepts a
+rewrite that is verified: the original is profiled with cProfile and
+tracemalloc and its hotspots are sent with the request, then the original and
+every candidate run under the same repeated timing harness in the sandbox. A
+candidate is accepted only if it prints the same output and is measurably
+faster; the report includes the speedup and the change in peak memory.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import json
+import logging
+import statistics
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from autodebugger.sandbox import DEFAULT_TIMEOUT, run_code
+
+logger = logging.getLogger(__name__)
+
+SuggestFn = Callable[[str, str], str]
+RunFn = Callable[[str, float], Tuple[bool, str]]
+
+_MARKER = "__autodebugger_benchmark__"
+
+_HARNESS = """
+import contextlib as _contextlib
+import io as _io
+import json as _json
+import time as _time
+
+_code = compile({source!r}, "<code>", "exec")
+
+
+def _run():
+    out = _io.StringIO()
+    with _contextlib.redirect_stdout(out):
+        exec(_code, {{"__name__": "__main__", "__builtins__": __builtins__}})
+    return out.getvalue()
+
+
+_timings = []
+_outputs = []
+for _ in range({repeats}):
+    _start = _time.perf_counter()
+    _outputs.append(_run())
+    _timings.append(_time.perf_counter() - _start)
+
+import tracemalloc as _tracemalloc
+
+_tracemalloc.start()
+_run()
+_peak = _tracemalloc.get_traced_memory()[1]
+_tracemalloc.stop()
+
+_hotspots = ""
+if {profile}:
+    import cProfile as _cProfile
+    import pstats as _pstats
+
+    _profiler = _cProfile.Profile()
+    _profiler.enable()
+    _run()
+    _profiler.disable()
+    _report = _io.StringIO()
+    _pstats.Stats(_profiler, stream=_report).sort_stats("cumulative").print_stats("<code>", 12)
+    _hotspots = _report.getvalue()
+
+print({marker!r} + _json.dumps(
+    {{
+        "output": _outputs[0],
+        "deterministic": len(set(_outputs)) == 1,
+        "timings": _timings,
+        "peak_memory": _peak,
+        "hotspots": _hotspots,
+    }}
+))
+"""
+
+
+@dataclass
+class Measurement:
+    """
+    Benchmark of one version of the code.
+
+    Attributes:
+        output: Standard output of a run.
+        deterministic: Whether every run printed the same output.
+        timings: Wall-clock seconds of each run.
+        peak_memory: Peak traced memory of a run in bytes.
+        hotspots: cProfile report of the functions defined in the code
+            ("" unless profiled).
+    """
+
+    output: str
+    deterministic: bool
+    timings: List[float]
+    peak_memory: int
+    hotspots: str = ""
+
+    @property
+    def best(self) -> float:
+        """Fastest run, the least noisy estimate of the cost of the code."""
+        return min(self.timings)
+
+    @property
+    def median(self) -> float:
+        """Median run time."""
+        return statistics.median(self.timings)
+
+
+@dataclass
+class Candidate:
+    """
+    A rewrite proposed by the model and its verdict.
+
+    Attributes:
+        code: The rewritten code.
+        measurement: Its benchmark (None if it failed to run).
+        accepted: Whether it is correct and measurably faster.
+        reason: Why it was rejected, or its speedup if accepted.
+    """
+
+    code: str
+    measurement: Optional[Measurement]
+    accepted: bool
+    reason: str
+
+
+@dataclass
+class OptimizationResult:
+    """
+    Outcome of an optimization session.
+
+    Attributes:
+        code_input: The original code.
+        original: Benchmark of the original code.
+        candidates: Every candidate in the order it was proposed.
+    """
+
+    code_input: str
+    original: Measurement
+    candidates: List[Candidate] = field(default_factory=list)
+
+    @property
+    def best(self) -> Optional[Candidate]:
+        """The fastest accepted candidate, if any."""
+        accepted = [
+            (c.measurement.best, index, c)
+            for index, c in enumerate(self.candidates)
+            if c.accepted and c.measurement is not None
+        ]
+        return min(accepted)[2] if accepted else None
+
+    @property
+    def final_code(self) -> str:
+        """The best accepted candidate, or the original code."""
+        best = self.best
+        return best.code if best is not None else self.code_input
+
+    @property
+    def speedup(self) -> float:
+        """Original time divided by the time of the best candidate (1.0 if none)."""
+        best = self.best
+        if best is None or best.measurement is None:
+            return 1.0
+        return self.original.best / max(best.measurement.best, 1e-9)
+
+    @property
+    def memory_delta(self) -> int:
+        """Change in peak memory of the best candidate in bytes (0 if none)."""
+        best = self.best
+        if best is None or best.measurement is None:
+            return 0
+        return best.measurement.peak_memory - self.original.peak_memory
+
+
+def measure(
+    code: str,
+    repeats: int = 5,
+    profile: bool = False,
+    run: Optional[RunFn] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Tuple[Optional[Measurement], str]:
+    """
+    Time code in the sandbox, repeating it in fresh namespaces.
+
+    Args:
+        code: Python code to benchmark.
+        repeats: Timed runs.
+        profile: Also collect a cProfile report of the code's functions.
+        run: Callable executing ``(code, timeout)`` (default: the sandbox).
+        timeout: Seconds allowed for all runs together.
+
+    Returns:
+        Tuple[Optional[Measurement], str]: The measurement and "", or None and
+        the error output if the code failed.
+    """
+    harness = _HARNESS.format(source=code, repeats=repeats, profile=profile, marker=_MARKER)
+    success, output = (run or run_code)(harness, timeout)
+    if not success:
+        return None, output
+    for line in reversed(output.splitlines()):
+        if line.startswith(_MARKER):
+            data = json.loads(line[len(_MARKER) :])
+            return Measurement(**data), ""
+    return None, "The benchmark harness produced no result"
+
+
+def optimization_prompt(original: Measurement) -> str:
+    """
+    Describe the optimization task and the profile of the code for the model.
+
+    Args:
+        original: Benchmark of the code, with hotspots.
+
+    Returns:
+        str: Instructions passed to the model in place of an error message.
+    """
+    prompt = (
+        "The code works but is too slow. Rewrite it to run faster while printing exactly "
+        f"the same output. It takes {original.best * 1000:.1f} ms and peaks at "
+        f"{original.peak_memory / 1024:.0f} KiB of memory."
+    )
+    if original.hotspots.strip():
+        prompt += f"\nProfiler hotspots (cumulative time):\n{original.hotspots.strip()}"
+    return prompt
+
+
+def judge(original: Measurement, measurement: Measurement, min_speedup: float) -> Tuple[bool, str]:
+    """
+    Decide whether a candidate is correct and measurably faster.
+
+    Args:
+        original: Benchmark of the original code.
+        measurement: Benchmark of the candidate.
+        min_speedup: Required ratio of the original's time to the candidate's.
+
+    Returns:
+        Tuple[bool, str]: Verdict and the reason or speedup.
+    """
+    if original.deterministic and measurement.output != original.output:
+        return False, "output differs from the original"
+    speedup = original.best / max(measurement.best, 1e-9)
+    if speedup < min_speedup or measurement.median >= original.median:
+        return False, f"not measurably faster ({speedup:.2f}x)"
+    return True, f"{speedup:.2f}x faster"
+
+
+def optimize_code(
+    code_input: str,
+    suggest: SuggestFn,
+    max_candidates: int = 2,
+    repeats: int = 5,
+    min_speedup: float = 1.05,
+    run: Optional[RunFn] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Tuple[Optional[OptimizationResult], str]:
+    """
+    Ask the model for faster versions of working code and verify them.
+
+    Args:
+        code_input: Working Python code.
+        suggest: Callable returning rewritten code for ``(instructions, code)``.
+        max_candidates: Rewrites requested; each one is asked to improve on
+            the best accepted version so far.
+        repeats: Timed runs per version.
+        min_speedup: Required ratio of the original's time to a candidate's.
+        run: Callable executing ``(code, timeout)`` (default: the sandbox).
+        timeout: Seconds allowed for benchmarking one version.
+
+    Returns:
+        Tuple[Optional[OptimizationResult], str]: The result and "", or None
+        and the error output if the original code does not run.
+    """
+    original, error = measure(code_input, repeats, profile=True, run=run, timeout=timeout)
+    if original is None:
+        logger.warning(f"Cannot optimize code that fails: {error}")
+        return None, error
+    if not original.deterministic:
+        logger.warning("Output differs between runs; outputs of candidates are not compared")
+    result = OptimizationResult(code_input, original)
+
+    baseline, current = original, code_input
+    for number in range(1, max_candidates + 1):
+        candidate_code = suggest(optimization_prompt(baseline), current)
+        measurement, error = measure(
+            candidate_code, repeats, profile=True, run=run, timeout=timeout
+        )
+        if measurement is None:
+            last_line = error.strip().splitlines()[-1] if error.strip() else "no output"
+            accepted, reason = False, f"fails to run: {last_line}"
+        else:
+            accepted, reason = judge(original, measurement, min_speedup)
+        logger.info(f"Optimization candidate {number}: {reason}")
+        result.candidates.append(Candidate(candidate_code, measurement, accepted, reason))
+        if accepted and measurement is not None:
+            baseline, current = measurement, candidate_code
+    return result, ""
@@ -0,0 +1,185 @@
+"""
+User-supplied test oracles.
+
+This module validates code that ran without errors against assertions or
+pytest-style test functions supplied by the user, so a candidate that runs
+but computes the wrong answer is not mistaken for a fix. Test cases are split
+into shards that run in parallel sandbox processes; validation stops at the
+first failing shard.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import ast
+import logging
+import os
+import textwrap
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from autodebugger.metrics import ORACLE_SHARDS
+from autodebugger.sandbox import DEFAULT_TIMEOUT, run_code
+
+logger = logging.getLogger(__name__)
+
+RunFn = Callable[[str, float], Tuple[bool, str]]
+
+ORACLE_FAILURE = "Oracle failed"
+
+_RUNNER = """
+
+import sys as _oracle_sys
+import traceback as _oracle_traceback
+
+for _oracle_name, _oracle_case in {cases}:
+    try:
+        _oracle_case()
+    except BaseException:
+        _oracle_sys.stdout.flush()
+        _oracle_sys.stderr.write({failure!r} + ": " + _oracle_name + "\\n")
+        _oracle_sys.stderr.write(_oracle_traceback.format_exc())
+        _oracle_sys.exit(1)
+"""
+
+
+@dataclass
+class OracleCase:
+    """
+    A single test case.
+
+    Attributes:
+        name: Name shown when the case fails (the function name or the assertion).
+        source: Code defining the case as a function named ``function``.
+        function: Name of the function running the case.
+    """
+
+    name: str
+    source: str
+    function: str
+
+
+def parse_cases(source: str) -> Tuple[str, List[OracleCase]]:
+    """
+    Split user tests into shared setup code and individual cases.
+
+    If the source defines ``test_*`` functions, each one is a case and the
+    remaining top-level code is setup. Otherwise every top-level statement
+    is a case of its own, so a list of ``assert`` lines works as well.
+
+    Args:
+        source: Assertions or a pytest-style test module.
+
+    Returns:
+        Tuple[str, List[OracleCase]]: Setup code and the test cases.
+
+    Raises:
+        ValueError: If the tests do not parse or contain no case.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        raise ValueError(f"Tests are not valid Python: {e}") from e
+
+    functions = [
+        node
+        for node in tree.body
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("test")
+    ]
+    cases: List[OracleCase] = []
+    setup: List[str] = []
+    if functions:
+        for node in tree.body:
+            segment = ast.get_source_segment(source, node) or ""
+            if node in functions:
+                cases.append(OracleCase(node.name, segment, node.name))
+            else:
+                setup.append(segment)
+    else:
+        for index, node in enumerate(tree.body):
+            segment = ast.get_source_segment(source, node) or ""
+            function = f"_oracle_case_{index}"
+            body = textwrap.indent(segment, "    ")
+            cases.append(
+                OracleCase(segment.splitlines()[0], f"def {function}():\n{body}", function)
+            )
+
+    if not cases:
+        raise ValueError("Tests contain no test function or assertion")
+    return "\n".join(setup), cases
+
+
+class TestOracle:
+    """
+    Validate code against user-supplied tests, sharded across processes.
+
+    Args:
+        source: Assertions or a pytest-style test module.
+        workers: Maximum shards run in parallel (default: ``ORACLE_WORKERS``
+            or the CPU count, at most 4).
+        run: Callable executing ``(code, timeout)`` (default: the sandbox).
+    """
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(
+        self, source: str, workers: Optional[int] = None, run: Optional[RunFn] = None
+    ) -> None:
+        self.setup, self.cases = parse_cases(source)
+        default_workers = int(os.getenv("ORACLE_WORKERS", "0")) or min(os.cpu_count() or 1, 4)
+        self.workers = max(1, min(workers or default_workers, len(self.cases)))
+        self.run = run or run_code
+
+    def shards(self) -> List[List[OracleCase]]:
+        """Split the cases round-robin into one shard per worker."""
+        return [self.cases[index :: self.workers] for index in range(self.workers)]
+
+    def program(self, code: str, shard: List[OracleCase]) -> str:
+        """
+        Build the program validating code against one shard.
+
+        Args:
+            code: Code under test.
+            shard: Cases of the shard.
+
+        Returns:
+            str: The code followed by the setup, the cases and a runner that
+            stops at the first failing case.
+        """
+        definitions = "\n\n".join(case.source for case in shard)
+        entries = "[" + ", ".join(f"({case.name!r}, {case.function})" for case in shard) + "]"
+        runner = _RUNNER.format(cases=entries, failure=ORACLE_FAILURE)
+        return f"{code}\n\n{self.setup}\n\n{definitions}\n{runner}"
+
+    def validate(self, code: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[bool, str]:
+        """
+        Run all shards in parallel and stop at the first failure.
+
+        Args:
+            code: Code under test.
+            timeout: Timeout of each shard process.
+
+        Returns:
+            Tuple[bool, str]: True and "" if all cases pass, otherwise False and
+            the error output of the first failing shard.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="oracle")
+        pending = {
+            executor.submit(self.run, self.program(code, shard), timeout) for shard in self.shards()
+        }
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    success, output = future.result()
+                    if not success:
+                        ORACLE_SHARDS.inc(result="fail")
+                        ORACLE_SHARDS.inc(len(pending), result="cancelled")
+                        logger.info(f"Oracle shard failed, {len(pending)} shards cancelled")
+                        return False, output
+                    ORACLE_SHARDS.inc(result="pass")
+            return True, ""
+        finally:
+            # Do not wait for the shards still running once the outcome is known
+            executor.shutdown(wait=False, cancel_futures=True)
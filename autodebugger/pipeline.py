@@ -0,0 +1,409 @@
+"""
+Headless debugging pipeline.
+
+This module contains the run / suggest / retry loop behind the Streamlit
+application, without any UI dependencies. The loop reports its progress to a
+:class:`SessionObserver`, so the same code drives the web interface,
+benchmarks and load tests.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple, Union
+
+from autodebugger.analytics import AttemptLog, get_attempt_log
+from autodebugger.history import AttemptHistory, VersionStore
+from autodebugger.knowledge import FixKnowledgeBase, get_knowledge_base
+from autodebugger.metrics import EARLY_STOPS, SKIPPED_SUGGESTIONS, record_session
+from autodebugger.oracles import TestOracle
+from autodebugger.quickfix import QuickFix, QuickFixFn, quick_fix
+from autodebugger.runners import get_runner
+from autodebugger.speculation import Speculation
+from autodebugger.timeouts import ADAPTIVE_TIMEOUTS, AdaptiveTimeouts, family_key
+from autodebugger.tokens import estimate_tokens
+from autodebugger.triage import TriageFn, classify_error
+
+logger = logging.getLogger(__name__)
+
+SuggestFn = Callable[[str, str], str]
+RunFn = Callable[[str, float], Tuple[bool, str]]
+
+
+@dataclass
+class Attempt:
+    """
+    A single fix attempt.
+
+    Attributes:
+        number: 1-based attempt number.
+        version: Key of the code executed in this attempt in ``versions``.
+        versions: Store holding the code of the session.
+        error: Error that triggered the fix ("" if the code already worked).
+        success: Whether the code ran successfully ("Not Executed" if skipped).
+        output: Standard output or error message of the last run.
+        stop_reason: Why the session stopped at this attempt ("" if it did not).
+        seconds: Wall-clock duration of the attempt.
+        tokens: Estimated tokens sent to and received from the model.
+    """
+
+    number: int
+    version: str
+    versions: VersionStore = field(repr=False, compare=False)
+    error: str
+    success: Union[bool, str]
+    output: str = ""
+    stop_reason: str = ""
+    seconds: float = 0.0
+    tokens: int = 0
+
+    @property
+    def code(self) -> str:
+        """Code that was executed in this attempt, rebuilt from the version store."""
+        return self.versions.get(self.version)
+
+
+@dataclass
+class SessionResult:
+    """
+    Outcome of a debugging session.
+
+    Attributes:
+        code_input: Original code provided by the user.
+        success: Whether the session ended with working code.
+        final_code: The last code that was executed.
+        output: Output or error message of the last run.
+        attempts: History of all attempts in order.
+        stop_reason: Why the session stopped early ("" if it did not).
+        versions: Store holding the code of every attempt as diffs.
+    """
+
+    code_input: str
+    success: bool = False
+    final_code: str = ""
+    output: str = ""
+    attempts: List[Attempt] = field(default_factory=list)
+    stop_reason: str = ""
+    versions: VersionStore = field(default_factory=VersionStore, repr=False)
+
+    def add_attempt(
+        self,
+        number: int,
+        code: str,
+        error: str,
+        success: Union[bool, str],
+        output: str = "",
+        stop_reason: str = "",
+        seconds: float = 0.0,
+        tokens: int = 0,
+    ) -> Attempt:
+        """
+        Record an attempt, storing its code as a diff against the previous version.
+
+        Returns:
+            Attempt: The recorded attempt.
+        """
+        attempt = Attempt(
+            number,
+            self.versions.put(code),
+            self.versions,
+            error,
+            success,
+            output,
+            stop_reason,
+            seconds,
+            tokens,
+        )
+        self.attempts.append(attempt)
+        return attempt
+
+    def log_rows(self) -> List[List]:
+        """
+        Convert the attempt history to the rows shown in the execution log.
+
+        The code of each attempt is rebuilt from the version store.
+
+        Returns:
+            List[List]: One ``[attempt, initial_code, suggested_code, error, success]``
+            row per attempt.
+        """
+        return [
+            [attempt.number, self.code_input, attempt.code, attempt.error, attempt.success]
+            for attempt in self.attempts
+        ]
+
+
+class SessionObserver:
+    """
+    Receives progress notifications from :func:`run_debug_session`.
+
+    All methods are no-ops; subclasses override the ones they need.
+    """
+
+    def attempt_started(self, attempt: int) -> None:
+        """Called before the current code is executed."""
+
+    def code_succeeded(self, attempt: int, code: str, output: str) -> None:
+        """Called when the code runs successfully without a new fix."""
+
+    def error_encountered(self, attempt: int, error: str) -> None:
+        """Called when the current code fails, before a fix is requested."""
+
+    def fix_received(self, attempt: int, code: str) -> None:
+        """Called when the model has returned a candidate fix."""
+
+    def candidate_finished(self, attempt: int, code: str, success: bool, output: str) -> None:
+        """Called after a candidate fix has been executed."""
+
+    def session_failed(self, max_attempts: int) -> None:
+        """Called when no working code was found within ``max_attempts``."""
+
+    def session_stopped(self, attempt: int, reason: str) -> None:
+        """Called when the session ends early, before ``max_attempts`` is used up."""
+
+
+def run_debug_session(
+    code_input: str,
+    max_attempts: int,
+    suggest: SuggestFn,
+    run: Optional[RunFn] = None,
+    observer: Optional[SessionObserver] = None,
+    timeouts: Optional[AdaptiveTimeouts] = None,
+    max_reprompts: int = 1,
+    triage: Optional[TriageFn] = None,
+    quick_fixer: Optional[QuickFixFn] = None,
+    knowledge: Optional[FixKnowledgeBase] = None,
+    oracle: Optional[TestOracle] = None,
+    speculative_requests: Optional[int] = None,
+    attempt_log: Optional[AttemptLog] = None,
+    model: str = "",
+) -> SessionResult:
+    """
+    Run code and iteratively ask the model for fixes until it works.
+
+    Suggestions that leave the code unchanged or return to a version that
+    already failed are not executed. The model is asked again with the failed
+    versions listed, and the session stops early if it keeps repeating itself.
+    A fix stored for the same code and error is reused directly, and mechanical
+    errors are handed to rule-based quick fixes; the model is only asked when
+    neither applies, with similar past fixes as examples. Errors that no code edit can fix (missing files or modules, network and
+    permission failures) end the session without asking the model.
+
+    While a model candidate runs, an alternative fix for the same error can be
+    requested speculatively; if the candidate fails without getting past the
+    error, the alternative is tried next without waiting for the model.
+
+    Args:
+        code_input: Original Python code provided by the user.
+        max_attempts: Maximum number of debugging attempts.
+        suggest: Callable returning fixed code for ``(error, code)``.
+        run: Callable executing ``(code, timeout)`` and returning ``(success, output)``
+            (default: the Python runner, local or on the ``SANDBOX_WORKERS``).
+        observer: Optional observer notified about progress.
+        timeouts: Adaptive timeout policy (default: the shared policy).
+        max_reprompts: Extra requests per attempt after a no-op or repeated suggestion.
+        triage: Callable deciding whether an error is unfixable by a code edit
+            (default: :func:`autodebugger.triage.classify_error`).
+        quick_fixer: Callable trying deterministic fixes before ``suggest``
+            (default: :func:`autodebugger.quickfix.quick_fix`).
+        knowledge: Store of past fixes (default: the one configured by
+            ``FIX_KNOWLEDGE_DB``, if any).
+        oracle: User tests code must pass, in addition to exiting cleanly,
+            to count as working.
+        speculative_requests: Extra model requests allowed for speculative
+            alternatives (default: ``SPECULATIVE_REQUESTS`` or 0).
+        attempt_log: Store the finished session is written to for offline
+            analytics (default: the one configured by ``ATTEMPT_LOG_DB``, if any).
+        model: Name of the model behind ``suggest``, recorded in the attempt log.
+
+    Returns:
+        SessionResult: Attempt history and final outcome.
+
+    Example:
+        >>> result = run_debug_session("print(x)", 3, suggest=lambda e, c: "print(1)")
+        >>> result.success
+        True
+    """
+    run = run or get_runner("python")
+    observer = observer or SessionObserver()
+    triage = triage or classify_error
+    quick_fixer = quick_fixer or quick_fix
+    knowledge = knowledge if knowledge is not None else get_knowledge_base()
+    timeouts = timeouts or ADAPTIVE_TIMEOUTS
+    attempt_log = attempt_log if attempt_log is not None else get_attempt_log()
+    family = family_key(code_input)
+    session_start = time.perf_counter()
+    attempt_start = session_start
+
+    # Estimated tokens of the model requests made since the attempt started
+    spent = [0]
+    spent_lock = threading.Lock()
+
+    def ask(prompt: str, code: str) -> str:
+        candidate = suggest(prompt, code)
+        tokens = estimate_tokens(prompt) + estimate_tokens(code) + estimate_tokens(candidate)
+        with spent_lock:
+            spent[0] += tokens
+        return candidate
+
+    def spent_tokens() -> int:
+        with spent_lock:
+            tokens, spent[0] = spent[0], 0
+        return tokens
+
+    def execute(code: str) -> Tuple[bool, str]:
+        timeout = timeouts.timeout_for(family)
+        start = time.perf_counter()
+        success, output = run(code, timeout)
+        timeouts.record(family, time.perf_counter() - start, timeout, output)
+        if success and oracle is not None:
+            passed, failure = oracle.validate(code, timeout)
+            if not passed:
+                return False, failure
+        return success, output
+
+    result = SessionResult(code_input=code_input, final_code=code_input)
+    history = AttemptHistory(versions=result.versions)
+    speculation = Speculation(ask, speculative_requests)
+
+    def stop(attempt: int, code: str, error: str, reason: str, category: str) -> None:
+        result.stop_reason = reason
+        result.add_attempt(
+            attempt,
+            code,
+            error,
+            f"Stopped: {reason}",
+            error,
+            reason,
+            time.perf_counter() - attempt_start,
+            spent_tokens(),
+        )
+        EARLY_STOPS.inc(reason=category)
+        logger.warning(f"Stopping after attempt {attempt}: {reason}")
+        observer.session_stopped(attempt, reason)
+
+    logger.info(f"Starting code debugging with max {max_attempts} attempts")
+    code = code_input
+    attempt = 1
+    success = False
+    output = ""
+    # Outcome of the candidate executed by the previous attempt
+    known: Optional[Tuple[bool, str]] = None
+    previous: Optional[str] = None
+    prompt = ""
+
+    while not success and attempt <= max_attempts:
+        attempt_start = time.perf_counter()
+        observer.attempt_started(attempt)
+        success, output = known if known is not None else execute(code)
+
+        if success:
+            observer.code_succeeded(attempt, code, output)
+            result.add_attempt(
+                attempt,
+                code,
+                "",
+                success,
+                output,
+                seconds=time.perf_counter() - attempt_start,
+                tokens=spent_tokens(),
+            )
+            logger.info(f"Code succeeded on attempt {attempt}")
+            break
+
+        error = output
+        history.record(code, error)
+        observer.error_encountered(attempt, error)
+
+        verdict = triage(error)
+        if verdict is not None:
+            stop(attempt, code, error, verdict.reason, verdict.category)
+            break
+
+        alternative = speculation.take(previous, error) if previous is not None else None
+        if alternative is not None and previous is not None:
+            reason = history.rejection(previous, alternative)
+            if reason:
+                SKIPPED_SUGGESTIONS.inc(reason=reason)
+                alternative = None
+
+        from_model = True
+        if alternative is not None and previous is not None:
+            # The candidate did not get past the error: try the alternative fix of its parent
+            logger.info(f"Attempt {attempt} failed, trying the speculative alternative fix")
+            code, error = previous, result.attempts[-1].error
+            candidate, reason = alternative, ""
+        else:
+            matches = knowledge.lookup(error, code) if knowledge is not None else []
+            if matches and matches[0].exact:
+                fix: Optional[QuickFix] = QuickFix("knowledge_base", matches[0].fixed)
+            else:
+                fix = quick_fixer(error, code)
+            if fix is not None and not history.rejection(code, fix.code):
+                logger.info(f"Attempt {attempt} failed, applying quick fix {fix.rule}")
+                candidate, reason, from_model = fix.code, "", False
+            else:
+                logger.info(f"Attempt {attempt} failed, requesting AI fix")
+                prompt = error
+                if matches and knowledge is not None:
+                    prompt = knowledge.with_examples(error, matches)
+                candidate = ask(prompt, code)
+                reason = history.rejection(code, candidate)
+        for _ in range(max_reprompts):
+            if not reason:
+                break
+            SKIPPED_SUGGESTIONS.inc(reason=reason)
+            logger.info(f"Attempt {attempt}: {reason}, re-prompting with the failed history")
+            prompt = history.reprompt(error)
+            candidate = ask(prompt, code)
+            reason = history.rejection(code, candidate)
+
+        if reason:
+            SKIPPED_SUGGESTIONS.inc(reason=reason)
+            stop(attempt, candidate, error, reason, reason)
+            break
+
+        previous, code = code, candidate
+        observer.fix_received(attempt, code)
+
+        if from_model:
+            speculation.start(prompt, previous)
+        success, output = execute(code)
+        observer.candidate_finished(attempt, code, success, output)
+        if success:
+            speculation.cancel()
+
+        if success and knowledge is not None:
+            knowledge.add(error, previous, code)
+            if previous != code_input:
+                knowledge.add(result.attempts[0].error, code_input, code)
+
+        result.add_attempt(
+            attempt,
+            code,
+            error,
+            success,
+            output,
+            seconds=time.perf_counter() - attempt_start,
+            tokens=spent_tokens(),
+        )
+        known = (success, output)
+        attempt += 1
+
+    speculation.close()
+    result.success = success
+    result.final_code = code
+    result.output = output
+
+    if not success and not result.stop_reason:
+        observer.session_failed(max_attempts)
+        logger.warning(f"Code debugging failed after {max_attempts} attempts")
+
+    record_session(len(result.attempts), success)
+    if attempt_log is not None:
+        attempt_log.record(result, time.perf_counter() - session_start, model)
+    return result
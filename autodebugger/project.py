@@ -0,0 +1,491 @@
+"""
+Project mode: debug a package against its pytest suite.
+
+This module runs a project's test suite once, then repeatedly sends the files
+implicated by the failing tests to the model and re-runs only the tests that
+failed plus the tests importing the modules that changed. Fixes are applied to
+a copy of the project; the original directory is only written when requested.
+
+Usage:
+    python -m autodebugger.project path/to/project --max-attempts 3 --apply
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import argparse
+import ast
+import difflib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from autodebugger.history import AttemptHistory
+from autodebugger.metrics import record_session
+from autodebugger.pipeline import SuggestFn
+from autodebugger.utils import get_chatbot_suggestion
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEST_TIMEOUT = 300.0
+
+FILE_MARKER = "# === file: {path} ==="
+_MARKER_PATTERN = re.compile(r"^# === file: (.+?) ===[ \t]*$", re.MULTILINE)
+_SUMMARY_PATTERN = re.compile(r"^(?:FAILED|ERROR) (.+?)(?: - .*)?$", re.MULTILINE)
+_PYTEST_FRAME = re.compile(r"^(\S+\.py):\d+: ", re.MULTILINE)
+_PYTHON_FRAME = re.compile(r'File "([^"]+\.py)", line \d+')
+_IGNORED_DIRS = shutil.ignore_patterns(
+    ".git", "__pycache__", ".pytest_cache", ".venv", "venv", ".tox", "*.egg-info"
+)
+
+
+@dataclass
+class TestRun:
+    """
+    Outcome of a pytest run.
+
+    Attributes:
+        targets: Node IDs or paths that were run (empty for the whole suite).
+        failed: Node IDs of failing tests and paths of modules that failed to collect.
+        output: Combined pytest output.
+        returncode: Pytest exit code.
+    """
+
+    targets: List[str]
+    failed: List[str]
+    output: str
+    returncode: int
+
+    @property
+    def passed(self) -> bool:
+        """Whether every selected test passed (or there were none)."""
+        return self.returncode in (0, 5) and not self.failed
+
+
+@dataclass
+class ProjectAttempt:
+    """
+    A fix attempt in project mode.
+
+    Attributes:
+        number: 1-based attempt number.
+        failing: Tests failing before the fix.
+        files: Files sent to the model.
+        changed: Files the fix changed.
+        run: The test run after the fix.
+    """
+
+    number: int
+    failing: List[str]
+    files: List[str]
+    changed: List[str]
+    run: Optional[TestRun] = None
+
+
+@dataclass
+class ProjectResult:
+    """
+    Outcome of a project debugging session.
+
+    Attributes:
+        directory: The project directory.
+        success: Whether all selected tests pass at the end.
+        initial_failures: Tests failing before any fix.
+        attempts: History of the fix attempts.
+        originals: Original content of every changed file.
+        changes: Final content of every changed file.
+        stop_reason: Why the session stopped early ("" if it did not).
+    """
+
+    directory: str
+    success: bool = False
+    initial_failures: List[str] = field(default_factory=list)
+    attempts: List[ProjectAttempt] = field(default_factory=list)
+    originals: Dict[str, str] = field(default_factory=dict)
+    changes: Dict[str, str] = field(default_factory=dict)
+    stop_reason: str = ""
+
+    def diff(self) -> str:
+        """Return a unified diff of all changes."""
+        return "".join(
+            "".join(
+                difflib.unified_diff(
+                    self.originals[path].splitlines(keepends=True),
+                    content.splitlines(keepends=True),
+                    fromfile=f"a/{path}",
+                    tofile=f"b/{path}",
+                )
+            )
+            for path, content in sorted(self.changes.items())
+        )
+
+    def apply(self) -> None:
+        """Write the changed files into the project directory."""
+        for path, content in self.changes.items():
+            with open(os.path.join(self.directory, path), "w", encoding="utf-8") as handle:
+                handle.write(content)
+        logger.info(f"Applied changes to {len(self.changes)} files in {self.directory}")
+
+
+def is_test_file(path: str) -> bool:
+    """Return True if pytest would collect tests from the file by default."""
+    name = os.path.basename(path)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def module_name(path: str) -> str:
+    """
+    Convert a project-relative file path to its dotted module name.
+
+    Args:
+        path: Path such as ``src/pkg/calc.py``.
+
+    Returns:
+        str: Module name such as ``pkg.calc``.
+    """
+    parts = path[: -len(".py")].replace(os.sep, "/").split("/")
+    if parts[0] == "src" and len(parts) > 1:
+        parts = parts[1:]
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def imported_modules(source: str) -> Set[str]:
+    """
+    Collect the absolute module names imported by a piece of code.
+
+    Args:
+        source: Python source code.
+
+    Returns:
+        Set[str]: Imported modules; ``from module import name`` yields ``module.name``.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return set()
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return names
+
+
+def _depends_on(imports: Iterable[str], module: str) -> bool:
+    return any(
+        name == module or name.startswith(f"{module}.") or module.startswith(f"{name}.")
+        for name in imports
+    )
+
+
+def _python_files(directory: str) -> List[str]:
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d not in ("__pycache__", "venv")]
+        files.extend(
+            os.path.relpath(os.path.join(root, name), directory)
+            for name in names
+            if name.endswith(".py")
+        )
+    return sorted(files)
+
+
+def tests_importing(directory: str, changed: Sequence[str]) -> List[str]:
+    """
+    Find the test files that import any of the changed modules.
+
+    Args:
+        directory: Project directory.
+        changed: Project-relative paths of changed files.
+
+    Returns:
+        List[str]: Project-relative paths of dependent test files.
+    """
+    modules = [module_name(path) for path in changed if path.endswith(".py")]
+    dependents = []
+    for path in _python_files(directory):
+        if not is_test_file(path):
+            continue
+        with open(os.path.join(directory, path), encoding="utf-8") as handle:
+            imports = imported_modules(handle.read())
+        if any(_depends_on(imports, module) for module in modules):
+            dependents.append(path)
+    return dependents
+
+
+def project_imports(directory: str, paths: Sequence[str]) -> List[str]:
+    """
+    Find the project files imported by some files of the project.
+
+    Args:
+        directory: Project directory.
+        paths: Project-relative paths of the importing files.
+
+    Returns:
+        List[str]: Project-relative paths of the imported project modules.
+    """
+    modules = {module_name(path): path for path in _python_files(directory)}
+    imported: List[str] = []
+    for path in paths:
+        full_path = os.path.join(directory, path)
+        if not os.path.isfile(full_path):
+            continue
+        with open(full_path, encoding="utf-8") as handle:
+            names = imported_modules(handle.read())
+        for name in sorted(names):
+            # "pkg.mod.func" is provided by the first existing prefix
+            parts = name.split(".")
+            for end in range(len(parts), 0, -1):
+                target = modules.get(".".join(parts[:end]))
+                if target is not None:
+                    if target not in imported:
+                        imported.append(target)
+                    break
+    return imported
+
+
+def run_pytest(
+    directory: str, targets: Sequence[str] = (), timeout: float = DEFAULT_TEST_TIMEOUT
+) -> TestRun:
+    """
+    Run pytest in a project and collect the failing tests.
+
+    The project's own ``addopts`` are ignored so that plugins such as coverage
+    do not slow down or break the selective runs.
+
+    Args:
+        directory: Project directory (used as the working directory).
+        targets: Node IDs or paths to run (default: the whole suite).
+        timeout: Seconds before the run is killed.
+
+    Returns:
+        TestRun: Failing node IDs and the pytest output.
+    """
+    command = [sys.executable, "-m", "pytest", "-q", "-rfE", "--tb=short", "--no-header"]
+    command += ["-p", "no:cacheprovider", "-o", "addopts=", *targets]
+    env = dict(os.environ)
+    src = os.path.join(directory, "src")
+    if os.path.isdir(src):
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    try:
+        completed = subprocess.run(
+            command, cwd=directory, env=env, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return TestRun(
+            list(targets),
+            list(targets) or ["<suite>"],
+            f"Tests timed out ({timeout:g} seconds)",
+            -1,
+        )
+
+    output = completed.stdout + completed.stderr
+    failed = list(dict.fromkeys(match.strip() for match in _SUMMARY_PATTERN.findall(output)))
+    if completed.returncode not in (0, 5) and not failed:
+        failed = list(targets) or ["<suite>"]
+    logger.info(f"pytest {' '.join(targets) or '(all)'}: {len(failed)} failing")
+    return TestRun(list(targets), failed, output, completed.returncode)
+
+
+def implicated_files(directory: str, run: TestRun, max_files: int = 5) -> List[str]:
+    """
+    Pick the project files to send to the model for a failing run.
+
+    Source files appearing in the tracebacks come first, then the project
+    modules imported by the failing tests, then the test files themselves.
+
+    Args:
+        directory: Project directory.
+        run: The failing test run.
+        max_files: Maximum number of files returned.
+
+    Returns:
+        List[str]: Project-relative file paths.
+    """
+    root = os.path.realpath(directory)
+    test_files = [node_id.split("::", 1)[0] for node_id in run.failed]
+    candidates = _PYTEST_FRAME.findall(run.output) + _PYTHON_FRAME.findall(run.output)
+    candidates += project_imports(root, test_files) + test_files
+
+    files: List[str] = []
+    for candidate in candidates:
+        path = os.path.realpath(os.path.join(root, candidate))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            continue
+        relative = os.path.relpath(path, root)
+        if relative not in files:
+            files.append(relative)
+    files.sort(key=is_test_file)
+    return files[:max_files]
+
+
+def bundle_files(directory: str, paths: Sequence[str]) -> str:
+    """
+    Join files into a single code string, each preceded by a marker comment.
+
+    Args:
+        directory: Project directory.
+        paths: Project-relative file paths.
+
+    Returns:
+        str: The bundled code.
+    """
+    parts = []
+    for path in paths:
+        with open(os.path.join(directory, path), encoding="utf-8") as handle:
+            parts.append(f"{FILE_MARKER.format(path=path)}\n{handle.read().rstrip()}\n")
+    return "\n".join(parts)
+
+
+def unbundle_files(text: str) -> Dict[str, str]:
+    """
+    Split a bundle returned by the model back into files.
+
+    Args:
+        text: Code in the format produced by :func:`bundle_files`.
+
+    Returns:
+        Dict[str, str]: File content by project-relative path.
+    """
+    matches = list(_MARKER_PATTERN.finditer(text))
+    files = {}
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        lines = text[match.end() : end].strip("\n").splitlines()
+        # Models sometimes fence each file separately
+        while lines and lines[0].startswith("```"):
+            lines.pop(0)
+        while lines and lines[-1].startswith("```"):
+            lines.pop()
+        files[match.group(1).strip()] = "\n".join(lines) + "\n"
+    return files
+
+
+def run_project_session(
+    directory: str,
+    max_attempts: int,
+    suggest: SuggestFn,
+    targets: Sequence[str] = (),
+    timeout: float = DEFAULT_TEST_TIMEOUT,
+) -> ProjectResult:
+    """
+    Fix a project until its failing tests pass.
+
+    Args:
+        directory: Project directory; it is copied and left untouched.
+        max_attempts: Maximum number of fix attempts.
+        suggest: Callable returning fixed code for ``(error, code)``.
+        targets: Tests to consider (default: the whole suite).
+        timeout: Seconds allowed for each pytest run.
+
+    Returns:
+        ProjectResult: Attempt history, failing tests and the changed files.
+    """
+    directory = os.path.abspath(directory)
+    result = ProjectResult(directory=directory)
+    history = AttemptHistory()
+
+    with tempfile.TemporaryDirectory(prefix="autodebugger-project-") as tmp:
+        workspace = os.path.join(tmp, os.path.basename(directory))
+        shutil.copytree(directory, workspace, ignore=_IGNORED_DIRS)
+
+        run = run_pytest(workspace, targets, timeout)
+        result.initial_failures = list(run.failed)
+        logger.info(f"{len(run.failed)} failing tests in {directory}")
+
+        for number in range(1, max_attempts + 1):
+            if run.passed:
+                break
+            files = implicated_files(workspace, run)
+            if not files:
+                result.stop_reason = "no project files implicated by the failures"
+                break
+
+            code = bundle_files(workspace, files)
+            history.record(code, run.output)
+            candidate = suggest(run.output, code)
+            if history.rejection(code, candidate):
+                candidate = suggest(history.reprompt(run.output), code)
+            reason = history.rejection(code, candidate)
+            if reason:
+                result.stop_reason = reason
+                break
+
+            changed = []
+            for path, content in unbundle_files(candidate).items():
+                if path not in files:
+                    logger.warning(f"Ignoring file {path} that was not sent to the model")
+                    continue
+                full_path = os.path.join(workspace, path)
+                with open(full_path, encoding="utf-8") as handle:
+                    current = handle.read()
+                if content == current:
+                    continue
+                result.originals.setdefault(path, current)
+                with open(full_path, "w", encoding="utf-8") as handle:
+                    handle.write(content)
+                result.changes[path] = content
+                changed.append(path)
+
+            attempt = ProjectAttempt(number, list(run.failed), files, changed)
+            result.attempts.append(attempt)
+            if not changed:
+                result.stop_reason = "the suggestion did not change any file"
+                break
+
+            # Only the failing tests and the tests that may be affected by the change
+            selected = [node for node in run.failed if node != "<suite>"]
+            selected += [
+                path for path in tests_importing(workspace, changed) if path not in selected
+            ]
+            run = run_pytest(workspace, selected or targets, timeout)
+            attempt.run = run
+
+    result.success = run.passed
+    record_session(len(result.attempts), result.success)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        argv: Command-line arguments (default: ``sys.argv[1:]``).
+
+    Returns:
+        int: Process exit code (0 if the tests pass at the end).
+    """
+    parser = argparse.ArgumentParser(description="Fix a project until its pytest suite passes.")
+    parser.add_argument("directory", help="Project directory")
+    parser.add_argument("tests", nargs="*", help="Tests to consider (default: all)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Maximum fix attempts")
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TEST_TIMEOUT, help="Seconds per pytest run"
+    )
+    parser.add_argument("--apply", action="store_true", help="Write the fixes into the directory")
+    args = parser.parse_args(argv)
+
+    result = run_project_session(
+        args.directory, args.max_attempts, get_chatbot_suggestion, args.tests, args.timeout
+    )
+    print(result.diff() or "No changes.")
+    print(f"Initially failing: {len(result.initial_failures)}; success: {result.success}")
+    if result.stop_reason:
+        print(f"Stopped: {result.stop_reason}")
+    if args.apply and result.changes:
+        result.apply()
+    return 0 if result.success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Rule-based quick fixes.
+
+This module repairs mechanical errors (a missing standard-library import, an
+unclosed bracket, mixed tabs and spaces, a Python 2 ``print`` statement or a
+name misspelled by one character) with deterministic token and AST rewrites,
+so the model is only asked when no rule applies.
+
+Rules are plain functions taking ``(error, code)`` and returning the fixed
+code or None. Register additional rules with the :func:`rule` decorator.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import ast
+import builtins
+import io
+import logging
+import re
+import sys
+import tokenize
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from autodebugger.metrics import QUICKFIX_RULES
+
+logger = logging.getLogger(__name__)
+
+RuleFn = Callable[[str, str], Optional[str]]
+
+RULES: Dict[str, RuleFn] = {}
+
+_UNDEFINED_NAME = re.compile(r"NameError: name '(\w+)' is not defined")
+_ERROR_LINE = re.compile(r'File "<string>", line (\d+)')
+_PY2_PRINT = re.compile(r"^(\s*)print(?:\s+(?![\s(=.,\[])(.*?))?\s*$")
+
+_MIN_MISSPELLED_LENGTH = 3
+
+_BRACKETS = {"(": ")", "[": "]", "{": "}"}
+
+
+@dataclass
+class QuickFix:
+    """
+    A fix produced by a rule.
+
+    Attributes:
+        rule: Name of the rule that produced the fix.
+        code: The fixed code.
+    """
+
+    rule: str
+    code: str
+
+
+QuickFixFn = Callable[[str, str], Optional[QuickFix]]
+
+
+def rule(name: str) -> Callable[[RuleFn], RuleFn]:
+    """
+    Register a quick-fix rule.
+
+    Rules run in registration order; the first one whose output compiles wins.
+
+    Args:
+        name: Rule name used in logs and metrics.
+
+    Returns:
+        Callable: Decorator registering the function.
+
+    Example:
+        >>> @rule("strip_bom")
+        ... def strip_bom(error, code):
+        ...     return code.lstrip("\\ufeff") if code.startswith("\\ufeff") else None
+    """
+
+    def decorator(func: RuleFn) -> RuleFn:
+        RULES[name] = func
+        return func
+
+    return decorator
+
+
+def _compiles(code: str) -> bool:
+    try:
+        compile(code, "<quickfix>", "exec")
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def _error_line(error: str) -> Optional[int]:
+    matches = _ERROR_LINE.findall(error)
+    return int(matches[-1]) if matches else None
+
+
+def _defined_names(tree: ast.AST) -> Set[str]:
+    names = set(dir(builtins))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+    return names
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """Return True if ``b`` is one insertion, deletion, substitution or swap from ``a``."""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (
+            len(diffs) == 2
+            and diffs[1] == diffs[0] + 1
+            and a[diffs[0]] == b[diffs[1]]
+            and a[diffs[1]] == b[diffs[0]]
+        )
+    shorter, longer = sorted((a, b), key=len)
+    for i in range(len(longer)):
+        if longer[:i] + longer[i + 1 :] == shorter:
+            return True
+    return False
+
+
+def _replace_name(code: str, old: str, new: str) -> str:
+    """Replace every NAME token ``old`` by ``new``, leaving strings and comments alone."""
+    lines = code.splitlines(keepends=True)
+    tokens = [
+        token
+        for token in tokenize.generate_tokens(io.StringIO(code).readline)
+        if token.type == tokenize.NAME and token.string == old
+    ]
+    for token in reversed(tokens):
+        row, col = token.start
+        line = lines[row - 1]
+        lines[row - 1] = line[:col] + new + line[col + len(old) :]
+    return "".join(lines)
+
+
+def _insert_import(code: str, module: str) -> str:
+    """Insert ``import module`` after the docstring and ``__future__`` imports."""
+    tree = ast.parse(code)
+    position = 0
+    for index, node in enumerate(tree.body):
+        is_docstring = (
+            index == 0 and isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)
+        )
+        is_future = isinstance(node, ast.ImportFrom) and node.module == "__future__"
+        if not (is_docstring or is_future):
+            break
+        position = node.end_lineno or node.lineno
+    lines = code.splitlines(keepends=True)
+    lines.insert(position, f"import {module}\n")
+    return "".join(lines)
+
+
+@rule("missing_stdlib_import")
+def fix_missing_import(error: str, code: str) -> Optional[str]:
+    """Import an undefined name that is a standard-library module."""
+    match = _UNDEFINED_NAME.search(error)
+    if not match or match.group(1) not in getattr(sys, "stdlib_module_names", ()):
+        return None
+    return _insert_import(code, match.group(1))
+
+
+@rule("misspelled_name")
+def fix_misspelled_name(error: str, code: str) -> Optional[str]:
+    """Rename an undefined name to the only defined name one edit away."""
+    match = _UNDEFINED_NAME.search(error)
+    # One edit turns any short name into many others
+    if not match or len(match.group(1)) < _MIN_MISSPELLED_LENGTH:
+        return None
+    undefined = match.group(1)
+    candidates = [
+        name for name in _defined_names(ast.parse(code)) if _one_edit_apart(undefined, name)
+    ]
+    if len(candidates) != 1:
+        return None
+    return _replace_name(code, undefined, candidates[0])
+
+
+@rule("mixed_tabs")
+def fix_mixed_tabs(error: str, code: str) -> Optional[str]:
+    """Expand tabs in indentation the way the interpreter counts them."""
+    if "TabError" not in error and "inconsistent use of tabs" not in error:
+        return None
+    fixed = []
+    for line in code.splitlines(keepends=True):
+        body = line.lstrip(" \t")
+        fixed.append(line[: len(line) - len(body)].expandtabs(8) + body)
+    return "".join(fixed)
+
+
+@rule("python2_print")
+def fix_python2_print(error: str, code: str) -> Optional[str]:
+    """Turn Python 2 ``print x`` statements into ``print(x)`` calls."""
+    if "Missing parentheses in call to 'print'" not in error:
+        return None
+    fixed = []
+    for line in code.splitlines(keepends=True):
+        newline = line[len(line.rstrip("\r\n")) :]
+        match = _PY2_PRINT.match(line.rstrip("\r\n"))
+        if match and match.group(2) is not None:
+            line = f"{match.group(1)}print({match.group(2).rstrip(',')}){newline}"
+        fixed.append(line)
+    return "".join(fixed)
+
+
+def _unclosed(line: str) -> List[str]:
+    """Return the brackets opened but not closed in a piece of code."""
+    stack: List[str] = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(line).readline):
+            if token.type != tokenize.OP:
+                continue
+            if token.string in _BRACKETS:
+                stack.append(token.string)
+            elif stack and token.string == _BRACKETS[stack[-1]]:
+                stack.pop()
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return stack
+
+
+@rule("unclosed_bracket")
+def fix_unclosed_bracket(error: str, code: str) -> Optional[str]:
+    """Close brackets left open at the end of the offending line or of the code."""
+    if "SyntaxError" not in error or ("never closed" not in error and "EOF" not in error):
+        return None
+    lines = code.splitlines(keepends=True)
+    reported = _error_line(error)
+    order = list(range(len(lines)))
+    if reported is not None and 0 < reported <= len(lines):
+        order.insert(0, reported - 1)
+    for index in order:
+        stack = _unclosed(lines[index])
+        if not stack:
+            continue
+        line = lines[index]
+        content = line.rstrip("\r\n")
+        closers = "".join(_BRACKETS[bracket] for bracket in reversed(stack))
+        candidate = lines[:index] + [content + closers + line[len(content) :]] + lines[index + 1 :]
+        fixed = "".join(candidate)
+        if _compiles(fixed):
+            return fixed
+    stack = _unclosed(code)
+    if stack:
+        content = code.rstrip()
+        fixed = content + "".join(_BRACKETS[bracket] for bracket in reversed(stack)) + "\n"
+        if _compiles(fixed):
+            return fixed
+    return None
+
+
+def quick_fix(error: str, code: str, rules: Optional[Sequence[str]] = None) -> Optional[QuickFix]:
+    """
+    Try the registered rules on a failing piece of code.
+
+    Args:
+        error: Error output of the failed run.
+        code: The failing code.
+        rules: Names of the rules to try (default: all registered rules).
+
+    Returns:
+        Optional[QuickFix]: The first fix that compiles and changes the code,
+        or None if no rule applies.
+
+    Example:
+        >>> quick_fix("NameError: name 'math' is not defined", "print(math.pi)").code
+        'import math\\nprint(math.pi)'
+    """
+    for name in rules if rules is not None else list(RULES):
+        try:
+            fixed = RULES[name](error, code)
+        except (SyntaxError, ValueError, tokenize.TokenError) as e:
+            logger.debug(f"Quick-fix rule {name} failed: {e}")
+            fixed = None
+        if fixed is not None and fixed != code and _compiles(fixed):
+            QUICKFIX_RULES.inc(rule=name, result="hit")
+            logger.info(f"Quick-fix rule {name} applied")
+            return QuickFix(name, fixed)
+        QUICKFIX_RULES.inc(rule=name, result="miss")
+    return None
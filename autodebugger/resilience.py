@@ -0,0 +1,398 @@
+"""
+Resilience layer for model calls.
+
+This module wraps calls to the model provider with a client-side token-bucket
+rate limiter, jittered exponential backoff on throttling and server errors,
+per-call deadlines and a circuit breaker, so that throughput degrades smoothly
+when the provider throttles or fails instead of falling apart. A call stops
+waiting for the provider as soon as the current session is cancelled.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from autodebugger.cancellation import CancelledError, current_token
+from autodebugger.metrics import LLM_CIRCUIT_REJECTIONS, LLM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+_STATUS_PATTERN = re.compile(r"[Ss]tatus(?: code)?:?\s*(\d{3})")
+
+
+class ServiceError(Exception):
+    """
+    An HTTP error returned by the model provider.
+
+    Args:
+        message: Error description.
+        status_code: HTTP status code.
+        retry_after: Seconds the provider asked us to wait, if any.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a call cannot complete before its deadline."""
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker rejects a call without attempting it."""
+
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """
+    Extract the HTTP status code from a provider error, if there is one.
+
+    Args:
+        error: Exception raised by the provider client.
+
+    Returns:
+        Optional[int]: The status code, or None if it cannot be determined.
+    """
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status
+    match = _STATUS_PATTERN.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decide whether a failed call is worth retrying.
+
+    Throttling (429), server errors (5xx), timeouts and connection errors are
+    retryable; client errors such as invalid credentials are not.
+
+    Args:
+        error: Exception raised by the call.
+
+    Returns:
+        bool: True if the call may succeed when repeated.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError, DeadlineExceededError)):
+        return True
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    name = type(error).__name__
+    return name in ("Timeout", "ReadTimeout", "ConnectTimeout", "ConnectionError")
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Args:
+        rate: Tokens added per second (0 disables limiting).
+        capacity: Maximum number of tokens, i.e. the allowed burst.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token if available, otherwise return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a token is available.
+
+        Args:
+            timeout: Maximum seconds to wait (default: wait indefinitely).
+
+        Returns:
+            bool: True if a token was taken, False if the timeout expired first.
+        """
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing provider for a while.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. It then lets a single trial
+    call through (half-open); success closes it again, failure re-opens it.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_timeout: Seconds to stay open before allowing a trial call.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            if self._state == self.OPEN and self._cooled_down():
+                return self.HALF_OPEN
+            return self._state
+
+    def _cooled_down(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._cooled_down():
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call and close the breaker."""
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+def backoff_delay(
+    retry: int, base: float, cap: float, rng: Optional[random.Random] = None
+) -> float:
+    """
+    Compute a "full jitter" exponential backoff delay.
+
+    Args:
+        retry: 0-based retry number.
+        base: Delay scale of the first retry in seconds.
+        cap: Maximum delay in seconds.
+        rng: Random generator (default: the module-level generator).
+
+    Returns:
+        float: Seconds to sleep, uniformly drawn from ``[0, min(cap, base * 2**retry)]``.
+    """
+    return (rng or random).uniform(0, min(cap, base * (2**retry)))
+
+
+class ResilientCaller:
+    """
+    Call a function under rate limiting, retries, deadlines and a circuit breaker.
+
+    Args:
+        rate_limit: Calls per second allowed by the quota (0 disables limiting).
+        burst: Calls allowed back to back before rate limiting kicks in.
+        max_retries: Retries after the first attempt for retryable errors.
+        backoff_base: Backoff scale in seconds.
+        backoff_max: Maximum backoff delay in seconds.
+        call_timeout: Deadline for a single call in seconds (None disables it).
+        failure_threshold: Consecutive failures that open the circuit breaker.
+        reset_timeout: Seconds the circuit breaker stays open.
+    """
+
+    def __init__(
+        self,
+        rate_limit: float = 0.0,
+        burst: int = 1,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        call_timeout: Optional[float] = 120.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.limiter = TokenBucket(rate_limit, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.call_timeout = call_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResilientCaller":
+        """
+        Build a caller from ``LLM_*`` environment variables.
+
+        ``LLM_RATE_LIMIT``, ``LLM_BURST``, ``LLM_MAX_RETRIES``,
+        ``LLM_BACKOFF_BASE``, ``LLM_BACKOFF_MAX``, ``LLM_TIMEOUT`` (0 disables),
+        ``LLM_BREAKER_THRESHOLD`` and ``LLM_BREAKER_RESET``.
+        """
+        timeout = float(os.getenv("LLM_TIMEOUT", "120"))
+        return cls(
+            rate_limit=float(os.getenv("LLM_RATE_LIMIT", "0")),
+            burst=int(os.getenv("LLM_BURST", "1")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "20")),
+            call_timeout=timeout or None,
+            failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+        )
+
+    def _run_with_timeout(self, func: Callable[..., T], timeout: Optional[float], *args: Any) -> T:
+        token = current_token()
+        if timeout is None and token is None:
+            return func(*args)
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="llm-call")
+        future = self._executor.submit(func, *args)
+        finished = threading.Event()
+        future.add_done_callback(lambda _: finished.set())
+        handle = token.on_cancel(finished.set) if token is not None else None
+        try:
+            # The provider call cannot be interrupted; on a timeout or a
+            # cancellation its result is discarded
+            if not finished.wait(timeout):
+                future.cancel()
+                raise DeadlineExceededError(f"Model call exceeded its {timeout:.1f}s deadline")
+            if token is not None and not future.done():
+                future.cancel()
+                raise CancelledError(token.reason)
+            return future.result()
+        finally:
+            if token is not None and handle is not None:
+                token.remove(handle)
+
+    def call(self, func: Callable[..., T], *args: Any, deadline: Optional[float] = None) -> T:
+        """
+        Call ``func(*args)`` with the configured resilience policy.
+
+        Args:
+            func: The provider call.
+            *args: Positional arguments for ``func``.
+            deadline: Optional absolute ``time.monotonic()`` deadline covering all
+                retries; no attempt is started that would run past it.
+
+        Returns:
+            The value returned by ``func``.
+
+        Raises:
+            CancelledError: If the current session is cancelled.
+            CircuitOpenError: If the circuit breaker is open.
+            DeadlineExceededError: If the deadline expires.
+            Exception: The last error if it is not retryable or retries are exhausted.
+        """
+        token = current_token()
+        retry = 0
+        while True:
+            if token is not None:
+                token.raise_if_cancelled()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceededError("Deadline expired before the model call")
+
+            if not self.breaker.allow():
+                LLM_CIRCUIT_REJECTIONS.inc()
+                raise CircuitOpenError("Model provider circuit breaker is open")
+
+            if not self.limiter.acquire(timeout=remaining):
+                raise DeadlineExceededError("Deadline expired waiting for the rate limiter")
+
+            timeout = self.call_timeout
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0.0)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            try:
+                result = self._run_with_timeout(func, timeout, *args)
+            except CancelledError:
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # Client errors say nothing about provider health
+                    self.breaker.record_success()
+                    raise
+                status = status_code_of(e)
+                if status == 429:
+                    # Throttling means the provider is healthy but busy; only
+                    # errors and timeouts count towards opening the breaker
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                if retry >= self.max_retries:
+                    raise
+
+                delay = backoff_delay(retry, self.backoff_base, self.backoff_max)
+                retry_after = getattr(e, "retry_after", None)
+                if isinstance(retry_after, (int, float)):
+                    delay = max(delay, float(retry_after))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+
+                LLM_RETRIES.inc(reason=str(status) if status else type(e).__name__)
+                logger.warning(f"Model call failed ({e}); retry {retry + 1} in {delay:.2f}s")
+                if token is not None and token.wait(delay):
+                    raise CancelledError(token.reason) from e
+                if token is None:
+                    time.sleep(delay)
+                retry += 1
+                continue
+
+            self.breaker.record_success()
+            return result
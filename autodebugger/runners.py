@@ -0,0 +1,316 @@
+"""
+Runners for the languages the debugger can execute.
+
+This module maps a language name to a callable running code of that language
+and returning ``(success, output)``, like :func:`autodebugger.sandbox.run_code`
+does for Python. C and C++ are compiled with the local toolchain (``CC`` and
+``CXX``, or the first of gcc, clang and cc found on the ``PATH``), and
+JavaScript runs with Node.js.
+
+Compiled programs are kept in a content-addressed build cache keyed by the
+compiler, its flags and the preprocessed source, so a translation unit whose
+code and included headers did not change is not rebuilt by later attempts.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from autodebugger.metrics import SANDBOX_BUILD_SECONDS, record_cache_lookup
+from autodebugger.sandbox import DEFAULT_TIMEOUT, run_code, run_process
+
+logger = logging.getLogger(__name__)
+
+RunFn = Callable[[str, float], Tuple[bool, str]]
+
+RUNNERS: Dict[str, RunFn] = {}
+
+TOOLCHAIN_MISSING = "No toolchain found"
+
+_ALIASES = {
+    "py": "python",
+    "c++": "cpp",
+    "cxx": "cpp",
+    "js": "javascript",
+    "node": "javascript",
+}
+
+_COMPILERS = {
+    "c": ("CC", "CFLAGS", ("gcc", "clang", "cc"), "c", ["-lm"]),
+    "cpp": ("CXX", "CXXFLAGS", ("g++", "clang++", "c++"), "c++", []),
+}
+
+
+def runner(language: str) -> Callable[[RunFn], RunFn]:
+    """
+    Register the runner of a language.
+
+    Args:
+        language: Lower-case language name.
+
+    Returns:
+        Callable: Decorator registering the function.
+
+    Example:
+        >>> @runner("bash")
+        ... def run_bash(code, timeout):
+        ...     return run_process(["bash", "-s"], timeout, stdin=code)
+    """
+
+    def decorator(func: RunFn) -> RunFn:
+        RUNNERS[language] = func
+        return func
+
+    return decorator
+
+
+def get_runner(language: str) -> RunFn:
+    """
+    Look up the runner of a language.
+
+    If ``SANDBOX_WORKERS`` is set, the returned runner sends the code to the
+    remote sandbox workers instead of running it locally.
+
+    Args:
+        language: Language name as shown to the user (e.g. "C++" or "JavaScript").
+
+    Returns:
+        RunFn: Callable executing ``(code, timeout)``.
+
+    Raises:
+        ValueError: If no runner is registered for the language.
+    """
+    key = language.strip().lower()
+    key = _ALIASES.get(key, key)
+    if key not in RUNNERS:
+        raise ValueError(f"No runner for {language}; available: {', '.join(sorted(RUNNERS))}")
+    # Imported here because the worker daemon itself runs the local runners
+    from autodebugger.workers import get_worker_pool
+
+    pool = get_worker_pool()
+    if pool is not None:
+        return functools.partial(pool.run, language=key)
+    return RUNNERS[key]
+
+
+class BuildCache:
+    """
+    Content-addressed store of compiled programs.
+
+    Args:
+        directory: Cache directory (default: ``BUILD_CACHE_DIR`` or a
+            directory under the system temp dir).
+        max_entries: Programs kept; the least recently used are removed.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 64) -> None:
+        self.directory = (
+            directory
+            or os.getenv("BUILD_CACHE_DIR")
+            or os.path.join(tempfile.gettempdir(), "autodebugger-builds")
+        )
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """Hash the inputs of a build."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        """Return where the program built for a key is stored."""
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a program.
+
+        Args:
+            key: Build key from :meth:`key`.
+
+        Returns:
+            Optional[str]: Path of the program, or None if it was not built yet.
+        """
+        path = self.path(key)
+        hit = os.path.exists(path)
+        record_cache_lookup("build", hit)
+        if not hit:
+            return None
+        os.utime(path)  # mark as recently used
+        return path
+
+    def put(self, key: str, built: str) -> str:
+        """
+        Move a freshly built program into the cache.
+
+        Args:
+            key: Build key from :meth:`key`.
+            built: Path of the program to store.
+
+        Returns:
+            str: Path of the cached program.
+        """
+        path = self.path(key)
+        os.replace(built, path)
+        with self._lock:
+            entries = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.is_file()),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            for entry in entries[: max(len(entries) - self.max_entries, 0)]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        return path
+
+
+_build_cache: Optional[BuildCache] = None
+_build_cache_lock = threading.Lock()
+
+
+def get_build_cache() -> BuildCache:
+    """Return the shared build cache, creating it on first use."""
+    global _build_cache
+    with _build_cache_lock:
+        if _build_cache is None:
+            _build_cache = BuildCache()
+        return _build_cache
+
+
+def find_compiler(language: str) -> Optional[str]:
+    """
+    Find the compiler of a compiled language.
+
+    Args:
+        language: "c" or "cpp".
+
+    Returns:
+        Optional[str]: Path of the compiler, or None if none is installed.
+    """
+    variable, _, candidates, _, _ = _COMPILERS[language]
+    configured = os.getenv(variable)
+    for name in [configured] if configured else candidates:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+@lru_cache(maxsize=8)
+def _compiler_identity(compiler: str) -> str:
+    try:
+        result = subprocess.run(
+            [compiler, "--version"], capture_output=True, text=True, timeout=10, check=False
+        )
+        return result.stdout
+    except (OSError, subprocess.SubprocessError):
+        return compiler
+
+
+def build(language: str, code: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[Optional[str], str]:
+    """
+    Compile a C or C++ program, reusing a cached build of the same inputs.
+
+    Args:
+        language: "c" or "cpp".
+        code: Source of the single translation unit.
+        timeout: Seconds allowed for preprocessing and compiling.
+
+    Returns:
+        Tuple[Optional[str], str]: Path of the program and "" on success,
+        otherwise None and the compiler diagnostics.
+    """
+    compiler = find_compiler(language)
+    variable, flags_variable, candidates, source_type, libraries = _COMPILERS[language]
+    if compiler is None:
+        return None, f"{TOOLCHAIN_MISSING}: install {' or '.join(candidates)} or set {variable}"
+    flags = shlex.split(os.getenv(flags_variable, ""))
+
+    # The preprocessed source covers the included headers as well
+    preprocess = [compiler, *flags, "-E", "-x", source_type, "-"]
+    try:
+        preprocessed = subprocess.run(
+            preprocess, input=code, capture_output=True, text=True, timeout=timeout, check=False
+        )
+    except subprocess.TimeoutExpired:
+        return None, f"Compilation timed out ({timeout:g} seconds)"
+    if preprocessed.returncode != 0:
+        return None, preprocessed.stderr
+
+    cache = get_build_cache()
+    key = cache.key(_compiler_identity(compiler), *flags, *libraries, preprocessed.stdout)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, ""
+
+    start = time.perf_counter()
+    built = os.path.join(cache.directory, f".{key}.{threading.get_ident()}.tmp")
+    command = [compiler, *flags, "-x", source_type, "-", "-o", built, *libraries]
+    try:
+        compiled = subprocess.run(
+            command, input=code, capture_output=True, text=True, timeout=timeout, check=False
+        )
+    except subprocess.TimeoutExpired:
+        return None, f"Compilation timed out ({timeout:g} seconds)"
+    finally:
+        SANDBOX_BUILD_SECONDS.observe(time.perf_counter() - start, language=language)
+    if compiled.returncode != 0:
+        return None, compiled.stderr
+    logger.info(f"Built {language} program {key[:12]}")
+    return cache.put(key, built), ""
+
+
+def _run_compiled(language: str, code: str, timeout: float) -> Tuple[bool, str]:
+    start = time.perf_counter()
+    program, diagnostics = build(language, code, timeout)
+    if program is None:
+        logger.warning(f"Compilation failed: {diagnostics}")
+        return False, diagnostics
+    return run_process([program], max(timeout - (time.perf_counter() - start), 1.0))
+
+
+runner("python")(run_code)
+
+
+@runner("c")
+def run_c(code: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[bool, str]:
+    """Compile and run a C program."""
+    return _run_compiled("c", code, timeout)
+
+
+@runner("cpp")
+def run_cpp(code: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[bool, str]:
+    """Compile and run a C++ program."""
+    return _run_compiled("cpp", code, timeout)
+
+
+@runner("javascript")
+def run_javascript(code: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[bool, str]:
+    """Run a JavaScript program with Node.js (``NODE`` or ``node`` on the ``PATH``)."""
+    node = shutil.which(os.getenv("NODE", "node"))
+    if node is None:
+        return False, f"{TOOLCHAIN_MISSING}: install Node.js or set NODE"
+    return run_process([node, "-"], timeout, stdin=code)
+
+
+def languages() -> List[str]:
+    """Return the languages with a registered runner."""
+    return sorted(RUNNERS)
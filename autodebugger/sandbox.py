@@ -0,0 +1,162 @@
+"""
+Sandboxed execution of user code.
+
+This module runs Python code in a separate interpreter process, or any other
+program with :func:`run_process`, and reports whether it succeeded together
+with its output or error message. Programs run in a process group of their
+own, which is killed as a whole on timeout or when the session is cancelled.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import time
+from typing import List, Optional, Tuple
+
+from autodebugger.cancellation import CancelledError, current_token
+from autodebugger.metrics import SANDBOX_RUN_SECONDS, SANDBOX_SPAWN_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30.0
+
+# Compiles the program read from stdin as "<string>", the file name ``python -c``
+# reports, so tracebacks look the same; a single expression leaves no names behind
+_BOOTSTRAP = 'exec(compile(__import__("sys").stdin.buffer.read(), "<string>", "exec"))'
+_TRACEBACK = "Traceback (most recent call last):\n"
+_BOOTSTRAP_FRAME = '  File "<string>", line 1, in <module>\n'
+
+
+def _strip_bootstrap(error: str) -> str:
+    """Remove the bootstrap's own frame from a traceback."""
+    if not error.startswith(_TRACEBACK + _BOOTSTRAP_FRAME):
+        return error
+    rest = error[len(_TRACEBACK + _BOOTSTRAP_FRAME) :]
+    # A syntax error is raised by compile() itself and leaves no other frame
+    if rest.startswith("  File ") and rest.split("\n", 1)[0].endswith(", in <module>"):
+        return _TRACEBACK + rest
+    return rest
+
+
+def _kill(process: "subprocess.Popen[str]") -> None:
+    """Kill a program together with the processes it started."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass  # already exited
+
+
+def run_process(
+    args: List[str], timeout: float = DEFAULT_TIMEOUT, stdin: Optional[str] = None
+) -> Tuple[bool, str]:
+    """
+    Run a program and capture its output or error.
+
+    Args:
+        args: Command line of the program.
+        timeout: Seconds after which the process is killed (default: 30).
+        stdin: Text written to the program's standard input, if any.
+
+    Returns:
+        Tuple[bool, str]: A tuple containing:
+            - bool: True if the program exited with status 0, False otherwise.
+            - str: Standard output if successful, error message if failed.
+
+    Raises:
+        CancelledError: If the current session is cancelled before or while
+            the program runs; the program is killed.
+    """
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+    logger.info("Executing code in subprocess")
+    start = time.perf_counter()
+    outcome = "error"
+    handle: Optional[int] = None
+
+    try:
+        process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE if stdin is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            start_new_session=True,
+        )
+        SANDBOX_SPAWN_SECONDS.observe(time.perf_counter() - start)
+        if token is not None:
+            handle = token.on_cancel(lambda: _kill(process))
+
+        try:
+            stdout, stderr = process.communicate(input=stdin, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill(process)
+            process.communicate()
+            raise
+
+        if token is not None and token.cancelled:
+            outcome = "cancelled"
+            raise CancelledError(token.reason)
+
+        if process.returncode == 0:
+            outcome = "success"
+            logger.info("Code executed successfully")
+            return True, stdout
+        else:
+            outcome = "failure"
+            logger.warning(f"Code execution failed with error: {stderr}")
+            return False, stderr
+
+    except subprocess.TimeoutExpired:
+        outcome = "timeout"
+        error_msg = f"Code execution timed out ({timeout:g} seconds)"
+        logger.error(error_msg)
+        return False, error_msg
+
+    except CancelledError:
+        logger.info("Code execution cancelled")
+        raise
+
+    except Exception as e:
+        error_msg = f"Unexpected error during code execution: {str(e)}"
+        logger.error(error_msg)
+        return False, error_msg
+
+    finally:
+        if token is not None and handle is not None:
+            token.remove(handle)
+        SANDBOX_RUN_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+
+
+def run_code(code: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[bool, str]:
+    """
+    Execute Python code and capture the output or error.
+
+    This function runs the provided Python code in a subprocess and returns
+    whether it executed successfully along with the output or error message.
+    The code is sent through the standard input rather than the command line,
+    so its size is not limited by the operating system's argument length.
+
+    Args:
+        code: Python code string to execute.
+        timeout: Seconds after which the process is killed (default: 30).
+
+    Returns:
+        Tuple[bool, str]: A tuple containing:
+            - bool: True if execution was successful, False otherwise.
+            - str: Standard output if successful, error message if failed.
+
+    Example:
+        >>> success, output = run_code("print('Hello World')")
+        >>> print(f"Success: {success}, Output: {output}")
+        Success: True, Output: Hello World
+    """
+    success, output = run_process(["python", "-c", _BOOTSTRAP], timeout, stdin=code)
+    return success, output if success else _strip_bootstrap(output)
@@ -0,0 +1,350 @@
+"""
+Fair scheduling of model and sandbox capacity across users.
+
+Every model request and sandbox run of the web application takes a slot of a
+shared :class:`FairScheduler`. Slots are handed out by start-time fair
+queueing: each user is a flow weighted by its tenant's weight, so a user
+running many long attempts cannot starve the others. Per-user and per-tenant
+quotas cap the slots one party holds at a time, and admission control rejects
+requests outright when the queue is full or the expected wait is too long.
+Requests of a cancelled session leave the queue at once.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from autodebugger.cancellation import CancellationToken, CancelledError, current_token
+from autodebugger.metrics import SCHEDULER_REJECTIONS, SCHEDULER_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM = "llm"
+SANDBOX = "sandbox"
+
+_MAX_FLOWS = 1024
+
+# Called with the queue position (1 = next) and estimated wait in seconds
+WaitCallback = Callable[[int, float], None]
+
+
+class SchedulerOverloadedError(Exception):
+    """Raised when admission control rejects a request."""
+
+
+@dataclass(order=True)
+class _Request:
+    tag: float
+    seq: int
+    resource: str = field(compare=False)
+    user: str = field(compare=False)
+    tenant: str = field(compare=False)
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """
+    Parse tenant weights written as ``tenant=weight`` pairs.
+
+    Args:
+        spec: Comma-separated pairs, e.g. ``"research=2,students=1"``.
+
+    Returns:
+        Dict[str, float]: Weight per tenant.
+    """
+    weights: Dict[str, float] = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        tenant, _, weight = pair.partition("=")
+        weights[tenant.strip()] = float(weight)
+    return weights
+
+
+class FairScheduler:
+    """
+    Weighted fair queueing of limited slots with quotas and admission control.
+
+    Args:
+        slots: Concurrent slots per resource, e.g. ``{"llm": 4, "sandbox": 8}``.
+        user_quota: Slots of one resource a user may hold at once (0: no limit).
+        tenant_quota: Slots of one resource a tenant may hold at once (0: no limit).
+        weights: Share of each tenant relative to the default weight of 1.
+        max_queue: Requests waiting per resource before new ones are rejected.
+        max_wait: Estimated wait in seconds above which requests are rejected
+            (0: no limit).
+        service_time: Initial estimate of a slot's hold time in seconds.
+    """
+
+    def __init__(
+        self,
+        slots: Dict[str, int],
+        user_quota: int = 0,
+        tenant_quota: int = 0,
+        weights: Optional[Dict[str, float]] = None,
+        max_queue: int = 64,
+        max_wait: float = 0.0,
+        service_time: float = 5.0,
+    ) -> None:
+        self.slots = slots
+        self.user_quota = user_quota
+        self.tenant_quota = tenant_quota
+        self.weights = weights or {}
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._queues: Dict[str, List[_Request]] = {resource: [] for resource in slots}
+        self._running: Dict[str, int] = {resource: 0 for resource in slots}
+        self._held: Dict[Tuple[str, str, str], int] = {}
+        self._virtual_time: Dict[str, float] = {resource: 0.0 for resource in slots}
+        self._finish: Dict[Tuple[str, str, str], float] = {}
+        self._service: Dict[str, float] = {resource: service_time for resource in slots}
+
+    @classmethod
+    def from_env(cls) -> "FairScheduler":
+        """
+        Build from ``SCHEDULER_LLM_SLOTS``, ``SCHEDULER_SANDBOX_SLOTS``,
+        ``SCHEDULER_USER_QUOTA``, ``SCHEDULER_TENANT_QUOTA``,
+        ``SCHEDULER_TENANT_WEIGHTS``, ``SCHEDULER_MAX_QUEUE`` and
+        ``SCHEDULER_MAX_WAIT``.
+        """
+        return cls(
+            slots={
+                LLM: int(os.getenv("SCHEDULER_LLM_SLOTS", "4")),
+                SANDBOX: int(os.getenv("SCHEDULER_SANDBOX_SLOTS", str(os.cpu_count() or 1))),
+            },
+            user_quota=int(os.getenv("SCHEDULER_USER_QUOTA", "2")),
+            tenant_quota=int(os.getenv("SCHEDULER_TENANT_QUOTA", "0")),
+            weights=parse_weights(os.getenv("SCHEDULER_TENANT_WEIGHTS", "")),
+            max_queue=int(os.getenv("SCHEDULER_MAX_QUEUE", "64")),
+            max_wait=float(os.getenv("SCHEDULER_MAX_WAIT", "0")),
+        )
+
+    def _eligible(self, request: _Request) -> bool:
+        user = self._held.get((request.resource, "user", request.user), 0)
+        tenant = self._held.get((request.resource, "tenant", request.tenant), 0)
+        return (not self.user_quota or user < self.user_quota) and (
+            not self.tenant_quota or tenant < self.tenant_quota
+        )
+
+    def _next(self, resource: str) -> Optional[_Request]:
+        if self._running[resource] >= self.slots[resource]:
+            return None
+        return min(
+            (request for request in self._queues[resource] if self._eligible(request)),
+            default=None,
+        )
+
+    def _estimate(self, resource: str, position: int) -> float:
+        return position * self._service[resource] / self.slots[resource]
+
+    def position(self, request: _Request) -> Tuple[int, float]:
+        """
+        Return the queue position and estimated wait of a waiting request.
+
+        Args:
+            request: A request returned by :meth:`acquire` that is still queued.
+
+        Returns:
+            Tuple[int, float]: 1-based position and estimated wait in seconds.
+        """
+        with self._cond:
+            position = 1 + sum(other < request for other in self._queues[request.resource])
+            return position, self._estimate(request.resource, position)
+
+    def acquire(
+        self,
+        resource: str,
+        user: str,
+        tenant: str = "default",
+        on_wait: Optional[WaitCallback] = None,
+    ) -> _Request:
+        """
+        Wait for a slot of a resource.
+
+        Args:
+            resource: Resource name, e.g. :data:`LLM` or :data:`SANDBOX`.
+            user: Identity of the requesting user (a flow of its own).
+            tenant: Tenant the user belongs to, for weights and quotas.
+            on_wait: Called with the queue position and estimated wait while
+                the request waits.
+
+        Returns:
+            The granted request, to be passed to :meth:`release`.
+
+        Raises:
+            SchedulerOverloadedError: If the queue is full or the estimated
+                wait exceeds ``max_wait``.
+            CancelledError: If the current session is cancelled while waiting.
+        """
+        token = current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+            handle = token.on_cancel(self._wake)
+        try:
+            return self._acquire(resource, user, tenant, on_wait, token)
+        finally:
+            if token is not None:
+                token.remove(handle)
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def _acquire(
+        self,
+        resource: str,
+        user: str,
+        tenant: str,
+        on_wait: Optional[WaitCallback],
+        token: Optional[CancellationToken],
+    ) -> _Request:
+        start = time.perf_counter()
+        with self._cond:
+            queue = self._queues[resource]
+            if len(queue) >= self.max_queue:
+                SCHEDULER_REJECTIONS.inc(resource=resource, reason="queue_full")
+                raise SchedulerOverloadedError(f"The {resource} queue is full, try again later")
+            estimate = self._estimate(resource, len(queue) + 1)
+            if self.max_wait and queue and estimate > self.max_wait:
+                SCHEDULER_REJECTIONS.inc(resource=resource, reason="wait_too_long")
+                raise SchedulerOverloadedError(
+                    f"The {resource} wait of about {estimate:.0f}s exceeds the limit"
+                )
+
+            flow = (resource, tenant, user)
+            weight = self.weights.get(tenant, 1.0)
+            tag = max(self._virtual_time[resource], self._finish.get(flow, 0.0))
+            self._finish[flow] = tag + 1.0 / weight
+            request = _Request(tag, next(self._seq), resource, user, tenant)
+            queue.append(request)
+            self._cond.notify_all()
+
+            reported = None
+            while self._next(resource) is not request:
+                if token is not None and token.cancelled:
+                    queue.remove(request)
+                    self._cond.notify_all()
+                    raise CancelledError(token.reason)
+                if on_wait is not None:
+                    status = self.position(request)
+                    if status != reported:
+                        reported = status
+                        self._cond.release()
+                        try:
+                            on_wait(*status)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                self._cond.wait(timeout=1.0)
+
+            queue.remove(request)
+            self._running[resource] += 1
+            self._virtual_time[resource] = request.tag
+            for key in ((resource, "user", user), (resource, "tenant", tenant)):
+                self._held[key] = self._held.get(key, 0) + 1
+            # More slots may be free for the requests queued behind this one
+            self._cond.notify_all()
+
+        waited = time.perf_counter() - start
+        SCHEDULER_WAIT_SECONDS.observe(waited, resource=resource)
+        if waited > 0.1:
+            logger.info(f"{resource} slot granted to {user} ({tenant}) after {waited:.1f}s")
+        return request
+
+    def release(self, request: _Request, held: float) -> None:
+        """
+        Return a slot.
+
+        Args:
+            request: The request returned by :meth:`acquire`.
+            held: Seconds the slot was held, to refine wait estimates.
+        """
+        with self._cond:
+            resource = request.resource
+            self._running[resource] -= 1
+            for key in ((resource, "user", request.user), (resource, "tenant", request.tenant)):
+                self._held[key] -= 1
+                if not self._held[key]:
+                    del self._held[key]
+            self._service[resource] += 0.2 * (held - self._service[resource])
+            if len(self._finish) > _MAX_FLOWS:
+                # Flows that are not ahead of the virtual time carry no state
+                self._finish = {
+                    flow: finish
+                    for flow, finish in self._finish.items()
+                    if finish > self._virtual_time[flow[0]]
+                }
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(
+        self,
+        resource: str,
+        user: str,
+        tenant: str = "default",
+        on_wait: Optional[WaitCallback] = None,
+    ) -> Iterator[None]:
+        """
+        Hold a slot of a resource for the duration of a ``with`` block.
+
+        Example:
+            >>> scheduler = FairScheduler({"sandbox": 1})
+            >>> with scheduler.slot("sandbox", user="alice"):
+            ...     pass
+        """
+        request = self.acquire(resource, user, tenant, on_wait)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(request, time.perf_counter() - start)
+
+    def wrap(
+        self,
+        resource: str,
+        func: Callable[..., T],
+        user: str,
+        tenant: str = "default",
+        on_wait: Optional[WaitCallback] = None,
+    ) -> Callable[..., T]:
+        """
+        Make every call of a function hold a slot of a resource.
+
+        Args:
+            resource: Resource the function uses.
+            func: The function, e.g. a ``suggest`` or ``run`` callable.
+            user: Identity of the user the calls are made for.
+            tenant: Tenant of the user.
+            on_wait: Called with the queue position and estimated wait.
+
+        Returns:
+            Callable: A function with the same arguments and result.
+        """
+
+        def scheduled(*args: Any, **kwargs: Any) -> T:
+            with self.slot(resource, user, tenant, on_wait):
+                return func(*args, **kwargs)
+
+        return scheduled
+
+
+_scheduler: Optional[FairScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """Return the scheduler shared by all sessions, configured from the environment."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FairScheduler.from_env()
+        return _scheduler
@@ -0,0 +1,120 @@
+"""
+Speculative fix requests.
+
+While a candidate fix runs in the sandbox the model is otherwise idle. This
+module requests an alternative fix for the same error in the background, so
+that when the candidate fails without getting past the error, the next
+candidate is already available instead of costing another model round trip.
+Speculative requests are limited per session (``SPECULATIVE_REQUESTS``,
+default 0 = disabled) and abandoned as soon as a candidate succeeds.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from autodebugger.history import error_signature
+from autodebugger.metrics import SPECULATIVE_FIXES
+
+logger = logging.getLogger(__name__)
+
+SuggestFn = Callable[[str, str], str]
+
+
+class Speculation:
+    """
+    At most one background fix request at a time, within a per-session budget.
+
+    Args:
+        suggest: Callable returning fixed code for ``(error, code)``.
+        max_requests: Speculative requests allowed per session (default:
+            ``SPECULATIVE_REQUESTS`` or 0).
+    """
+
+    def __init__(self, suggest: SuggestFn, max_requests: Optional[int] = None) -> None:
+        if max_requests is None:
+            max_requests = int(os.getenv("SPECULATIVE_REQUESTS", "0"))
+        self.suggest = suggest
+        self.remaining = max(max_requests, 0)
+        self.code = ""
+        self.signature = ""
+        self._future: Optional["Future[str]"] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether a speculative request is in flight or waiting to be used."""
+        return self._future is not None
+
+    def start(self, error: str, code: str) -> None:
+        """
+        Request an alternative fix in the background, if the budget allows.
+
+        Args:
+            error: Prompt the current candidate was requested with.
+            code: Code the current candidate fixes.
+        """
+        if self.remaining <= 0 or self._future is not None:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self.remaining -= 1
+        self.code = code
+        self.signature = error_signature(error)
+        self._future = self._executor.submit(self.suggest, error, code)
+        logger.debug(f"Speculative fix requested, {self.remaining} left")
+
+    def take(self, code: str, error: str) -> Optional[str]:
+        """
+        Return the alternative fix if it addresses the same code and error.
+
+        Waits for the request if it is still in flight.
+
+        Args:
+            code: Code the next candidate should fix.
+            error: Error of that code.
+
+        Returns:
+            Optional[str]: The alternative fix, or None if there is none, it
+            failed, or it was requested for a different code or error.
+        """
+        future, self._future = self._future, None
+        if future is None:
+            return None
+        if code != self.code or error_signature(error) != self.signature:
+            self._abandon(future)
+            return None
+        try:
+            candidate = future.result()
+        except Exception as e:
+            logger.warning(f"Speculative fix request failed: {e}")
+            SPECULATIVE_FIXES.inc(result="failed")
+            return None
+        SPECULATIVE_FIXES.inc(result="used")
+        return candidate
+
+    def cancel(self) -> None:
+        """Abandon the pending request, e.g. because a candidate succeeded."""
+        future, self._future = self._future, None
+        if future is not None:
+            self._abandon(future)
+
+    def close(self) -> None:
+        """Abandon the pending request and release the worker thread."""
+        self.cancel()
+        if self._executor is not None:
+            # A request already sent cannot be recalled; do not wait for it
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _abandon(future: "Future[str]") -> None:
+        if future.done():
+            SPECULATIVE_FIXES.inc(result="discarded")
+        else:
+            future.cancel()
+            SPECULATIVE_FIXES.inc(result="cancelled")
@@ -0,0 +1,156 @@
+"""
+Adaptive execution timeouts.
+
+This module derives the sandbox timeout of each run from the runtimes
+observed earlier for the same snippet family (the original code and all fix
+attempts made for it), bounded by a configurable floor and ceiling. A
+candidate that hangs is killed after a few multiples of the usual runtime
+instead of the full ceiling, while families that time out get more time on
+their next run.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Deque
+
+from autodebugger.sandbox import DEFAULT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Errors raised before any user code runs say nothing about its runtime
+_COMPILE_ERRORS = ("SyntaxError", "IndentationError", "TabError")
+
+
+def family_key(code: str) -> str:
+    """
+    Return the snippet family key for a piece of code.
+
+    Args:
+        code: The original code of a debugging session.
+
+    Returns:
+        str: A stable hash identifying the family.
+    """
+    normalized = "\n".join(line.rstrip() for line in code.strip().splitlines())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _is_compile_error(output: str) -> bool:
+    lines = output.strip().splitlines()
+    return bool(lines) and lines[-1].startswith(_COMPILE_ERRORS)
+
+
+class _Family:
+    """Runtime samples and timeout state of one snippet family."""
+
+    def __init__(self, max_samples: int) -> None:
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+        self.timed_out_at = 0.0
+
+
+class AdaptiveTimeouts:
+    """
+    Per-family sandbox timeouts learned from observed runtimes.
+
+    The timeout of a family is ``multiplier * slowest observed runtime + margin``,
+    clamped to ``[floor, ceiling]``. Families without usable samples get the
+    ceiling. After a run times out, the family's next timeout is at least twice
+    the one that expired, so genuinely long jobs are not killed repeatedly.
+
+    Args:
+        floor: Minimum timeout in seconds.
+        ceiling: Maximum timeout in seconds.
+        multiplier: Safety factor applied to the slowest observed runtime.
+        margin: Seconds added on top to absorb interpreter start-up jitter.
+        max_samples: Runtimes remembered per family.
+        max_families: Families remembered before the least recently used is dropped.
+    """
+
+    def __init__(
+        self,
+        floor: float = 2.0,
+        ceiling: float = DEFAULT_TIMEOUT,
+        multiplier: float = 5.0,
+        margin: float = 0.5,
+        max_samples: int = 20,
+        max_families: int = 1024,
+    ) -> None:
+        if floor > ceiling:
+            raise ValueError("Timeout floor must not exceed the ceiling")
+        self.floor = floor
+        self.ceiling = ceiling
+        self.multiplier = multiplier
+        self.margin = margin
+        self.max_samples = max_samples
+        self.max_families = max_families
+        self._families: "OrderedDict[str, _Family]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveTimeouts":
+        """
+        Build from ``SANDBOX_TIMEOUT_FLOOR``, ``SANDBOX_TIMEOUT_CEILING`` and
+        ``SANDBOX_TIMEOUT_MULTIPLIER``.
+        """
+        return cls(
+            floor=float(os.getenv("SANDBOX_TIMEOUT_FLOOR", "2")),
+            ceiling=float(os.getenv("SANDBOX_TIMEOUT_CEILING", str(DEFAULT_TIMEOUT))),
+            multiplier=float(os.getenv("SANDBOX_TIMEOUT_MULTIPLIER", "5")),
+        )
+
+    def _family(self, family: str) -> _Family:
+        state = self._families.get(family)
+        if state is None:
+            state = self._families[family] = _Family(self.max_samples)
+            if len(self._families) > self.max_families:
+                self._families.popitem(last=False)
+        else:
+            self._families.move_to_end(family)
+        return state
+
+    def timeout_for(self, family: str) -> float:
+        """
+        Return the timeout for the next run of a family.
+
+        Args:
+            family: Family key from :func:`family_key`.
+
+        Returns:
+            float: Timeout in seconds within ``[floor, ceiling]``.
+        """
+        with self._lock:
+            state = self._family(family)
+            if not state.samples:
+                timeout = self.ceiling
+            else:
+                timeout = self.multiplier * max(state.samples) + self.margin
+            timeout = max(timeout, 2 * state.timed_out_at)
+        return min(max(timeout, self.floor), self.ceiling)
+
+    def record(self, family: str, seconds: float, timeout: float, output: str = "") -> None:
+        """
+        Record the outcome of a run.
+
+        Args:
+            family: Family key from :func:`family_key`.
+            seconds: Wall-clock runtime of the run.
+            timeout: Timeout the run was given.
+            output: Output or error message of the run.
+        """
+        with self._lock:
+            state = self._family(family)
+            if seconds >= timeout:
+                state.timed_out_at = max(state.timed_out_at, timeout)
+                logger.info(f"Family {family} timed out after {timeout:g}s")
+            elif not _is_compile_error(output):
+                state.samples.append(seconds)
+
+
+# Shared across sessions, so repeated submissions of a snippet benefit too
+ADAPTIVE_TIMEOUTS = AdaptiveTimeouts.from_env()
@@ -0,0 +1,217 @@
+"""
+Token budget planning for model requests.
+
+This module estimates the prompt size of a model request, derives the output
+cap (``MAX_NEW_TOKENS``) from the size of the code to be fixed instead of a
+fixed 1000 tokens, and rejects requests that do not fit the model's context
+window. Estimates come from the model's tokenizer when ``LLM_TOKENIZER=model``
+is set, otherwise from a heuristic calibrated against the prompt token counts
+the model reports with every response.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import ast
+import logging
+import math
+import os
+import re
+import threading
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|\n|[^\sA-Za-z\d]")
+_ERROR_LINE = re.compile(r'File "<string>", line (\d+)')
+
+# Lines around the failing line sent when the enclosing block is too large
+SPLIT_WINDOW = 20
+
+
+class PromptTooLargeError(ValueError):
+    """Raised when a request cannot fit the model's context window."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without a tokenizer.
+
+    Words count one token per four letters, digits one per three, and every
+    punctuation character and newline counts as one token, which is close to
+    how SentencePiece tokenizers split source code.
+
+    Args:
+        text: Text to measure.
+
+    Returns:
+        int: Estimated token count.
+    """
+    count = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isalpha():
+            count += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            count += math.ceil(len(piece) / 3)
+        else:
+            count += 1
+    return count
+
+
+class TokenCounter:
+    """
+    Count prompt tokens with a tokenizer or a self-calibrating heuristic.
+
+    Args:
+        tokenize: Optional callable returning the exact token count of a text.
+        smoothing: Weight of a new observation in the calibration average.
+    """
+
+    def __init__(
+        self, tokenize: Optional[Callable[[str], int]] = None, smoothing: float = 0.2
+    ) -> None:
+        self.tokenize = tokenize
+        self.smoothing = smoothing
+        self.ratio = 1.0
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text: Text to measure.
+
+        Returns:
+            int: Token count (exact if a tokenizer is configured and reachable).
+        """
+        if self.tokenize is not None:
+            try:
+                return self.tokenize(text)
+            except Exception as e:
+                logger.warning(f"Tokenizer failed, falling back to the estimate: {e}")
+        return math.ceil(estimate_tokens(text) * self.ratio)
+
+    def calibrate(self, text: str, actual: int) -> None:
+        """
+        Adjust the heuristic with the token count the model reported for a text.
+
+        Args:
+            text: Prompt that was sent.
+            actual: Prompt tokens reported by the model.
+        """
+        estimate = estimate_tokens(text)
+        if estimate <= 0 or actual <= 0:
+            return
+        with self._lock:
+            self.ratio += self.smoothing * (actual / estimate - self.ratio)
+
+
+class TokenBudget:
+    """
+    Plan the output cap of a request from its input size.
+
+    The cap is ``output_ratio`` times the tokens of the code to fix plus
+    ``output_margin``, at least ``min_new_tokens``, at most ``max_new_tokens``
+    and never more than what is left of the context window.
+
+    Args:
+        context_window: Tokens the model accepts for prompt plus output.
+        max_new_tokens: Upper bound of the output cap.
+        min_new_tokens: Lower bound of the output cap; a prompt leaving less
+            room than this is rejected.
+        output_ratio: Expected output tokens per code token.
+        output_margin: Extra output tokens for short snippets.
+        counter: Token counter (default: the calibrated heuristic).
+    """
+
+    def __init__(
+        self,
+        context_window: int = 4096,
+        max_new_tokens: int = 1000,
+        min_new_tokens: int = 64,
+        output_ratio: float = 1.5,
+        output_margin: int = 32,
+        counter: Optional[TokenCounter] = None,
+    ) -> None:
+        self.context_window = context_window
+        self.max_new_tokens = max_new_tokens
+        self.min_new_tokens = min_new_tokens
+        self.output_ratio = output_ratio
+        self.output_margin = output_margin
+        self.counter = counter or TokenCounter()
+
+    @classmethod
+    def from_env(cls) -> "TokenBudget":
+        """
+        Build from ``LLM_CONTEXT_WINDOW``, ``LLM_MAX_NEW_TOKENS`` and
+        ``LLM_MIN_NEW_TOKENS``.
+        """
+        return cls(
+            context_window=int(os.getenv("LLM_CONTEXT_WINDOW", "4096")),
+            max_new_tokens=int(os.getenv("LLM_MAX_NEW_TOKENS", "1000")),
+            min_new_tokens=int(os.getenv("LLM_MIN_NEW_TOKENS", "64")),
+        )
+
+    def plan(self, prompt: str, code: str) -> Tuple[int, int]:
+        """
+        Compute the prompt size and output cap of a request.
+
+        Args:
+            prompt: The full prompt.
+            code: The code the model is asked to rewrite.
+
+        Returns:
+            Tuple[int, int]: Prompt tokens and ``MAX_NEW_TOKENS`` for the request.
+
+        Raises:
+            PromptTooLargeError: If the prompt leaves less than ``min_new_tokens``
+                of the context window, or cannot hold a rewrite of the code.
+        """
+        prompt_tokens = self.counter.count(prompt)
+        available = self.context_window - prompt_tokens
+        if available < self.min_new_tokens:
+            raise PromptTooLargeError(
+                f"Prompt of {prompt_tokens} tokens leaves {available} of the "
+                f"{self.context_window}-token context window"
+            )
+        code_tokens = estimate_tokens(code)
+        if code_tokens > min(available, self.max_new_tokens):
+            raise PromptTooLargeError(
+                f"A rewrite of {code_tokens} code tokens does not fit the output budget"
+            )
+        wanted = math.ceil(code_tokens * self.output_ratio) + self.output_margin
+        cap = min(max(wanted, self.min_new_tokens), self.max_new_tokens, available)
+        return prompt_tokens, cap
+
+
+def split_for_error(code: str, error: str) -> Optional[Tuple[int, int]]:
+    """
+    Find the part of the code to send when the whole code is too large.
+
+    This is the top-level statement containing the line reported in the
+    traceback, or a window of ``SPLIT_WINDOW`` lines around it if the code
+    does not parse or the statement spans the whole code.
+
+    Args:
+        code: The failing code.
+        error: Its error output.
+
+    Returns:
+        Optional[Tuple[int, int]]: 0-based start and end line indexes of the
+        part, or None if the error does not point at a line.
+    """
+    lines = re.findall(_ERROR_LINE, error)
+    total = len(code.splitlines())
+    if not lines or not 0 < int(lines[-1]) <= total:
+        return None
+    line = int(lines[-1])
+    try:
+        for node in ast.parse(code).body:
+            end = node.end_lineno or node.lineno
+            if node.lineno <= line <= end and (node.lineno, end) != (1, total):
+                start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+                return start - 1, end
+    except SyntaxError:
+        pass
+    return max(line - 1 - SPLIT_WINDOW, 0), min(line + SPLIT_WINDOW, total)
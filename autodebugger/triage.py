@@ -0,0 +1,180 @@
+"""
+Error triage.
+
+This module recognizes failures that cannot be fixed by editing the code, such
+as a missing input file, a module that is not installed, an unreachable
+network service, a permission error or a missing compiler or interpreter. The pipeline stops such sessions early
+instead of spending the remaining attempts on model calls.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import difflib
+import importlib.util
+import logging
+import os
+import pkgutil
+import re
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, FrozenSet, Optional, Tuple
+
+from autodebugger.runners import TOOLCHAIN_MISSING
+
+logger = logging.getLogger(__name__)
+
+MISSING_FILE = "missing_file"
+MISSING_MODULE = "missing_module"
+NETWORK = "network"
+PERMISSION = "permission"
+MISSING_TOOLCHAIN = "missing_toolchain"
+
+_EXCEPTION_PATTERN = re.compile(
+    r"^(?P<type>[A-Za-z_][\w.]*(?:Error|Exception|error)):?\s*(?P<message>.*)$"
+)
+_MODULE_PATTERN = re.compile(r"No module named '([\w.]+)'")
+_PATH_PATTERN = re.compile(r"\[Errno \d+\] [^:]+: '(.+)'")
+
+_NETWORK_TYPES = frozenset(
+    {
+        "ConnectionError",
+        "ConnectionRefusedError",
+        "ConnectionResetError",
+        "ConnectionAbortedError",
+        "gaierror",
+        "URLError",
+        "SSLError",
+        "ProxyError",
+        "MaxRetryError",
+        "NewConnectionError",
+        "RemoteDisconnected",
+    }
+)
+_NETWORK_MESSAGES = (
+    "Name or service not known",
+    "Temporary failure in name resolution",
+    "nodename nor servname provided",
+    "Network is unreachable",
+    "Connection refused",
+)
+
+
+@dataclass
+class Unfixable:
+    """
+    A failure that editing the code cannot fix.
+
+    Attributes:
+        category: One of the module-level category constants.
+        reason: Human-readable explanation shown to the user.
+    """
+
+    category: str
+    reason: str
+
+    def __str__(self) -> str:
+        return self.reason
+
+
+TriageFn = Callable[[str], Optional[Unfixable]]
+
+
+def parse_exception(output: str) -> Optional[Tuple[str, str]]:
+    """
+    Extract the final exception of a traceback.
+
+    Args:
+        output: Error output of a failed run.
+
+    Returns:
+        Optional[Tuple[str, str]]: The unqualified exception type and its
+        message, or None if the output does not end with an exception line.
+
+    Example:
+        >>> parse_exception("Traceback ...\\nurllib.error.URLError: <urlopen error>")
+        ('URLError', '<urlopen error>')
+    """
+    for line in reversed(output.strip().splitlines()):
+        match = _EXCEPTION_PATTERN.match(line.strip())
+        if match:
+            return match.group("type").rsplit(".", 1)[-1], match.group("message")
+    return None
+
+
+@lru_cache(maxsize=1)
+def _known_module_names() -> FrozenSet[str]:
+    names = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+    names.update(module.name for module in pkgutil.iter_modules())
+    return frozenset(names)
+
+
+def _missing_module(message: str) -> Optional[Unfixable]:
+    match = _MODULE_PATTERN.search(message)
+    if not match:
+        return None
+    name = match.group(1).split(".", 1)[0]
+    try:
+        if importlib.util.find_spec(name) is not None:
+            return None
+    except (ImportError, ValueError):
+        pass
+    # A misspelled import is something the model can fix
+    if difflib.get_close_matches(name, _known_module_names(), n=1, cutoff=0.8):
+        return None
+    return Unfixable(MISSING_MODULE, f"module '{name}' is not installed")
+
+
+def _missing_file(message: str) -> Optional[Unfixable]:
+    match = _PATH_PATTERN.search(message)
+    if not match:
+        return None
+    path = match.group(1)
+    if os.path.exists(path):
+        return None
+    return Unfixable(MISSING_FILE, f"input file '{path}' does not exist")
+
+
+def classify_error(output: str) -> Optional[Unfixable]:
+    """
+    Decide whether a failure is beyond what a code edit can fix.
+
+    Args:
+        output: Error output of a failed run.
+
+    Returns:
+        Optional[Unfixable]: Why the session should stop, or None if the model
+        should be asked for a fix.
+
+    Example:
+        >>> classify_error("PermissionError: [Errno 13] Permission denied: '/etc/shadow'")
+        Unfixable(category='permission', reason="permission denied: '/etc/shadow'")
+    """
+    if output.startswith(TOOLCHAIN_MISSING):
+        verdict = Unfixable(MISSING_TOOLCHAIN, output.strip().splitlines()[0])
+        logger.info(f"Unfixable error ({verdict.category}): {verdict.reason}")
+        return verdict
+
+    parsed = parse_exception(output)
+    if parsed is None:
+        return None
+    exc_type, message = parsed
+
+    if exc_type == "ModuleNotFoundError":
+        verdict = _missing_module(message)
+    elif exc_type == "FileNotFoundError":
+        verdict = _missing_file(message)
+    elif exc_type == "PermissionError":
+        target = _PATH_PATTERN.search(message)
+        verdict = Unfixable(
+            PERMISSION, f"permission denied: '{target.group(1)}'" if target else "permission denied"
+        )
+    elif exc_type in _NETWORK_TYPES or any(text in message for text in _NETWORK_MESSAGES):
+        verdict = Unfixable(NETWORK, f"network access failed ({exc_type})")
+    else:
+        verdict = None
+
+    if verdict is not None:
+        logger.info(f"Unfixable error ({verdict.category}): {verdict.reason}")
+    return verdict
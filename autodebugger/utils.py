@@ -8,9 +8,12 @@ Author: Ruslan Magana
 Website: ruslanmv.com
 """
 
+import functools
 import logging
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
 
 import requests
 from dotenv import load_dotenv
@@ -18,6 +21,18 @@ from ibm_watson_machine_learning.foundation_models import Model
 from ibm_watson_machine_learning.foundation_models.utils.enums import ModelTypes
 from ibm_watson_machine_learning.metanames import GenTextParamsMetaNames as GenParams
 
+from autodebugger.cancellation import CancelledError
+from autodebugger.cassettes import REPLAY, get_cassette
+from autodebugger.metrics import (
+    LLM_COMPLETION_TOKENS,
+    LLM_OVERSIZED_REQUESTS,
+    LLM_PLANNED_NEW_TOKENS,
+    LLM_PROMPT_TOKENS,
+    LLM_REQUEST_SECONDS,
+)
+from autodebugger.resilience import ResilientCaller, ServiceError
+from autodebugger.tokens import PromptTooLargeError, TokenBudget, split_for_error
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +43,44 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+DEFAULT_IAM_URL = "https://iam.cloud.ibm.com/oidc/token"
+DEFAULT_REGION = "us-south"
+WATSONX_API_VERSION = "2023-05-29"
+MODEL_ID = ModelTypes.LLAMA_2_70B_CHAT
+
+# Default generation parameters; MAX_NEW_TOKENS is overridden per request by
+# the token budget
+GENERATION_PARAMETERS: Dict[str, Any] = {
+    GenParams.DECODING_METHOD: "greedy",
+    GenParams.MAX_NEW_TOKENS: 1000,
+    GenParams.STOP_SEQUENCES: ["\n\n\n"],
+}
+
+
+def get_iam_url() -> str:
+    """
+    Return the IAM token endpoint.
+
+    Returns:
+        str: ``IBM_IAM_URL`` if set, otherwise the public IBM Cloud IAM endpoint.
+    """
+    return os.getenv("IBM_IAM_URL") or DEFAULT_IAM_URL
+
+
+def get_watsonx_url() -> str:
+    """
+    Return the WatsonX service URL.
+
+    Returns:
+        str: ``WATSONX_URL`` if set, otherwise the IBM Cloud endpoint of
+        ``IBM_CLOUD_REGION`` (default: us-south).
+    """
+    url = os.getenv("WATSONX_URL")
+    if url:
+        return url.rstrip("/")
+    region = os.getenv("IBM_CLOUD_REGION") or DEFAULT_REGION
+    return f"https://{region}.ml.cloud.ibm.com"
+
 
 def get_bearer(apikey: str) -> str:
     """
@@ -58,7 +111,7 @@ def get_bearer(apikey: str) -> str:
 
     try:
         response = requests.post(
-            "https://iam.cloud.ibm.com/oidc/token",
+            get_iam_url(),
             data=form_data,
             timeout=30,
         )
@@ -91,7 +144,114 @@ def get_bearer(apikey: str) -> str:
         raise Exception(f"Network error: {e}") from e
 
 
-def _initialize_watsonx_model() -> Model:
+class WatsonxHTTPModel:
+    """
+    Minimal text generation client for the WatsonX REST API.
+
+    This client talks to ``/ml/v1/text/generation`` directly with ``requests``
+    and a pooled session. Unlike the SDK it accepts any service URL, which
+    allows it to target local stand-in servers for offline load tests.
+
+    Args:
+        url: WatsonX service URL (e.g. ``http://127.0.0.1:8080``).
+        model_id: Foundation model identifier.
+        params: Default generation parameters.
+        project_id: WatsonX project ID.
+        api_key: API key exchanged for bearer tokens.
+        token: Optional initial bearer token.
+        timeout: Request timeout in seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        model_id: str,
+        params: Dict[str, Any],
+        project_id: str,
+        api_key: str,
+        token: Optional[str] = None,
+        timeout: float = 120,
+    ) -> None:
+        self.url = url.rstrip("/")
+        self.model_id = model_id
+        self.params = params
+        self.project_id = project_id
+        self.api_key = api_key
+        self.timeout = timeout
+        self._token = token
+        self._session = requests.Session()
+
+    def _bearer(self, refresh: bool = False) -> str:
+        if refresh or not self._token:
+            self._token = get_bearer(self.api_key)
+        return self._token
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        for refresh in (False, True):
+            response = self._session.post(
+                f"{self.url}{path}",
+                params={"version": WATSONX_API_VERSION},
+                json=payload,
+                headers={"Authorization": f"Bearer {self._bearer(refresh)}"},
+                timeout=self.timeout,
+            )
+            if response.status_code != 401:
+                break
+            logger.info("Bearer token rejected, requesting a new one")
+
+        if response.status_code != 200:
+            retry_after = response.headers.get("Retry-After")
+            raise ServiceError(
+                f"Request to {path} failed. Status code: {response.status_code}, "
+                f"body: {response.text[:200]}",
+                status_code=response.status_code,
+                retry_after=float(retry_after) if retry_after else None,
+            )
+        result: Dict[str, Any] = response.json()
+        return result
+
+    def _generate_one(self, prompt: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {
+            "model_id": self.model_id,
+            "input": prompt,
+            "parameters": params,
+            "project_id": self.project_id,
+        }
+        return self._post("/ml/v1/text/generation", payload)
+
+    def tokenize(self, prompt: str) -> Dict[str, Any]:
+        """
+        Count the tokens of a prompt with the model's tokenizer.
+
+        Args:
+            prompt: Text to tokenize.
+
+        Returns:
+            The WatsonX response; ``result["token_count"]`` holds the count.
+        """
+        payload = {"model_id": self.model_id, "input": prompt, "project_id": self.project_id}
+        return self._post("/ml/v1/text/tokenization", payload)
+
+    def generate(
+        self, prompt: Union[str, List[str]], params: Optional[Dict[str, Any]] = None
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Generate text for one prompt or a list of prompts.
+
+        Args:
+            prompt: A prompt or list of prompts.
+            params: Generation parameters overriding the defaults.
+
+        Returns:
+            The WatsonX response for a single prompt, or a list of responses.
+        """
+        merged = {**self.params, **(params or {})}
+        if isinstance(prompt, list):
+            return [self._generate_one(item, merged) for item in prompt]
+        return self._generate_one(prompt, merged)
+
+
+def _initialize_watsonx_model() -> Any:
     """
     Initialize and configure the WatsonX foundation model.
 
@@ -99,7 +259,8 @@ def _initialize_watsonx_model() -> Model:
     parameters and credentials from environment variables.
 
     Returns:
-        Model: Configured WatsonX foundation model instance.
+        Model: Configured WatsonX foundation model instance (an SDK ``Model``, or a
+        :class:`WatsonxHTTPModel` when ``WATSONX_CLIENT=http``).
 
     Raises:
         ValueError: If required environment variables are not set.
@@ -109,6 +270,11 @@ def _initialize_watsonx_model() -> Model:
         Required environment variables:
         - API_KEY: IBM Cloud API key
         - PROJECT_ID: WatsonX project ID
+
+        Optional environment variables:
+        - WATSONX_URL / IBM_CLOUD_REGION: service endpoint
+        - IBM_IAM_URL: IAM token endpoint
+        - WATSONX_CLIENT: ``sdk`` (default) or ``http``
     """
     api_key = os.getenv("API_KEY")
     project_id = os.getenv("PROJECT_ID")
@@ -119,24 +285,31 @@ def _initialize_watsonx_model() -> Model:
     if not project_id:
         raise ValueError("PROJECT_ID environment variable is not set")
 
-    parameters = {
-        GenParams.DECODING_METHOD: "greedy",
-        GenParams.MAX_NEW_TOKENS: 1000,
-        GenParams.STOP_SEQUENCES: ["\n\n\n"],
-    }
+    parameters = dict(GENERATION_PARAMETERS)
 
     credentials = {
-        "url": "https://us-south.ml.cloud.ibm.com",
+        "url": get_watsonx_url(),
         "apikey": api_key,
     }
 
     # Obtain bearer token
     credentials["token"] = get_bearer(api_key)
 
-    model_id = ModelTypes.LLAMA_2_70B_CHAT
+    model_id = MODEL_ID
 
     logger.info(f"Initializing WatsonX model: {model_id}")
 
+    if os.getenv("WATSONX_CLIENT", "sdk").lower() == "http":
+        logger.info(f"Using the REST client against {credentials['url']}")
+        return WatsonxHTTPModel(
+            url=credentials["url"],
+            model_id=model_id.value,
+            params=parameters,
+            project_id=project_id,
+            api_key=api_key,
+            token=credentials["token"],
+        )
+
     try:
         llm_model = Model(
             model_id=model_id,
@@ -152,8 +325,72 @@ def _initialize_watsonx_model() -> Model:
         raise
 
 
-# Initialize the model at module load time
-llm_model = _initialize_watsonx_model()
+# The model is created on first use so that importing the package does not
+# require credentials or network access
+llm_model: Optional[Any] = None
+_llm_model_lock = threading.Lock()
+
+# Rate limiting, retries, deadlines and circuit breaking for model calls
+llm_caller = ResilientCaller.from_env()
+
+# Prompt size estimates and per-request output caps
+token_budget = TokenBudget.from_env()
+
+
+def get_llm_model() -> Any:
+    """
+    Return the shared WatsonX model, initializing it on first use.
+
+    Returns:
+        Model: Configured WatsonX foundation model instance.
+
+    Raises:
+        ValueError: If required environment variables are not set.
+        Exception: If model initialization fails.
+    """
+    global llm_model
+    if llm_model is None:
+        with _llm_model_lock:
+            if llm_model is None:
+                llm_model = _initialize_watsonx_model()
+    return llm_model
+
+
+def _model_token_count(text: str) -> int:
+    """Count tokens with the model's tokenizer (used when ``LLM_TOKENIZER=model``)."""
+    response = get_llm_model().tokenize(text)
+    if isinstance(response, dict):
+        return int(response["result"]["token_count"])
+    return int(response)
+
+
+if os.getenv("LLM_TOKENIZER", "heuristic").lower() == "model":
+    token_budget.counter.tokenize = _model_token_count
+
+
+def _record_token_usage(
+    generation: Dict[str, Any], prompt: str = "", max_new_tokens: int = 0
+) -> None:
+    """
+    Record prompt and completion token counts reported by the model.
+
+    Args:
+        generation: A single entry of the ``results`` list returned by WatsonX.
+        prompt: The prompt that was sent, used to calibrate the token estimate.
+        max_new_tokens: Output cap of the request, for logging.
+    """
+    input_tokens = generation.get("input_token_count")
+    generated_tokens = generation.get("generated_token_count")
+    if isinstance(input_tokens, int):
+        LLM_PROMPT_TOKENS.observe(input_tokens)
+        if prompt:
+            token_budget.counter.calibrate(prompt, input_tokens)
+    if isinstance(generated_tokens, int):
+        LLM_COMPLETION_TOKENS.observe(generated_tokens)
+    logger.info(
+        f"Token usage: prompt={input_tokens}, completion={generated_tokens}"
+        f"/{max_new_tokens or '-'} ({generation.get('stop_reason', 'unknown')})"
+    )
 
 
 def generate_code(
@@ -176,6 +413,7 @@ def generate_code(
         str: The generated fixed code as a string.
 
     Raises:
+        PromptTooLargeError: If the request does not fit the token budget.
         Exception: If code generation fails or the model returns an error.
 
     Example:
@@ -211,25 +449,54 @@ The following is input code: {code}.
 
     code_prompts = [inst_prompt]
 
+    prompt_tokens, max_new_tokens = token_budget.plan(inst_prompt, code)
+    LLM_PLANNED_NEW_TOKENS.observe(max_new_tokens)
+    logger.info(f"Prompt of ~{prompt_tokens} tokens, output capped at {max_new_tokens} tokens")
+    params = {**GENERATION_PARAMETERS, GenParams.MAX_NEW_TOKENS: max_new_tokens}
+
+    start = time.perf_counter()
+    outcome = "error"
+    def generate_live() -> Any:
+        generate = functools.partial(get_llm_model().generate, params=params)
+        return llm_caller.call(generate, code_prompts)
+
     try:
-        logger.info("Sending prompt to WatsonX model")
-        result = llm_model.generate(code_prompts)
+        cassette = get_cassette()
+        if cassette is not None and cassette.mode == REPLAY:
+            logger.info("Answering prompt from the model cassette")
+        else:
+            logger.info("Sending prompt to WatsonX model")
+        if cassette is not None:
+            result = cassette.play(inst_prompt, params, generate_live)
+        else:
+            result = generate_live()
+        outcome = "success"
 
         generated_code = ""
         for item in result:
-            generated_code += item["results"][0]["generated_text"]
+            generation = item["results"][0]
+            generated_code += generation["generated_text"]
+            _record_token_usage(generation, inst_prompt, max_new_tokens)
 
         logger.info("Code generation completed successfully")
         logger.debug(f"Generated code length: {len(generated_code)} characters")
 
         return generated_code.strip()
 
+    except CancelledError:
+        outcome = "cancelled"
+        logger.info("Code generation cancelled")
+        raise
+
     except Exception as e:
         logger.error(f"Error during code generation: {e}")
         raise Exception(f"Failed to generate code: {e}") from e
 
+    finally:
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+
 
-def get_chatbot_suggestion(error: str, code: str) -> str:
+def get_chatbot_suggestion(error: str, code: str, language: str = "Python") -> str:
     """
     Get code fix suggestion from the chatbot.
 
@@ -239,9 +506,15 @@ def get_chatbot_suggestion(error: str, code: str) -> str:
     Args:
         error: The error message encountered during code execution.
         code: The code snippet that produced the error.
+        language: Programming language of the code (default: "Python").
 
     Returns:
-        str: Suggested fixed code.
+        str: Suggested fixed code. If the code is too large for one request,
+        only the top-level block the error points at is sent and its fix is
+        spliced back into the code.
+
+    Raises:
+        PromptTooLargeError: If the code is too large and cannot be split.
 
     Example:
         >>> error = "NameError: name 'x' is not defined"
@@ -249,4 +522,18 @@ def get_chatbot_suggestion(error: str, code: str) -> str:
         >>> suggestion = get_chatbot_suggestion(error, code)
     """
     logger.info("Getting chatbot suggestion for code fix")
-    return generate_code(code=code, language="Python", message_error=error)
+    try:
+        return generate_code(code=code, language=language, message_error=error)
+    except PromptTooLargeError as e:
+        span = split_for_error(code, error)
+        if span is None:
+            LLM_OVERSIZED_REQUESTS.inc(action="rejected")
+            raise
+        logger.warning(f"{e}; sending only lines {span[0] + 1}-{span[1]}")
+
+    # Fix only the part of the code the error points at and splice it back
+    LLM_OVERSIZED_REQUESTS.inc(action="split")
+    start, end = span
+    lines = code.splitlines(keepends=True)
+    part = generate_code(code="".join(lines[start:end]), language=language, message_error=error)
+    return "".join(lines[:start]) + part.rstrip("\n") + "\n" + "".join(lines[end:])
@@ -0,0 +1,399 @@
+"""
+Remote sandbox workers.
+
+This module lets code run on other hosts than the Streamlit server. A worker
+daemon (``python -m autodebugger.workers --listen ...``) executes code with the
+local runners of :mod:`autodebugger.runners`, and a :class:`WorkerPool` client
+spreads runs across workers by free capacity, checks their health and retries
+on another worker when one is down or busy.
+
+Requests and responses are single JSON lines over a TCP or Unix socket::
+
+    {"op": "run", "language": "python", "code": "print(1)", "timeout": 30}
+    {"success": true, "output": "1\\n"}
+
+Set ``SANDBOX_WORKERS`` to a comma-separated list of worker addresses
+(``host:port``, ``tcp://host:port`` or ``unix:///path``) to send every run to
+the workers instead of local subprocesses. Workers run arbitrary code, so bind
+them to a private network and set the same ``SANDBOX_WORKER_TOKEN`` on both ends.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import argparse
+import hmac
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from autodebugger.metrics import WORKER_REQUESTS
+from autodebugger.runners import RUNNERS
+from autodebugger.sandbox import DEFAULT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+NO_WORKER = "No sandbox worker available"
+
+# Time allowed on top of the run timeout for the connection and the process start
+_NETWORK_MARGIN = 5.0
+
+
+class WorkerError(Exception):
+    """Raised when a worker cannot be reached or answers with an error."""
+
+
+class WorkerBusyError(WorkerError):
+    """Raised when a worker has no free capacity."""
+
+
+def parse_address(address: str) -> Address:
+    """
+    Parse a worker address.
+
+    Args:
+        address: ``unix:///path/to/socket``, ``tcp://host:port`` or ``host:port``.
+
+    Returns:
+        Address: A socket path, or a ``(host, port)`` tuple.
+
+    Raises:
+        ValueError: If the address has no port.
+    """
+    if address.startswith("unix://"):
+        return address[len("unix://") :]
+    host, _, port = address.removeprefix("tcp://").rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid worker address {address!r}")
+    return host, int(port)
+
+
+def _connect(address: Address, timeout: float) -> socket.socket:
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    return socket.create_connection(address, timeout=timeout)
+
+
+def request(address: Address, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """
+    Send one request to a worker and return its response.
+
+    Args:
+        address: Worker address from :func:`parse_address`.
+        message: The request.
+        timeout: Seconds allowed for the whole exchange.
+
+    Returns:
+        Dict[str, Any]: The response.
+
+    Raises:
+        WorkerBusyError: If the worker has no free capacity.
+        WorkerError: If the worker cannot be reached or reports an error.
+    """
+    token = os.getenv("SANDBOX_WORKER_TOKEN")
+    if token:
+        message = {**message, "token": token}
+    try:
+        with _connect(address, timeout) as sock:
+            sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+    except OSError as e:
+        raise WorkerError(f"Worker {address} unreachable: {e}") from e
+    if not line:
+        raise WorkerError(f"Worker {address} closed the connection")
+    response = json.loads(line)
+    if response.get("error") == "busy":
+        raise WorkerBusyError(f"Worker {address} is busy")
+    if "error" in response:
+        raise WorkerError(f"Worker {address}: {response['error']}")
+    return response
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serve the JSON-lines requests of one connection."""
+
+    server: "_WorkerServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.server.worker.handle(json.loads(line))
+            except (ValueError, TypeError, KeyError) as e:
+                response = {"error": f"bad request: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _WorkerServer(socketserver.ThreadingMixIn, socketserver.BaseServer):
+    daemon_threads = True
+    worker: "SandboxWorker"
+
+
+class _TCPWorkerServer(_WorkerServer, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class _UnixWorkerServer(_WorkerServer, socketserver.UnixStreamServer):
+    pass
+
+
+class SandboxWorker:
+    """
+    Worker daemon executing code with the local runners.
+
+    Args:
+        address: Address to listen on (see :func:`parse_address`).
+        capacity: Runs executed at the same time; further runs are refused as busy.
+        token: Shared secret clients must send (default: ``SANDBOX_WORKER_TOKEN``).
+    """
+
+    def __init__(self, address: str, capacity: int = 1, token: Optional[str] = None) -> None:
+        self.address = parse_address(address)
+        self.capacity = capacity
+        self.token = token if token is not None else os.getenv("SANDBOX_WORKER_TOKEN", "")
+        self.active = 0
+        self._lock = threading.Lock()
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            self.server: _WorkerServer = _UnixWorkerServer(self.address, _Handler)
+        else:
+            self.server = _TCPWorkerServer(self.address, _Handler)
+        self.server.worker = self
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer one request.
+
+        Args:
+            message: A ``run`` or ``health`` request.
+
+        Returns:
+            Dict[str, Any]: The response.
+        """
+        if self.token and not hmac.compare_digest(str(message.get("token", "")), self.token):
+            return {"error": "unauthorized"}
+        if message["op"] == "health":
+            return {"ok": True, "capacity": self.capacity, "active": self.active}
+        if message["op"] != "run":
+            return {"error": f"unknown op {message['op']!r}"}
+
+        language = message.get("language", "python")
+        if language not in RUNNERS:
+            return {"error": f"no runner for {language}"}
+        with self._lock:
+            if self.active >= self.capacity:
+                return {"error": "busy"}
+            self.active += 1
+        try:
+            success, output = RUNNERS[language](
+                message["code"], float(message.get("timeout", DEFAULT_TIMEOUT))
+            )
+        finally:
+            with self._lock:
+                self.active -= 1
+        return {"success": success, "output": output}
+
+    def serve_forever(self) -> None:
+        """Serve requests until :meth:`shutdown` is called."""
+        logger.info(f"Sandbox worker listening on {self.address} (capacity {self.capacity})")
+        self.server.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stop serving and close the socket."""
+        self.server.shutdown()
+        self.server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+@dataclass
+class _WorkerState:
+    address: Address
+    capacity: int = 1
+    active: int = 0
+    in_flight: int = 0
+    healthy: bool = True
+    checked_at: float = 0.0
+
+    @property
+    def free(self) -> int:
+        return self.capacity - max(self.active, self.in_flight)
+
+
+class WorkerPool:
+    """
+    Client spreading runs across sandbox workers.
+
+    Args:
+        addresses: Worker addresses (see :func:`parse_address`).
+        max_retries: Further workers tried when one is down or busy.
+        health_interval: Seconds between health checks of a worker; a worker
+            that failed is skipped until it passes a check again.
+        check_timeout: Seconds allowed for a health check.
+    """
+
+    def __init__(
+        self,
+        addresses: List[str],
+        max_retries: int = 2,
+        health_interval: float = 5.0,
+        check_timeout: float = 2.0,
+    ) -> None:
+        if not addresses:
+            raise ValueError("WorkerPool needs at least one worker address")
+        self.workers = [_WorkerState(parse_address(address)) for address in addresses]
+        self.max_retries = max_retries
+        self.health_interval = health_interval
+        self.check_timeout = check_timeout
+        self._lock = threading.Lock()
+
+    def check(self, worker: _WorkerState) -> bool:
+        """
+        Refresh the health and load of a worker.
+
+        Args:
+            worker: The worker to check.
+
+        Returns:
+            bool: Whether the worker is healthy.
+        """
+        try:
+            status = request(worker.address, {"op": "health"}, self.check_timeout)
+            healthy, capacity, active = True, int(status["capacity"]), int(status["active"])
+        except (WorkerError, ValueError, KeyError) as e:
+            logger.warning(f"Sandbox worker {worker.address} failed its health check: {e}")
+            healthy, capacity, active = False, worker.capacity, worker.active
+        with self._lock:
+            worker.healthy, worker.capacity, worker.active = healthy, capacity, active
+            worker.checked_at = time.monotonic()
+        return healthy
+
+    def _pick(self, exclude: List[_WorkerState]) -> Optional[_WorkerState]:
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker not in exclude and now - worker.checked_at >= self.health_interval:
+                self.check(worker)
+        with self._lock:
+            candidates = [w for w in self.workers if w.healthy and w not in exclude]
+            if not candidates:
+                return None
+            worker = max(candidates, key=lambda w: w.free)
+            worker.in_flight += 1
+            return worker
+
+    def run(
+        self, code: str, timeout: float = DEFAULT_TIMEOUT, language: str = "python"
+    ) -> Tuple[bool, str]:
+        """
+        Run code on the least loaded healthy worker.
+
+        Args:
+            code: Code to execute.
+            timeout: Seconds the program may run.
+            language: Runner to use on the worker.
+
+        Returns:
+            Tuple[bool, str]: Success and output (or error) of the program, or
+            False and an explanation if no worker could run it.
+        """
+        tried: List[_WorkerState] = []
+        for _ in range(self.max_retries + 1):
+            worker = self._pick(tried)
+            if worker is None:
+                break
+            tried.append(worker)
+            message = {"op": "run", "language": language, "code": code, "timeout": timeout}
+            try:
+                response = request(worker.address, message, timeout + _NETWORK_MARGIN)
+            except WorkerBusyError:
+                WORKER_REQUESTS.inc(result="busy")
+                logger.info(f"Sandbox worker {worker.address} busy, trying another")
+                continue
+            except WorkerError as e:
+                WORKER_REQUESTS.inc(result="error")
+                logger.warning(f"{e}; trying another worker")
+                with self._lock:
+                    worker.healthy = False
+                    worker.checked_at = time.monotonic()
+                continue
+            finally:
+                with self._lock:
+                    worker.in_flight -= 1
+            WORKER_REQUESTS.inc(result="ok")
+            return bool(response["success"]), str(response["output"])
+        logger.error(f"{NO_WORKER} after trying {len(tried)} workers")
+        return False, f"{NO_WORKER} (tried {len(tried)} of {len(self.workers)})"
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> Optional[WorkerPool]:
+    """
+    Return the worker pool configured by ``SANDBOX_WORKERS``.
+
+    Returns:
+        Optional[WorkerPool]: The shared pool, or None if runs are local.
+    """
+    global _pool
+    addresses = [part.strip() for part in os.getenv("SANDBOX_WORKERS", "").split(",")]
+    addresses = [address for address in addresses if address]
+    if not addresses:
+        return None
+    with _pool_lock:
+        if _pool is None or [w.address for w in _pool.workers] != [
+            parse_address(address) for address in addresses
+        ]:
+            _pool = WorkerPool(addresses)
+        return _pool
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point of the worker daemon.
+
+    Args:
+        argv: Command-line arguments (default: ``sys.argv[1:]``).
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(description="Run a sandbox worker.")
+    parser.add_argument(
+        "--listen", default="127.0.0.1:7070", help="host:port or unix:///path to listen on"
+    )
+    parser.add_argument("--capacity", type=int, default=os.cpu_count() or 1, help="Parallel runs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    worker = SandboxWorker(args.listen, args.capacity)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
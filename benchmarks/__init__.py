@@ -0,0 +1,6 @@
+"""
+Benchmarks for Auto Error Debugger Assistant.
+
+This package contains a corpus of buggy snippets, a deterministic fake model
+and a harness measuring the debugging pipeline end to end.
+"""
@@ -0,0 +1,175 @@
+"""
+Corpus of categorized buggy snippets with known fixes.
+
+Every snippet carries the sequence of fixes a scripted model returns for it,
+so a benchmark run always takes the same path through the pipeline. Snippets
+with more than one fix need several attempts: every fix but the last is
+still broken.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CATEGORIES: Tuple[str, ...] = ("syntax", "name", "type", "logic", "timeout")
+
+
+@dataclass(frozen=True)
+class BuggySnippet:
+    """
+    A buggy program and the fixes the fake model returns for it.
+
+    Attributes:
+        name: Unique snippet name.
+        category: One of :data:`CATEGORIES`.
+        code: The buggy program.
+        fixes: Successive model answers; the last one is correct.
+    """
+
+    name: str
+    category: str
+    code: str
+    fixes: Tuple[str, ...]
+
+    @property
+    def expected_attempts(self) -> int:
+        """Number of attempts the pipeline needs to fix this snippet."""
+        return len(self.fixes)
+
+
+CORPUS: Tuple[BuggySnippet, ...] = (
+    BuggySnippet(
+        name="unclosed_paren",
+        category="syntax",
+        code="print('Hello, World!'\n",
+        fixes=("print('Hello, World!')\n",),
+    ),
+    BuggySnippet(
+        name="missing_colon",
+        category="syntax",
+        code="for i in range(3)\n    print(i)\n",
+        fixes=("for i in range(3):\n    print(i)\n",),
+    ),
+    BuggySnippet(
+        name="celsius_operator",
+        category="syntax",
+        code=(
+            "celsius = 37.5\n"
+            "fahrenheit = (celsius x 1.8) + 32\n"
+            "print('%0.1f C = %0.1f F' % (celsius, fahrenheit))\n"
+        ),
+        fixes=(
+            "celsius = 37.5\n"
+            "fahrenheit = (celsius * 1.8) + 32\n"
+            "print('%0.1f C = %0.1f F' % (celsius, fahrenheit))\n",
+        ),
+    ),
+    BuggySnippet(
+        name="undefined_variable",
+        category="name",
+        code="x = 10\nprint(x + y)\n",
+        fixes=("x = 10\ny = 5\nprint(x + y)\n",),
+    ),
+    BuggySnippet(
+        name="misspelled_builtin",
+        category="name",
+        code="pritn('typo')\n",
+        fixes=("print('typo')\n",),
+    ),
+    BuggySnippet(
+        name="missing_import",
+        category="name",
+        code="print(math.sqrt(16))\n",
+        fixes=("import math\nprint(math.sqrt(16))\n",),
+    ),
+    BuggySnippet(
+        name="str_plus_int",
+        category="type",
+        code="age = 30\nprint('Age: ' + age)\n",
+        fixes=("age = 30\nprint('Age: ' + str(age))\n",),
+    ),
+    BuggySnippet(
+        name="len_of_int",
+        category="type",
+        code="digits = 12345\nprint(len(digits))\n",
+        fixes=(
+            "digits = 12345\nprint(len(digits + 0))\n",
+            "digits = 12345\nprint(len(str(digits)))\n",
+        ),
+    ),
+    BuggySnippet(
+        name="off_by_one_sum",
+        category="logic",
+        code="total = sum(range(1, 10))\nassert total == 55, total\nprint(total)\n",
+        fixes=("total = sum(range(1, 11))\nassert total == 55, total\nprint(total)\n",),
+    ),
+    BuggySnippet(
+        name="wrong_average",
+        category="logic",
+        code=(
+            "values = [2, 4, 6]\n"
+            "average = sum(values) / len(values) + 1\n"
+            "assert average == 4, average\n"
+            "print(average)\n"
+        ),
+        fixes=(
+            "values = [2, 4, 6]\n"
+            "average = sum(values) / (len(values) + 1)\n"
+            "assert average == 4, average\n"
+            "print(average)\n",
+            "values = [2, 4, 6]\n"
+            "average = sum(values) / len(values)\n"
+            "assert average == 4, average\n"
+            "print(average)\n",
+        ),
+    ),
+    BuggySnippet(
+        name="missing_increment",
+        category="timeout",
+        code="total = 0\ni = 0\nwhile i < 5:\n    total += i\nprint(total)\n",
+        fixes=("total = 0\ni = 0\nwhile i < 5:\n    total += i\n    i += 1\nprint(total)\n",),
+    ),
+)
+
+
+def select(categories: Optional[Sequence[str]] = None) -> List[BuggySnippet]:
+    """
+    Return the snippets belonging to the given categories.
+
+    Args:
+        categories: Categories to keep (default: all).
+
+    Returns:
+        List[BuggySnippet]: Matching snippets in corpus order.
+
+    Raises:
+        ValueError: If an unknown category is requested.
+    """
+    if not categories:
+        return list(CORPUS)
+    unknown = set(categories) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown categories: {sorted(unknown)}")
+    return [snippet for snippet in CORPUS if snippet.category in categories]
+
+
+def fix_script(snippets: Sequence[BuggySnippet]) -> Dict[str, str]:
+    """
+    Build the ``broken code -> answer`` script for the fake model.
+
+    Args:
+        snippets: Snippets the model should know about.
+
+    Returns:
+        Dict[str, str]: Mapping from each code version to the next fix. Keys and
+        values are stripped, matching what ``generate_code`` returns.
+    """
+    script: Dict[str, str] = {}
+    for snippet in snippets:
+        current = snippet.code.strip()
+        for fix in snippet.fixes:
+            script[current] = fix.strip()
+            current = fix.strip()
+    return script
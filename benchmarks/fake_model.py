@@ -0,0 +1,96 @@
+"""
+Deterministic stand-in for the WatsonX model.
+
+:class:`FakeModel` implements the ``generate`` method used by
+:func:`autodebugger.utils.generate_code` and answers from a fixed script after
+a configurable latency, so the real prompt building, response parsing and
+metrics code paths run without network access.
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping
+
+from autodebugger import utils
+
+
+class FakeModel:
+    """
+    A scripted model returning known fixes.
+
+    The answer for a prompt is the script entry whose key is the longest code
+    string contained in the prompt. Prompts without a match are answered with
+    an empty string, which the pipeline treats like any other broken fix.
+
+    Args:
+        script: Mapping from broken code to the fix to return.
+        latency: Seconds to sleep before answering each prompt.
+    """
+
+    def __init__(self, script: Mapping[str, str], latency: float = 0.0) -> None:
+        self.script = dict(script)
+        self.latency = latency
+        self.calls = 0
+        self._keys = sorted(self.script, key=len, reverse=True)
+        self._lock = threading.Lock()
+
+    def answer(self, prompt: str) -> str:
+        """Return the scripted answer for a prompt."""
+        for key in self._keys:
+            if key in prompt:
+                return self.script[key]
+        return ""
+
+    def generate(self, prompts: List[str], **_: Any) -> List[Dict[str, Any]]:
+        """
+        Answer prompts in the WatsonX response format.
+
+        Args:
+            prompts: Prompts to answer.
+
+        Returns:
+            List[Dict[str, Any]]: One ``{"results": [...]}`` entry per prompt.
+        """
+        with self._lock:
+            self.calls += len(prompts)
+        if self.latency:
+            time.sleep(self.latency)
+        responses = []
+        for prompt in prompts:
+            text = self.answer(prompt)
+            responses.append(
+                {
+                    "results": [
+                        {
+                            "generated_text": text,
+                            "input_token_count": max(1, len(prompt) // 4),
+                            "generated_token_count": max(1, len(text) // 4),
+                            "stop_reason": "eos_token",
+                        }
+                    ]
+                }
+            )
+        return responses
+
+
+@contextmanager
+def installed(model: Any) -> Iterator[Any]:
+    """
+    Temporarily use ``model`` as the shared model in :mod:`autodebugger.utils`.
+
+    Args:
+        model: Object implementing ``generate(prompts)``.
+
+    Yields:
+        The installed model.
+    """
+    previous = utils.llm_model
+    utils.llm_model = model
+    try:
+        yield model
+    finally:
+        utils.llm_model = previous
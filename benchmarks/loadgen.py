@@ -0,0 +1,302 @@
+"""
+Concurrent-user load generator for the debugging pipeline.
+
+Simulated users run debugging sessions back to back through the headless
+:func:`run_debug_session` loop, with a stub model answering from the benchmark
+corpus. Sessions are served by a bounded worker pool standing in for one
+application instance, so the time a session waits for a worker is reported as
+queueing delay. Concurrency is ramped up level by level, and the report shows
+throughput and tail latency per level, together with the saturation point.
+
+Usage:
+    python -m benchmarks.loadgen --levels 1 2 4 8 16 --duration 10
+    python -m benchmarks.loadgen --provider mock --latency 0.5 --rate-limit 8
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from typing import Any, List, Optional, Sequence
+
+from autodebugger.pipeline import run_debug_session
+from autodebugger.utils import WatsonxHTTPModel, get_chatbot_suggestion
+from benchmarks.corpus import CATEGORIES, BuggySnippet, fix_script, select
+from benchmarks.fake_model import FakeModel, installed
+from benchmarks.mock_watsonx import MockConfig, start_mock_server
+from benchmarks.run_benchmarks import percentile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORIES = ("syntax", "name", "type", "logic")
+
+
+@dataclass
+class LevelResult:
+    """
+    Measurements for one concurrency level.
+
+    Attributes:
+        concurrency: Number of simulated users.
+        sessions: Completed sessions.
+        errors: Sessions that raised an exception.
+        throughput: Completed sessions per second.
+        fix_rate: Fraction of sessions that ended with working code.
+        latency_p50 / latency_p95 / latency_p99: Session latency (queueing included).
+        queue_p50 / queue_p95 / queue_p99: Time spent waiting for a worker.
+    """
+
+    concurrency: int
+    sessions: int
+    errors: int
+    throughput: float
+    fix_rate: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    queue_p50: float
+    queue_p95: float
+    queue_p99: float
+
+
+def run_level(
+    concurrency: int,
+    duration: float,
+    workers: int,
+    snippets: Sequence[BuggySnippet],
+    max_attempts: int,
+    think_time: float,
+) -> LevelResult:
+    """
+    Drive ``concurrency`` simulated users for ``duration`` seconds.
+
+    Args:
+        concurrency: Number of simulated users.
+        duration: Seconds during which users start new sessions.
+        workers: Size of the worker pool serving sessions (the app instance).
+        snippets: Snippets the users submit, round robin.
+        max_attempts: Attempt limit per session.
+        think_time: Pause between a user's sessions in seconds.
+
+    Returns:
+        LevelResult: Measurements for this level.
+    """
+    latencies: List[float] = []
+    queue_delays: List[float] = []
+    outcomes: List[bool] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = itertools.count()
+
+    def session(snippet: BuggySnippet, submitted: float) -> bool:
+        started = time.perf_counter()
+        with lock:
+            queue_delays.append(started - submitted)
+        result = run_debug_session(snippet.code, max_attempts, suggest=get_chatbot_suggestion)
+        return result.success
+
+    def user(pool: ThreadPoolExecutor, deadline: float) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            snippet = snippets[next(counter) % len(snippets)]
+            submitted = time.perf_counter()
+            try:
+                success = pool.submit(session, snippet, submitted).result()
+            except Exception as e:
+                logger.warning(f"Session failed with {e}")
+                with lock:
+                    errors += 1
+            else:
+                with lock:
+                    latencies.append(time.perf_counter() - submitted)
+                    outcomes.append(success)
+            if think_time:
+                time.sleep(think_time)
+
+    started = time.perf_counter()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="app") as pool:
+        users = [
+            threading.Thread(target=user, args=(pool, deadline), name=f"user-{index}")
+            for index in range(concurrency)
+        ]
+        for thread in users:
+            thread.start()
+        for thread in users:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    return LevelResult(
+        concurrency=concurrency,
+        sessions=len(latencies),
+        errors=errors,
+        throughput=len(latencies) / elapsed if elapsed else 0.0,
+        fix_rate=sum(outcomes) / len(outcomes) if outcomes else 0.0,
+        latency_p50=percentile(latencies, 50),
+        latency_p95=percentile(latencies, 95),
+        latency_p99=percentile(latencies, 99),
+        queue_p50=percentile(queue_delays, 50),
+        queue_p95=percentile(queue_delays, 95),
+        queue_p99=percentile(queue_delays, 99),
+    )
+
+
+def find_saturation(
+    levels: Sequence[LevelResult], min_gain: float = 0.1, max_slowdown: float = 2.0
+) -> Optional[LevelResult]:
+    """
+    Return the last level before the pipeline saturates.
+
+    A level is saturated when throughput grows by less than ``min_gain``
+    relative to the previous level, or when p95 latency exceeds
+    ``max_slowdown`` times the p95 of the first level.
+
+    Args:
+        levels: Results in increasing concurrency order.
+        min_gain: Minimum relative throughput gain per level.
+        max_slowdown: Maximum tolerated p95 latency growth.
+
+    Returns:
+        Optional[LevelResult]: The saturation point, or None if the ramp never
+        saturated.
+    """
+    if not levels:
+        return None
+    reference_p95 = levels[0].latency_p95
+    for previous, current in zip(levels, levels[1:]):
+        if not previous.throughput:
+            return previous
+        gain = (current.throughput - previous.throughput) / previous.throughput
+        slowdown = current.latency_p95 / reference_p95 if reference_p95 else 1.0
+        if gain < min_gain or slowdown > max_slowdown:
+            return previous
+    return None
+
+
+def print_report(levels: Sequence[LevelResult], saturation: Optional[LevelResult]) -> None:
+    """Print one line per level and the saturation point."""
+    print(
+        f"{'users':>5} {'sessions':>8} {'err':>4} {'sess/s':>8} {'fixed':>6} "
+        f"{'p50':>7} {'p95':>7} {'p99':>7} {'q50':>7} {'q95':>7} {'q99':>7}"
+    )
+    for level in levels:
+        print(
+            f"{level.concurrency:>5} {level.sessions:>8} {level.errors:>4} "
+            f"{level.throughput:>8.2f} {level.fix_rate:>6.0%} "
+            f"{level.latency_p50:>7.3f} {level.latency_p95:>7.3f} {level.latency_p99:>7.3f} "
+            f"{level.queue_p50:>7.3f} {level.queue_p95:>7.3f} {level.queue_p99:>7.3f}"
+        )
+    if saturation is None:
+        print("No saturation point reached; increase --levels.")
+    else:
+        print(
+            f"Saturation at ~{saturation.concurrency} concurrent users "
+            f"({saturation.throughput:.2f} sessions/s, p95 {saturation.latency_p95:.3f}s)"
+        )
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Concurrent-user load generator")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument(
+        "--workers", type=int, help="sessions served in parallel (default: one per user)"
+    )
+    parser.add_argument("--think-time", type=float, default=0.0, help="pause between sessions")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument(
+        "--categories", nargs="*", choices=CATEGORIES, default=list(DEFAULT_CATEGORIES)
+    )
+    parser.add_argument(
+        "--provider",
+        choices=("fake", "mock"),
+        default="fake",
+        help="in-process fake model, or the REST client against the local mock server",
+    )
+    parser.add_argument("--latency", type=float, default=0.2, help="model latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mock: max extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock: 5xx probability")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="mock: requests/s")
+    parser.add_argument("--burst", type=int, default=1, help="mock: throttling burst")
+    parser.add_argument("--output", help="write per-level results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def _provider(args: argparse.Namespace, stack: ExitStack, snippets: Sequence[BuggySnippet]) -> Any:
+    """Create the model the sessions talk to."""
+    if args.provider == "fake":
+        return FakeModel(fix_script(snippets), latency=args.latency)
+
+    config = MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    server = start_mock_server(config)
+    stack.callback(server.shutdown)
+    url = f"http://127.0.0.1:{server.server_port}"
+    os.environ["IBM_IAM_URL"] = f"{url}/identity/token"
+    return WatsonxHTTPModel(
+        url=url,
+        model_id="meta-llama/llama-2-70b-chat",
+        params={"decoding_method": "greedy", "max_new_tokens": 1000},
+        project_id="load-test",
+        api_key="load-test",
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the ramp and print the report."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    logging.getLogger("autodebugger").setLevel(logging.CRITICAL)
+
+    snippets = select(args.categories)
+    results: List[LevelResult] = []
+    with ExitStack() as stack:
+        stack.enter_context(installed(_provider(args, stack, snippets)))
+        for concurrency in sorted(args.levels):
+            logger.info(f"Running {concurrency} concurrent users for {args.duration}s")
+            results.append(
+                run_level(
+                    concurrency,
+                    args.duration,
+                    args.workers or concurrency,
+                    snippets,
+                    args.max_attempts,
+                    args.think_time,
+                )
+            )
+
+    saturation = find_saturation(results)
+    print_report(results, saturation)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "levels": [asdict(level) for level in results],
+                    "saturation": saturation.concurrency if saturation else None,
+                },
+                handle,
+                indent=2,
+            )
+            handle.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+Local stand-in for IBM Cloud IAM and the WatsonX text generation API.
+
+The server implements the IAM API-key token exchange and the WatsonX
+``/ml/v1/text/generation`` and ``/ml/v1/text/tokenization`` endpoints with
+configurable latency, error rate and throttling, so the real HTTP client path can be load-tested on a laptop.
+Generated text comes from the scripted :class:`~benchmarks.fake_model.FakeModel`
+answering the benchmark corpus.
+
+Usage:
+    python -m benchmarks.mock_watsonx --port 8080 --latency 0.5 --rate-limit 8
+
+    # in another shell
+    export IBM_IAM_URL=http://127.0.0.1:8080/identity/token
+    export WATSONX_URL=http://127.0.0.1:8080
+    export WATSONX_CLIENT=http
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import argparse
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.corpus import CORPUS, fix_script
+from benchmarks.fake_model import FakeModel
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATHS = ("/identity/token", "/oidc/token")
+GENERATION_PATHS = ("/ml/v1/text/generation", "/ml/v1-beta/generation/text")
+TOKENIZATION_PATHS = ("/ml/v1/text/tokenization",)
+MODEL_SPECS_PATHS = ("/ml/v1/foundation_model_specs", "/ml/v1-beta/foundation_model_specs")
+
+
+@dataclass
+class MockConfig:
+    """
+    Behaviour of the mock server.
+
+    Attributes:
+        latency: Base latency of a generation request in seconds.
+        per_token_latency: Additional seconds per generated token.
+        jitter: Upper bound of uniformly distributed extra latency in seconds.
+        token_latency: Latency of the IAM token exchange in seconds.
+        error_rate: Probability of answering a generation request with a 5xx error.
+        rate_limit: Sustained generation requests per second (0 disables throttling).
+        burst: Token bucket capacity for throttling.
+        api_key: If set, only this API key is accepted by the IAM endpoint.
+        token_ttl: Lifetime of issued bearer tokens in seconds.
+        seed: Random seed for reproducible errors and jitter.
+    """
+
+    latency: float = 0.0
+    per_token_latency: float = 0.0
+    jitter: float = 0.0
+    token_latency: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: float = 0.0
+    burst: int = 1
+    api_key: Optional[str] = None
+    token_ttl: int = 3600
+    seed: Optional[int] = None
+
+
+class MockState:
+    """Shared state of a mock server: tokens, throttling bucket and counters."""
+
+    def __init__(self, config: MockConfig) -> None:
+        self.config = config
+        self.model = FakeModel(fix_script(CORPUS))
+        self.random = random.Random(config.seed)
+        self.tokens: Dict[str, float] = {}
+        self.stats: Dict[str, int] = {
+            "token_requests": 0,
+            "generation_requests": 0,
+            "tokenization_requests": 0,
+            "throttled": 0,
+            "errors": 0,
+            "unauthorized": 0,
+        }
+        self._bucket = float(max(config.burst, 1))
+        self._bucket_updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def issue_token(self) -> Tuple[str, int]:
+        token = secrets.token_urlsafe(24)
+        expiration = int(time.time()) + self.config.token_ttl
+        with self._lock:
+            self.tokens[token] = expiration
+        return token, expiration
+
+    def token_valid(self, token: str) -> bool:
+        with self._lock:
+            expiration = self.tokens.get(token)
+        return expiration is not None and expiration > time.time()
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """Take a throttling token; return ``(allowed, retry_after_seconds)``."""
+        rate = self.config.rate_limit
+        if rate <= 0:
+            return True, 0.0
+        with self._lock:
+            now = time.monotonic()
+            capacity = float(max(self.config.burst, 1))
+            self._bucket = min(capacity, self._bucket + (now - self._bucket_updated) * rate)
+            self._bucket_updated = now
+            if self._bucket >= 1:
+                self._bucket -= 1
+                return True, 0.0
+            return False, (1 - self._bucket) / rate
+
+    def roll_error(self) -> bool:
+        with self._lock:
+            return self.random.random() < self.config.error_rate
+
+    def jitter(self) -> float:
+        with self._lock:
+            return self.random.uniform(0, self.config.jitter) if self.config.jitter else 0.0
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the IAM and WatsonX endpoints."""
+
+    server_version = "MockWatsonx/1.0"
+    state: MockState
+
+    def _send_json(
+        self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error_json(
+        self, status: int, code: str, message: str, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        body = {"errors": [{"code": code, "message": message}], "status_code": status}
+        self._send_json(status, body, headers)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self) -> None:  # noqa: N802 - name required by BaseHTTPRequestHandler
+        path = urlsplit(self.path).path
+        if path == "/stats":
+            with self.state._lock:
+                stats = dict(self.state.stats)
+            self._send_json(200, stats)
+        elif path in MODEL_SPECS_PATHS:
+            self._send_json(
+                200,
+                {"total_count": 1, "resources": [{"model_id": "meta-llama/llama-2-70b-chat"}]},
+            )
+        else:
+            self._send_error_json(404, "not_found", f"No route for {path}")
+
+    def do_POST(self) -> None:  # noqa: N802 - name required by BaseHTTPRequestHandler
+        path = urlsplit(self.path).path
+        if path in TOKEN_PATHS:
+            self._handle_token()
+        elif path in GENERATION_PATHS:
+            self._handle_generation()
+        elif path in TOKENIZATION_PATHS:
+            self._handle_tokenization()
+        else:
+            self._send_error_json(404, "not_found", f"No route for {path}")
+
+    def _handle_token(self) -> None:
+        self.state.count("token_requests")
+        form = parse_qs(self._read_body().decode("utf-8"))
+        apikey = (form.get("apikey") or [""])[0]
+        grant_type = (form.get("grant_type") or [""])[0]
+        if self.state.config.token_latency:
+            time.sleep(self.state.config.token_latency)
+        if grant_type != "urn:ibm:params:oauth:grant-type:apikey" or not apikey:
+            self._send_error_json(400, "BXNIM0109E", "Property missing or empty")
+            return
+        if self.state.config.api_key and apikey != self.state.config.api_key:
+            self._send_error_json(400, "BXNIM0415E", "Provided API key could not be found")
+            return
+        token, expiration = self.state.issue_token()
+        self._send_json(
+            200,
+            {
+                "access_token": token,
+                "refresh_token": "not_supported",
+                "token_type": "Bearer",
+                "expires_in": self.state.config.token_ttl,
+                "expiration": expiration,
+                "scope": "ibm openid",
+            },
+        )
+
+    def _handle_generation(self) -> None:
+        state = self.state
+        state.count("generation_requests")
+        body = self._read_body()
+
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer ") or not state.token_valid(
+            authorization[len("Bearer ") :]
+        ):
+            state.count("unauthorized")
+            self._send_error_json(401, "authentication_token_expired", "Invalid bearer token")
+            return
+
+        allowed, retry_after = state.try_acquire()
+        if not allowed:
+            state.count("throttled")
+            self._send_error_json(
+                429,
+                "too_many_requests",
+                "Rate limit exceeded",
+                headers={"Retry-After": f"{retry_after:.3f}"},
+            )
+            return
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self._send_error_json(400, "json_validation_error", "Invalid JSON body")
+            return
+
+        prompt = str(payload.get("input", ""))
+        text = state.model.answer(prompt)
+        stop_reason = "eos_token"
+        max_new_tokens = (payload.get("parameters") or {}).get("max_new_tokens")
+        if isinstance(max_new_tokens, int) and len(text) > max_new_tokens * 4:
+            text, stop_reason = text[: max_new_tokens * 4], "max_tokens"
+        generated_tokens = max(1, len(text) // 4)
+        time.sleep(
+            state.config.latency
+            + state.config.per_token_latency * generated_tokens
+            + state.jitter()
+        )
+
+        if state.roll_error():
+            state.count("errors")
+            status = state.random.choice((500, 503))
+            self._send_error_json(status, "internal_error", "Injected failure")
+            return
+
+        self._send_json(
+            200,
+            {
+                "model_id": payload.get("model_id", ""),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "results": [
+                    {
+                        "generated_text": text,
+                        "generated_token_count": generated_tokens,
+                        "input_token_count": max(1, len(prompt) // 4),
+                        "stop_reason": stop_reason,
+                    }
+                ],
+            },
+        )
+
+    def _handle_tokenization(self) -> None:
+        self.state.count("tokenization_requests")
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer ") or not self.state.token_valid(
+            authorization[len("Bearer ") :]
+        ):
+            self._send_error_json(401, "authentication_token_expired", "Invalid bearer token")
+            return
+        try:
+            payload = json.loads(self._read_body() or b"{}")
+        except json.JSONDecodeError:
+            self._send_error_json(400, "json_validation_error", "Invalid JSON body")
+            return
+        prompt = str(payload.get("input", ""))
+        self._send_json(
+            200,
+            {
+                "model_id": payload.get("model_id", ""),
+                "result": {"token_count": max(1, len(prompt) // 4)},
+            },
+        )
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def start_mock_server(
+    config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0
+) -> ThreadingHTTPServer:
+    """
+    Start a mock server in a background thread.
+
+    Args:
+        config: Server behaviour (default: no latency, errors or throttling).
+        host: Interface to bind.
+        port: TCP port (0 picks a free port).
+
+    Returns:
+        ThreadingHTTPServer: The running server; call ``shutdown()`` to stop it.
+    """
+    state = MockState(config or MockConfig())
+    handler = type("BoundMockHandler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="mock-watsonx", daemon=True)
+    thread.start()
+    logger.info(f"Mock WatsonX listening on http://{host}:{server.server_port}")
+    return server
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local IAM and WatsonX stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="base latency (s)")
+    parser.add_argument("--per-token-latency", type=float, default=0.0, help="s per token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="max extra latency (s)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="IAM latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="5xx probability")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second")
+    parser.add_argument("--burst", type=int, default=1, help="throttling burst size")
+    parser.add_argument("--api-key", help="only accept this API key")
+    parser.add_argument("--seed", type=int, help="random seed")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    config = MockConfig(
+        latency=args.latency,
+        per_token_latency=args.per_token_latency,
+        jitter=args.jitter,
+        token_latency=args.token_latency,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+    server = start_mock_server(config, args.host, args.port)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
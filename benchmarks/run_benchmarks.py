@@ -0,0 +1,291 @@
+"""
+End-to-end benchmark harness for the debugging pipeline.
+
+Runs every snippet of the corpus through :func:`run_debug_session` (the
+headless loop behind ``debug_and_run_code``) with a scripted fake model, times
+``run_code`` on its own, and optionally compares the results with a stored
+baseline.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+
+Author: Ruslan Magana
+Website: ruslanmv.com
+"""
+
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from autodebugger.metrics import REGISTRY, SANDBOX_SPAWN_SECONDS
+from autodebugger.pipeline import run_debug_session
+from autodebugger.sandbox import run_code
+from autodebugger.utils import get_chatbot_suggestion
+from benchmarks.corpus import CATEGORIES, BuggySnippet, fix_script, select
+from benchmarks.fake_model import FakeModel, installed
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Metrics where a larger value is better; everything else is "lower is better"
+HIGHER_IS_BETTER = ("sessions_per_second", "runs_per_second", "fix_rate")
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Compute a percentile with linear interpolation between closest ranks.
+
+    Args:
+        values: Observations.
+        q: Percentile in ``[0, 100]``.
+
+    Returns:
+        float: The percentile, or ``nan`` for no observations.
+    """
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(prefix: str, values: Sequence[float]) -> Dict[str, float]:
+    """Return p50/p95/p99/max of ``values`` under ``prefix``."""
+    return {
+        f"{prefix}.p50_seconds": percentile(values, 50),
+        f"{prefix}.p95_seconds": percentile(values, 95),
+        f"{prefix}.p99_seconds": percentile(values, 99),
+        f"{prefix}.max_seconds": max(values) if values else math.nan,
+    }
+
+
+def timed(func: Callable[..., T], samples: List[float]) -> Callable[..., T]:
+    """Wrap ``func`` so that each call's duration is appended to ``samples``."""
+
+    def wrapper(*args: object) -> T:
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            samples.append(time.perf_counter() - start)
+
+    return wrapper
+
+
+def children_max_rss_mb() -> float:
+    """Peak resident memory of any finished child process in MiB (Linux)."""
+    if resource is None:
+        return math.nan
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def bench_sessions(
+    snippets: Sequence[BuggySnippet],
+    repeat: int,
+    latency: float,
+    max_attempts: int,
+) -> Dict[str, float]:
+    """
+    Benchmark complete debugging sessions over the corpus.
+
+    Args:
+        snippets: Snippets to debug.
+        repeat: Number of passes over the snippets.
+        latency: Fake model latency in seconds.
+        max_attempts: Attempt limit per session.
+
+    Returns:
+        Dict[str, float]: Flat mapping of metric name to value.
+    """
+    model = FakeModel(fix_script(snippets), latency=latency)
+    session_times: List[float] = []
+    run_times: List[float] = []
+    llm_times: List[float] = []
+    attempts: Dict[str, List[int]] = {category: [] for category in CATEGORIES}
+    fixed = 0
+
+    REGISTRY.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with installed(model):
+        for _ in range(repeat):
+            for snippet in snippets:
+                session_start = time.perf_counter()
+                result = run_debug_session(
+                    snippet.code,
+                    max_attempts,
+                    suggest=timed(get_chatbot_suggestion, llm_times),
+                    run=timed(run_code, run_times),
+                )
+                session_times.append(time.perf_counter() - session_start)
+                attempts[snippet.category].append(len(result.attempts))
+                fixed += int(result.success)
+                logger.info(
+                    f"{snippet.name}: success={result.success} attempts={len(result.attempts)}"
+                )
+    elapsed = time.perf_counter() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sessions = len(session_times)
+    results: Dict[str, float] = {
+        "sessions.count": sessions,
+        "sessions.sessions_per_second": sessions / elapsed if elapsed else math.nan,
+        "sessions.fix_rate": fixed / sessions if sessions else math.nan,
+        "sessions.llm_calls": model.calls,
+        "memory.python_peak_mb": peak_bytes / (1024 * 1024),
+        "memory.sandbox_peak_rss_mb": children_max_rss_mb(),
+        "stage.sandbox_spawn.p95_seconds": SANDBOX_SPAWN_SECONDS.quantile(0.95),
+    }
+    results.update(summarize("sessions", session_times))
+    results.update(summarize("stage.sandbox_run", run_times))
+    results.update(summarize("stage.llm", llm_times))
+    for category, counts in attempts.items():
+        if counts:
+            results[f"attempts.{category}.mean"] = sum(counts) / len(counts)
+    return results
+
+
+def bench_run_code(iterations: int) -> Dict[str, float]:
+    """
+    Benchmark ``run_code`` on a trivial program.
+
+    Args:
+        iterations: Number of executions.
+
+    Returns:
+        Dict[str, float]: Flat mapping of metric name to value.
+    """
+    durations: List[float] = []
+    runner = timed(run_code, durations)
+    for _ in range(iterations):
+        runner("pass")
+    total = sum(durations)
+    results = {"run_code.runs_per_second": iterations / total if total else math.nan}
+    results.update(summarize("run_code", durations))
+    return results
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> List[Tuple[str, float, float, float]]:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: Current results.
+        baseline: Stored baseline results.
+        tolerance: Allowed relative slowdown (0.25 = 25%).
+
+    Returns:
+        List[Tuple[str, float, float, float]]: ``(metric, baseline, current, change)``
+        for every metric that regressed beyond the tolerance.
+    """
+    regressions = []
+    for name, old in sorted(baseline.items()):
+        new = results.get(name)
+        if new is None or not old or math.isnan(old) or math.isnan(new):
+            continue
+        change = (new - old) / abs(old)
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        if worse > tolerance:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def print_report(results: Dict[str, float], baseline: Optional[Dict[str, float]]) -> None:
+    """Print results, with the relative change against the baseline if given."""
+    width = max(len(name) for name in results)
+    for name in sorted(results):
+        line = f"{name:<{width}}  {results[name]:12.4f}"
+        if baseline and baseline.get(name):
+            change = (results[name] - baseline[name]) / abs(baseline[name])
+            line += f"  ({change:+.1%} vs baseline)"
+        print(line)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--max-attempts", type=int, default=3, help="attempts per session")
+    parser.add_argument(
+        "--categories",
+        nargs="*",
+        choices=CATEGORIES,
+        help="only run snippets of these categories",
+    )
+    parser.add_argument(
+        "--run-code-iterations", type=int, default=20, help="run_code micro-benchmark size"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with this baseline JSON file")
+    parser.add_argument("--save-baseline", help="store the results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline logs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the benchmarks.
+
+    Returns:
+        int: Exit status, 1 if any metric regressed beyond the tolerance.
+    """
+    args = parse_args(argv)
+    logging.getLogger("autodebugger").setLevel(logging.INFO if args.verbose else logging.CRITICAL)
+
+    results = bench_sessions(select(args.categories), args.repeat, args.latency, args.max_attempts)
+    results.update(bench_run_code(args.run_code_iterations))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)["results"]
+
+    print_report(results, baseline)
+
+    payload = {
+        "config": {
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "max_attempts": args.max_attempts,
+            "categories": args.categories or list(CATEGORIES),
+            "python": sys.version.split()[0],
+        },
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(payload, handle, indent=2, sort_keys=True)
+                handle.write("\n")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.4f} -> {new:.4f} ({change:+.1%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Unit tests for the offline analytics.
+
+Tests for the quantile sketch, the attempt log and the aggregated report.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from autodebugger.analytics import (
+    ATTEMPTS,
+    AttemptLog,
+    QuantileSketch,
+    error_type,
+    main,
+    summarize,
+)
+from autodebugger.pipeline import run_debug_session
+
+
+def _passing(code: str, timeout: float):
+    return ("1" in code, "ok" if "1" in code else "NameError: name 'x' is not defined")
+
+
+def _fill(log: AttemptLog) -> None:
+    """Record two fixed NameError sessions and one failed TypeError session."""
+    for code in ("print(x)", "print(x)\nprint(x)"):
+        run_debug_session(
+            code, 3, suggest=lambda e, c: "print(1)", run=_passing, attempt_log=log, model="m1"
+        )
+    run_debug_session(
+        "len(5)",
+        1,
+        suggest=lambda e, c: "len(6)",
+        run=lambda code, timeout: (False, "TypeError: object of type 'int' has no len()"),
+        attempt_log=log,
+        model="m2",
+        quick_fixer=lambda error, code: None,
+    )
+
+
+class TestErrorType:
+    """Test suite for the error_type function."""
+
+    def test_exception_names_are_extracted(self) -> None:
+        """Test that the exception class is read from a signature."""
+        assert error_type("NameError: name 'x' is not defined") == "NameError"
+        assert error_type("json.decoder.JSONDecodeError: bad") == "json.decoder.JSONDecodeError"
+        assert error_type("") == "none"
+        assert error_type("Segmentation fault (core dumped)") == "other"
+
+
+class TestQuantileSketch:
+    """Test suite for the QuantileSketch class."""
+
+    def test_quantiles_are_within_relative_accuracy(self) -> None:
+        """Test that quantiles match the exact ones within the relative error."""
+        values = np.random.default_rng(7).lognormal(0.0, 1.5, 20000)
+        sketch = QuantileSketch(relative_accuracy=0.01)
+
+        sketch.add_many(values)
+
+        for q in (0.5, 0.9, 0.99):
+            exact = np.quantile(values, q, method="lower")
+            assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+
+    def test_merged_sketches_equal_one_sketch(self) -> None:
+        """Test that sketches of chunks merge into the sketch of all values."""
+        values = np.random.default_rng(3).exponential(2.0, 1000)
+        whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+
+        whole.add_many(values)
+        first.add_many(values[:400])
+        for value in values[400:]:
+            second.add(float(value))
+        first.merge(second)
+
+        assert first.count == whole.count
+        assert first.quantile(0.99) == whole.quantile(0.99)
+
+    def test_zeros_and_empty_sketch(self) -> None:
+        """Test that zero values are counted and an empty sketch returns NaN."""
+        sketch = QuantileSketch()
+        assert np.isnan(sketch.quantile(0.5))
+
+        sketch.add_many(np.array([0.0, 0.0, 0.0, 5.0]))
+
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(1.0) == pytest.approx(5.0, rel=0.01)
+
+    def test_different_accuracies_do_not_merge(self) -> None:
+        """Test that merging sketches of different accuracies is rejected."""
+        with pytest.raises(ValueError):
+            QuantileSketch(0.01).merge(QuantileSketch(0.05))
+
+
+class TestAttemptLog:
+    """Test suite for the AttemptLog class and the report."""
+
+    def test_sessions_and_attempts_are_recorded(self) -> None:
+        """Test that the pipeline writes every session with its attempts."""
+        log = AttemptLog(":memory:")
+
+        _fill(log)
+
+        assert len(log) == 3
+        sessions = next(iter(log.chunks()))
+        assert sessions["success"].tolist() == [1, 1, 0]
+        assert sessions["model"].tolist() == ["m1", "m1", "m2"]
+        assert (sessions["tokens"] > 0).all()
+        attempts = next(iter(log.chunks(ATTEMPTS)))
+        assert len(attempts) == 3
+
+    def test_report_by_error_type(self) -> None:
+        """Test that fix rate, attempts and tokens are aggregated across chunks."""
+        log = AttemptLog(":memory:")
+        _fill(log)
+
+        report = summarize(log.chunks(chunk_size=1), by="error_type")
+
+        assert report.index.tolist() == ["NameError", "TypeError"]
+        assert report.loc["NameError", "rows"] == 2
+        assert report.loc["NameError", "fix_rate"] == 1.0
+        assert report.loc["TypeError", "fix_rate"] == 0.0
+        assert report.loc["NameError", "attempts"] == 1.0
+        assert report.loc["NameError", "p99_seconds"] >= 0
+        assert np.isnan(report.loc["TypeError", "p50_time_to_fix"])
+
+    def test_report_by_size(self) -> None:
+        """Test that snippets are grouped by their number of lines."""
+        log = AttemptLog(":memory:")
+        _fill(log)
+
+        report = summarize(log.chunks(), by="size")
+
+        assert report.index.tolist() == ["1-10"]
+        assert report.loc["1-10", "rows"] == 3
+
+    def test_unknown_dimension_is_rejected(self) -> None:
+        """Test that grouping by an unknown column raises ValueError."""
+        with pytest.raises(ValueError):
+            summarize([], by="color")
+
+    def test_command_line_report(self, tmp_path, capsys) -> None:
+        """Test that the command prints the report and writes the CSV."""
+        path = os.path.join(tmp_path, "attempts.db")
+        log = AttemptLog(path)
+        _fill(log)
+        log.close()
+        csv = os.path.join(tmp_path, "report.csv")
+
+        assert main([path, "--by", "model", "--csv", csv]) == 0
+
+        printed = capsys.readouterr().out
+        assert "m1" in printed and "fix_rate" in printed
+        assert os.path.exists(csv)
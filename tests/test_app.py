@@ -1,57 +1,13 @@
 """
 Unit tests for the main Streamlit application.
 
-Tests for code execution, download link creation, and debugging functionality.
+Tests for download link creation and debugging functionality.
 """
 
-from unittest.mock import MagicMock, patch
-
 import pandas as pd
 import pytest
 
-from autodebugger.app import create_download_link, run_code
-
-
-class TestRunCode:
-    """Test suite for the run_code function."""
-
-    @patch("autodebugger.app.subprocess.run")
-    def test_run_code_success(self, mock_run: MagicMock) -> None:
-        """Test successful code execution."""
-        mock_result = MagicMock()
-        mock_result.returncode = 0
-        mock_result.stdout = "Hello World\n"
-        mock_run.return_value = mock_result
-
-        success, output = run_code("print('Hello World')")
-
-        assert success is True
-        assert output == "Hello World\n"
-
-    @patch("autodebugger.app.subprocess.run")
-    def test_run_code_failure(self, mock_run: MagicMock) -> None:
-        """Test failed code execution with error."""
-        mock_result = MagicMock()
-        mock_result.returncode = 1
-        mock_result.stderr = "NameError: name 'x' is not defined"
-        mock_run.return_value = mock_result
-
-        success, output = run_code("print(x)")
-
-        assert success is False
-        assert "NameError" in output
-
-    @patch("autodebugger.app.subprocess.run")
-    def test_run_code_timeout(self, mock_run: MagicMock) -> None:
-        """Test code execution timeout."""
-        import subprocess
-
-        mock_run.side_effect = subprocess.TimeoutExpired("python", 30)
-
-        success, output = run_code("while True: pass")
-
-        assert success is False
-        assert "timed out" in output
+from autodebugger.app import create_download_link
 
 
 class TestCreateDownloadLink:
@@ -0,0 +1,75 @@
+"""
+Unit tests for model call record and replay.
+
+Tests for recording calls to a cassette and replaying them with scaled latency.
+"""
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from autodebugger.cassettes import RECORD, REPLAY, Cassette, CassetteMissError, prompt_key
+
+
+def write_cassette(path: Path, prompt: str, responses: list, seconds: float = 0.0) -> None:
+    """Write a cassette answering a prompt with the given responses."""
+    with open(path, "w", encoding="utf-8") as f:
+        for response in responses:
+            entry = {"key": prompt_key(prompt), "prompt": prompt, "response": response}
+            f.write(json.dumps({**entry, "seconds": seconds}) + "\n")
+
+
+class TestCassette:
+    """Test suite for the Cassette class."""
+
+    def test_record_then_replay(self, tmp_path: Path) -> None:
+        """Test that a recorded response is replayed without the live call."""
+        path = str(tmp_path / "calls.jsonl")
+        response = [{"results": [{"generated_text": "print(1)"}]}]
+        Cassette(path, RECORD).play("fix print(x)", {"max_new_tokens": 64}, lambda: response)
+
+        def live() -> list:
+            raise AssertionError("live call made in replay mode")
+
+        assert Cassette(path, REPLAY, latency_scale=0).play("fix print(x)", {}, live) == response
+
+    def test_recording_stores_timing(self, tmp_path: Path) -> None:
+        """Test that the latency of a recorded call is stored."""
+        path = tmp_path / "calls.jsonl"
+
+        Cassette(str(path), RECORD).play("prompt", {}, lambda: time.sleep(0.05) or "answer")
+
+        entry = json.loads(path.read_text())
+        assert entry["prompt"] == "prompt" and entry["response"] == "answer"
+        assert entry["seconds"] >= 0.05
+
+    def test_replay_scales_latency(self, tmp_path: Path) -> None:
+        """Test that replay waits the recorded latency times the scale factor."""
+        path = tmp_path / "calls.jsonl"
+        write_cassette(path, "prompt", ["answer"], seconds=0.2)
+        cassette = Cassette(str(path), REPLAY, latency_scale=0.5)
+
+        start = time.perf_counter()
+        cassette.play("prompt", {}, lambda: None)
+
+        assert 0.1 <= time.perf_counter() - start < 0.2
+
+    def test_repeated_prompt_replays_in_order(self, tmp_path: Path) -> None:
+        """Test that a prompt recorded twice replays both responses, then the last."""
+        path = tmp_path / "calls.jsonl"
+        write_cassette(path, "prompt", ["first", "second"])
+        cassette = Cassette(str(path), REPLAY, latency_scale=0)
+
+        answers = [cassette.play("prompt", {}, lambda: None) for _ in range(3)]
+
+        assert answers == ["first", "second", "second"]
+
+    def test_unrecorded_prompt_is_a_miss(self, tmp_path: Path) -> None:
+        """Test that replaying an unknown prompt raises CassetteMissError."""
+        path = tmp_path / "calls.jsonl"
+        write_cassette(path, "prompt", ["answer"])
+
+        with pytest.raises(CassetteMissError):
+            Cassette(str(path), REPLAY).play("other prompt", {}, lambda: None)
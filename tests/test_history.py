@@ -0,0 +1,142 @@
+"""
+Unit tests for the fix attempt history.
+
+Tests for code normalization, error signatures, repeat detection and the
+version store.
+"""
+
+import pytest
+
+from autodebugger.history import (
+    NOOP,
+    REPEAT,
+    AttemptHistory,
+    VersionStore,
+    code_hash,
+    error_signature,
+)
+
+SCRIPT = "".join(f"value_{i} = {i} * 2\n" for i in range(2000))
+
+
+def _edit(code: str, line: int, text: str) -> str:
+    lines = code.splitlines(keepends=True)
+    lines[line] = text
+    return "".join(lines)
+
+
+class TestNormalization:
+    """Test suite for code_hash and error_signature."""
+
+    def test_formatting_does_not_change_hash(self) -> None:
+        """Test that comments and blank lines are ignored."""
+        assert code_hash("x = 1\n\nprint(x)") == code_hash("x = 1  # one\nprint(x)\n")
+        assert code_hash("print(x)") != code_hash("print(y)")
+
+    def test_untokenizable_code_is_hashed(self) -> None:
+        """Test that code with unclosed brackets still gets a stable hash."""
+        assert code_hash("print((1)\n") == code_hash("  print((1)")
+
+    def test_error_signature_masks_volatile_parts(self) -> None:
+        """Test that addresses and line numbers do not change the signature."""
+        first = "Traceback\n  File x, line 3\nTypeError: <object at 0x7f12> line 3"
+        second = "Traceback\n  File x, line 9\nTypeError: <object at 0x7fab> line 9"
+
+        assert error_signature(first) == error_signature(second)
+        assert error_signature(first).startswith("TypeError")
+
+
+class TestAttemptHistory:
+    """Test suite for the AttemptHistory class."""
+
+    def test_detects_noop_and_repeat(self) -> None:
+        """Test that unchanged and previously failed suggestions are rejected."""
+        history = AttemptHistory()
+        history.record("print(x)", "NameError: name 'x' is not defined")
+        history.record("print(y)", "NameError: name 'y' is not defined")
+
+        assert history.rejection("print(y)", "print(y)  # fix") == NOOP
+        assert history.rejection("print(y)", "print(x)") == REPEAT
+        assert history.rejection("print(y)", "print(1)") == ""
+
+    def test_reprompt_lists_failed_versions(self) -> None:
+        """Test that the re-prompt quotes earlier failures."""
+        history = AttemptHistory()
+        history.record("print(x)", "NameError: name 'x' is not defined")
+
+        prompt = history.reprompt("NameError")
+
+        assert prompt.startswith("NameError")
+        assert "print(x)" in prompt
+
+
+class TestVersionStore:
+    """Test suite for the VersionStore class."""
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_versions_are_rebuilt_exactly(self, compress: bool) -> None:
+        """Test that every stored version is rebuilt byte for byte."""
+        store = VersionStore(compress=compress)
+        versions = [SCRIPT]
+        for attempt in range(10):
+            versions.append(_edit(versions[-1], attempt * 150, f"fixed_{attempt} = True\n"))
+
+        keys = [store.put(code) for code in versions]
+
+        assert [store.get(key) for key in keys] == versions
+        assert store.get(keys[0]) == SCRIPT
+
+    def test_storage_grows_with_edits_not_file_size(self) -> None:
+        """Test that ten small edits of a large script cost far less than ten copies."""
+        store = VersionStore()
+        code = SCRIPT
+        store.put(code)
+        first = store.stored_bytes
+        for attempt in range(10):
+            code = _edit(code, attempt * 150, f"fixed_{attempt} = True\n")
+            store.put(code)
+
+        assert store.stored_bytes - first < len(SCRIPT) // 10
+
+    def test_compression_reduces_storage(self) -> None:
+        """Test that compressed versions take less space."""
+        plain, compressed = VersionStore(compress=False), VersionStore(compress=True)
+
+        plain.put(SCRIPT)
+        compressed.put(SCRIPT)
+
+        assert compressed.stored_bytes < plain.stored_bytes
+
+    def test_identical_code_is_stored_once(self) -> None:
+        """Test that versions are addressed by content."""
+        store = VersionStore()
+
+        first = store.put("print(x)\n")
+        store.put("print(y)\n")
+        second = store.put("print(x)\n")
+
+        assert first == second
+        assert len(store) == 2
+
+    def test_chain_length_is_bounded(self) -> None:
+        """Test that a full copy is stored once the diff chain reaches max_chain."""
+        store = VersionStore(max_chain=2)
+        code = SCRIPT
+        keys = [store.put(code)]
+        for attempt in range(5):
+            code = _edit(code, attempt, "pass\n")
+            keys.append(store.put(code))
+
+        assert store.get(keys[-1]) == code
+        assert store.stored_bytes > 2 * len(SCRIPT)
+
+    def test_history_entries_share_the_store(self) -> None:
+        """Test that failed versions are kept in the given store."""
+        store = VersionStore()
+        history = AttemptHistory(versions=store)
+
+        history.record("print(x)", "NameError")
+
+        assert len(store) == 1
+        entry = history.lookup("print(x)")
+        assert entry is not None and entry.code == "print(x)"
@@ -0,0 +1,59 @@
+"""
+Unit tests for the fix knowledge base.
+
+Tests for MinHash similarity, persistence and retrieval of past fixes.
+"""
+
+from autodebugger.knowledge import FixKnowledgeBase, minhash, shingles, similarity
+
+ERROR = "Traceback (most recent call last):\nNameError: name 'y' is not defined"
+ORIGINAL = "x = 10\nfor i in range(3):\n    print(x + y)\n"
+FIXED = "x = 10\ny = 5\nfor i in range(3):\n    print(x + y)\n"
+
+
+class TestMinHash:
+    """Test suite for the MinHash helpers."""
+
+    def test_similarity_tracks_overlap(self) -> None:
+        """Test that similar code scores higher than unrelated code."""
+        base = minhash(shingles(ORIGINAL))
+        near = minhash(shingles(ORIGINAL + "print('done')\n"))
+        far = minhash(shingles("import os\nprint(os.listdir('.'))\n"))
+
+        assert similarity(base, base) == 1.0
+        assert similarity(base, near) > similarity(base, far)
+
+
+class TestFixKnowledgeBase:
+    """Test suite for the FixKnowledgeBase class."""
+
+    def test_exact_match_after_reload(self, tmp_path) -> None:
+        """Test that a stored fix is found again, exactly, from disk."""
+        path = str(tmp_path / "fixes.db")
+        store = FixKnowledgeBase(path)
+        store.add(ERROR, ORIGINAL, FIXED)
+        store.close()
+
+        matches = FixKnowledgeBase(path).lookup(ERROR, ORIGINAL + "\n# same code\n")
+
+        assert matches[0].exact
+        assert matches[0].fixed == FIXED
+
+    def test_similar_fix_becomes_example(self) -> None:
+        """Test that a near match is returned as an example, not an exact fix."""
+        store = FixKnowledgeBase(":memory:")
+        store.add(ERROR, ORIGINAL, FIXED)
+
+        matches = store.lookup(ERROR, ORIGINAL + "print('done')\n")
+        prompt = store.with_examples(ERROR, matches)
+
+        assert matches and not matches[0].exact
+        assert prompt.startswith(ERROR)
+        assert FIXED in prompt
+
+    def test_unrelated_code_has_no_match(self) -> None:
+        """Test that unrelated code with a different error finds nothing."""
+        store = FixKnowledgeBase(":memory:")
+        store.add(ERROR, ORIGINAL, FIXED)
+
+        assert store.lookup("ZeroDivisionError: division by zero", "print(1 / 0)\n") == []
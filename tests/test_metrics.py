@@ -0,0 +1,114 @@
+"""
+Unit tests for the metrics module.
+
+Tests for counters, histograms, quantile estimation and the Prometheus
+text exposition format.
+"""
+
+import math
+import os
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from autodebugger.metrics import (
+    CONTENT_TYPE,
+    MetricsRegistry,
+    start_metrics_server,
+    write_metrics_file,
+)
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    """Provide an empty metrics registry."""
+    return MetricsRegistry()
+
+
+class TestCounter:
+    """Test suite for the Counter metric."""
+
+    def test_counter_increments_per_label_set(self, registry: MetricsRegistry) -> None:
+        """Test that each label combination is counted separately."""
+        counter = registry.counter("demo_requests", "Demo requests.", ["result"])
+
+        counter.inc(result="hit")
+        counter.inc(result="hit")
+        counter.inc(result="miss")
+
+        assert counter.get(result="hit") == 2
+        assert counter.get(result="miss") == 1
+
+    def test_counter_rejects_negative_amounts(self, registry: MetricsRegistry) -> None:
+        """Test that counters cannot be decremented."""
+        counter = registry.counter("demo_requests", "Demo requests.")
+
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    def test_counter_rejects_wrong_labels(self, registry: MetricsRegistry) -> None:
+        """Test that label names must match the declaration."""
+        counter = registry.counter("demo_requests", "Demo requests.", ["result"])
+
+        with pytest.raises(ValueError, match="expects labels"):
+            counter.inc(outcome="hit")
+
+
+class TestHistogram:
+    """Test suite for the Histogram metric."""
+
+    def test_histogram_quantiles(self, registry: MetricsRegistry) -> None:
+        """Test that quantiles are interpolated inside buckets."""
+        histogram = registry.histogram("demo_seconds", "Demo latency.", buckets=(1, 2, 4))
+
+        for value in (0.5, 1.5, 1.5, 3.0):
+            histogram.observe(value)
+
+        assert histogram.count() == 4
+        assert 1.0 <= histogram.quantile(0.5) <= 2.0
+        assert 2.0 <= histogram.quantile(0.99) <= 4.0
+
+    def test_histogram_quantile_without_samples(self, registry: MetricsRegistry) -> None:
+        """Test that an empty histogram reports nan."""
+        histogram = registry.histogram("demo_seconds", "Demo latency.")
+
+        assert math.isnan(histogram.quantile(0.95))
+
+    def test_histogram_render(self, registry: MetricsRegistry) -> None:
+        """Test the text exposition of a histogram."""
+        histogram = registry.histogram("demo_seconds", "Demo latency.", ["stage"], buckets=(0.1, 1))
+        histogram.observe(0.05, stage="llm")
+        histogram.observe(5, stage="llm")
+
+        text = registry.render()
+
+        assert "# TYPE demo_seconds histogram" in text
+        assert 'demo_seconds_bucket{stage="llm",le="0.1"} 1' in text
+        assert 'demo_seconds_bucket{stage="llm",le="+Inf"} 2' in text
+        assert 'demo_seconds_count{stage="llm"} 2' in text
+
+
+class TestExport:
+    """Test suite for file and HTTP export."""
+
+    def test_write_metrics_file(self, registry: MetricsRegistry, tmp_path: Path) -> None:
+        """Test that metrics are written to a file."""
+        registry.counter("demo_requests", "Demo requests.").inc()
+        path = os.path.join(str(tmp_path), "autodebugger.prom")
+
+        write_metrics_file(path, registry)
+
+        with open(path, encoding="utf-8") as handle:
+            assert "demo_requests_total 1" in handle.read()
+
+    def test_metrics_server(self) -> None:
+        """Test that the HTTP endpoint serves the global registry."""
+        server = start_metrics_server(0)
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+
+        assert "autodebugger_sandbox_run_seconds" in body
@@ -0,0 +1,143 @@
+"""
+Unit tests for the optimize mode.
+
+Tests for benchmarking, judging candidates and the optimization loop, running
+small programs in the real sandbox.
+"""
+
+from typing import List
+
+from autodebugger.optimize import Measurement, judge, measure, optimization_prompt, optimize_code
+
+SLOW = "total = 0\nfor i in range(300000):\n    total += i\nprint(total)\n"
+FAST = "n = 300000\nprint(n * (n - 1) // 2)\n"
+WRONG = "print(0)\n"
+
+
+def _measurement(output: str = "1\n", seconds: float = 1.0, peak: int = 1000) -> Measurement:
+    return Measurement(output, True, [seconds] * 3, peak)
+
+
+class TestMeasure:
+    """Test suite for the measure function."""
+
+    def test_measures_output_and_timings(self) -> None:
+        """Test that the output, timings and peak memory of the code are reported."""
+        measurement, error = measure("print('hi')\n", repeats=3)
+
+        assert error == ""
+        assert measurement is not None
+        assert measurement.output == "hi\n"
+        assert measurement.deterministic
+        assert len(measurement.timings) == 3
+        assert measurement.peak_memory >= 0
+
+    def test_profile_lists_only_the_code(self) -> None:
+        """Test that the profile shows the user's functions, not the harness."""
+        code = "def work():\n    return sum(range(1000))\n\nprint(work())\n"
+
+        measurement, _ = measure(code, repeats=1, profile=True)
+
+        assert measurement is not None
+        assert "work" in measurement.hotspots
+        assert "_run" not in measurement.hotspots
+
+    def test_failing_code_returns_error(self) -> None:
+        """Test that code raising an exception yields no measurement."""
+        measurement, error = measure("raise ValueError('boom')\n", repeats=1)
+
+        assert measurement is None
+        assert "ValueError: boom" in error
+
+    def test_nondeterministic_output_is_flagged(self) -> None:
+        """Test that output changing between runs is detected."""
+        code = "import random\nprint(random.random())\n"
+
+        measurement, _ = measure(code, repeats=3)
+
+        assert measurement is not None
+        assert not measurement.deterministic
+
+
+class TestJudge:
+    """Test suite for the judge function."""
+
+    def test_faster_candidate_is_accepted(self) -> None:
+        """Test that a correct and faster candidate is accepted with its speedup."""
+        accepted, reason = judge(_measurement(), _measurement(seconds=0.5), 1.05)
+
+        assert accepted
+        assert reason == "2.00x faster"
+
+    def test_different_output_is_rejected(self) -> None:
+        """Test that a candidate printing something else is rejected."""
+        accepted, reason = judge(_measurement(), _measurement("2\n", seconds=0.1), 1.05)
+
+        assert not accepted
+        assert "output differs" in reason
+
+    def test_marginal_speedup_is_rejected(self) -> None:
+        """Test that a speedup within the noise margin is rejected."""
+        accepted, reason = judge(_measurement(), _measurement(seconds=0.98), 1.05)
+
+        assert not accepted
+        assert "not measurably faster" in reason
+
+
+class TestOptimizationPrompt:
+    """Test suite for the optimization_prompt function."""
+
+    def test_prompt_includes_hotspots(self) -> None:
+        """Test that the profile of the code is sent to the model."""
+        original = _measurement()
+        original.hotspots = "10 calls  work"
+
+        prompt = optimization_prompt(original)
+
+        assert "same output" in prompt
+        assert "10 calls  work" in prompt
+
+
+class TestOptimizeCode:
+    """Test suite for the optimize_code function."""
+
+    def test_faster_candidate_wins(self) -> None:
+        """Test that a wrong rewrite is rejected and a faster one is kept."""
+        candidates = [WRONG, FAST]
+        prompts: List[str] = []
+
+        def suggest(prompt: str, code: str) -> str:
+            prompts.append(prompt)
+            return candidates.pop(0)
+
+        result, error = optimize_code(SLOW, suggest, max_candidates=2, repeats=3)
+
+        assert error == ""
+        assert result is not None
+        assert [c.accepted for c in result.candidates] == [False, True]
+        assert "output differs" in result.candidates[0].reason
+        assert result.final_code == FAST
+        assert result.speedup > 1.05
+        assert "too slow" in prompts[0]
+
+    def test_no_candidate_keeps_original(self) -> None:
+        """Test that the original code is kept when no rewrite is accepted."""
+        result, _ = optimize_code(SLOW, lambda prompt, code: "raise SystemExit(1)\n", repeats=1)
+
+        assert result is not None
+        assert result.best is None
+        assert result.final_code == SLOW
+        assert result.speedup == 1.0
+        assert result.memory_delta == 0
+        assert all(c.reason.startswith("fails to run") for c in result.candidates)
+
+    def test_failing_original_is_not_optimized(self) -> None:
+        """Test that code that does not run is reported instead of optimized."""
+
+        def suggest(prompt: str, code: str) -> str:
+            raise AssertionError("the model must not be called")
+
+        result, error = optimize_code("print(undefined)\n", suggest)
+
+        assert result is None
+        assert "NameError" in error
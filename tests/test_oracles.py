@@ -0,0 +1,82 @@
+"""
+Unit tests for user-supplied test oracles.
+
+Tests for case parsing, sharding and validation of code against user tests.
+"""
+
+from typing import List, Tuple
+
+import pytest
+
+from autodebugger.oracles import ORACLE_FAILURE, TestOracle, parse_cases
+
+CODE = "def add(a, b):\n    return a + b\n"
+
+
+class TestParseCases:
+    """Test suite for the parse_cases function."""
+
+    def test_assertions_become_cases(self) -> None:
+        """Test that every top-level assertion is a case of its own."""
+        setup, cases = parse_cases("assert add(1, 2) == 3\nassert add(0, 0) == 0\n")
+
+        assert setup == ""
+        assert [case.name for case in cases] == ["assert add(1, 2) == 3", "assert add(0, 0) == 0"]
+
+    def test_test_functions_become_cases(self) -> None:
+        """Test that test functions are cases and other code is setup."""
+        source = "import math\n\ndef test_one():\n    assert 1\n\ndef helper():\n    pass\n"
+
+        setup, cases = parse_cases(source)
+
+        assert [case.name for case in cases] == ["test_one"]
+        assert "import math" in setup and "def helper" in setup
+
+    def test_invalid_tests_are_rejected(self) -> None:
+        """Test that tests that do not parse raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_cases("assert (")
+
+    def test_empty_tests_are_rejected(self) -> None:
+        """Test that tests without any case raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_cases("# nothing here\n")
+
+
+class TestTestOracle:
+    """Test suite for the TestOracle class."""
+
+    def test_shards_are_capped_by_cases(self) -> None:
+        """Test that there are never more shards than cases."""
+        oracle = TestOracle("assert True\nassert True\n", workers=8)
+
+        assert len(oracle.shards()) == 2
+
+    def test_passing_code_is_accepted(self) -> None:
+        """Test that code passing every case is accepted."""
+        oracle = TestOracle("assert add(1, 2) == 3\nassert add(-1, 1) == 0\n", workers=2)
+
+        assert oracle.validate(CODE, timeout=10) == (True, "")
+
+    def test_wrong_answer_is_reported(self) -> None:
+        """Test that a failing case is reported with its name."""
+        oracle = TestOracle("def test_add():\n    assert add(2, 2) == 5\n")
+
+        passed, output = oracle.validate(CODE, timeout=10)
+
+        assert passed is False
+        assert f"{ORACLE_FAILURE}: test_add" in output
+        assert "AssertionError" in output
+
+    def test_stops_at_first_failing_shard(self) -> None:
+        """Test that validation returns as soon as one shard fails."""
+        calls: List[str] = []
+
+        def run(code: str, timeout: float) -> Tuple[bool, str]:
+            calls.append(code)
+            return False, "AssertionError"
+
+        oracle = TestOracle("assert add(1, 1) == 2\n", workers=1, run=run)
+
+        assert oracle.validate(CODE) == (False, "AssertionError")
+        assert len(calls) == 1
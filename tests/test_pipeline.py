@@ -0,0 +1,232 @@
+"""
+Unit tests for the headless debugging pipeline.
+
+Tests for the run / suggest / retry loop and its observer notifications.
+"""
+
+from typing import Dict, List, Tuple
+from unittest.mock import MagicMock
+
+from autodebugger.knowledge import FixKnowledgeBase
+from autodebugger.oracles import TestOracle
+from autodebugger.pipeline import SessionObserver, run_debug_session
+from autodebugger.timeouts import AdaptiveTimeouts
+
+
+def make_runner(outcomes: Dict[str, Tuple[bool, str]]) -> MagicMock:
+    """Build a fake ``run`` callable returning a fixed outcome per code string."""
+    return MagicMock(side_effect=lambda code, timeout: outcomes[code])
+
+
+class RecordingObserver(SessionObserver):
+    """Observer that records the names of the notifications it receives."""
+
+    def __init__(self) -> None:
+        self.events: List[str] = []
+
+    def attempt_started(self, attempt: int) -> None:
+        self.events.append("attempt_started")
+
+    def code_succeeded(self, attempt: int, code: str, output: str) -> None:
+        self.events.append("code_succeeded")
+
+    def candidate_finished(self, attempt: int, code: str, success: bool, output: str) -> None:
+        self.events.append("candidate_finished")
+
+    def session_failed(self, max_attempts: int) -> None:
+        self.events.append("session_failed")
+
+    def session_stopped(self, attempt: int, reason: str) -> None:
+        self.events.append("session_stopped")
+
+
+class TestRunDebugSession:
+    """Test suite for the run_debug_session function."""
+
+    def test_working_code_needs_no_fix(self) -> None:
+        """Test that working code is accepted on the first attempt."""
+        run = make_runner({"print(1)": (True, "1\n")})
+        suggest = MagicMock()
+
+        result = run_debug_session("print(1)", 3, suggest=suggest, run=run)
+
+        assert result.success is True
+        assert result.log_rows() == [[1, "print(1)", "print(1)", "", True]]
+        suggest.assert_not_called()
+
+    def test_fix_is_applied(self) -> None:
+        """Test that a successful fix ends the session."""
+        run = make_runner({"print(x)": (False, "NameError"), "print(1)": (True, "1\n")})
+        suggest = MagicMock(return_value="print(1)")
+        observer = RecordingObserver()
+
+        result = run_debug_session("print(x)", 3, suggest=suggest, run=run, observer=observer)
+
+        assert result.success is True
+        assert result.final_code == "print(1)"
+        assert result.log_rows() == [[1, "print(x)", "print(1)", "NameError", True]]
+        suggest.assert_called_once_with("NameError", "print(x)")
+        assert observer.events == ["attempt_started", "candidate_finished"]
+
+    def test_gives_up_after_max_attempts(self) -> None:
+        """Test that the session stops after max_attempts failed fixes."""
+        run = make_runner(
+            {
+                "print(x)": (False, "NameError"),
+                "print(y)": (False, "NameError"),
+                "print(z)": (False, "NameError"),
+            }
+        )
+        suggest = MagicMock(side_effect=["print(y)", "print(z)"])
+        observer = RecordingObserver()
+
+        result = run_debug_session("print(x)", 2, suggest=suggest, run=run, observer=observer)
+
+        assert result.success is False
+        assert len(result.attempts) == 2
+        assert observer.events[-1] == "session_failed"
+
+    def test_failed_candidate_is_not_rerun(self) -> None:
+        """Test that the next attempt reuses the outcome of the previous candidate."""
+        run = make_runner(
+            {
+                "print(x)": (False, "NameError"),
+                "print(y)": (False, "NameError"),
+                "print(1)": (True, "1\n"),
+            }
+        )
+        suggest = MagicMock(side_effect=["print(y)", "print(1)"])
+
+        result = run_debug_session("print(x)", 3, suggest=suggest, run=run)
+
+        assert result.success is True
+        assert [call.args[0] for call in run.call_args_list] == ["print(x)", "print(y)", "print(1)"]
+
+    def test_noop_suggestion_is_reprompted(self) -> None:
+        """Test that an unchanged suggestion is not executed and the model is asked again."""
+        run = make_runner({"print(x)": (False, "NameError"), "print(1)": (True, "1\n")})
+        suggest = MagicMock(side_effect=["print(x)  # fixed", "print(1)"])
+
+        result = run_debug_session("print(x)", 3, suggest=suggest, run=run)
+
+        assert result.success is True
+        assert run.call_count == 2
+        assert "already tried" in suggest.call_args_list[1].args[0]
+
+    def test_oscillation_stops_early(self) -> None:
+        """Test that a model swapping between failed versions ends the session."""
+        run = make_runner({"print(x)": (False, "NameError"), "print(y)": (False, "NameError")})
+        suggest = MagicMock(side_effect=["print(y)", "print(x)", "print(x)"])
+        observer = RecordingObserver()
+
+        result = run_debug_session("print(x)", 5, suggest=suggest, run=run, observer=observer)
+
+        assert result.success is False
+        assert result.stop_reason == "repeated suggestion"
+        assert result.attempts[-1].success == "Stopped: repeated suggestion"
+        assert run.call_count == 2
+        assert observer.events[-1] == "session_stopped"
+
+    def test_runs_with_adaptive_timeout(self) -> None:
+        """Test that runs get the timeout chosen by the timeout policy."""
+        run = make_runner({"print(x)": (False, "NameError"), "print(1)": (True, "1\n")})
+        timeouts = AdaptiveTimeouts(floor=1, ceiling=7)
+
+        run_debug_session(
+            "print(x)", 3, suggest=MagicMock(return_value="print(1)"), run=run, timeouts=timeouts
+        )
+
+        assert run.call_args_list[0].args == ("print(x)", 7)
+        assert run.call_args_list[1].args[1] == 1
+
+    def test_unfixable_error_stops_without_model_call(self) -> None:
+        """Test that an unfixable error ends the session with a recorded reason."""
+        error = "ModuleNotFoundError: No module named 'zzqx_not_a_module'"
+        run = make_runner({"import zzqx_not_a_module": (False, error)})
+        suggest = MagicMock()
+        observer = RecordingObserver()
+
+        result = run_debug_session(
+            "import zzqx_not_a_module", 3, suggest=suggest, run=run, observer=observer
+        )
+
+        suggest.assert_not_called()
+        assert result.stop_reason == "module 'zzqx_not_a_module' is not installed"
+        assert result.log_rows()[-1][-1] == f"Stopped: {result.stop_reason}"
+        assert observer.events[-1] == "session_stopped"
+
+    def test_quick_fix_skips_model(self) -> None:
+        """Test that a mechanical error is fixed without asking the model."""
+        error = "NameError: name 'math' is not defined"
+        run = make_runner(
+            {"print(math.pi)": (False, error), "import math\nprint(math.pi)": (True, "3.14\n")}
+        )
+        suggest = MagicMock()
+
+        result = run_debug_session("print(math.pi)", 3, suggest=suggest, run=run)
+
+        assert result.success is True
+        suggest.assert_not_called()
+
+    def test_knowledge_base_reuses_fix(self) -> None:
+        """Test that a fix learned in one session is applied without the model in the next."""
+        run = make_runner({"print(x)": (False, "NameError: x"), "print(1)": (True, "1\n")})
+        knowledge = FixKnowledgeBase(":memory:")
+        run_debug_session(
+            "print(x)", 3, suggest=MagicMock(return_value="print(1)"), run=run, knowledge=knowledge
+        )
+        suggest = MagicMock()
+
+        result = run_debug_session("print(x)", 3, suggest=suggest, run=run, knowledge=knowledge)
+
+        assert result.success is True
+        suggest.assert_not_called()
+
+    def test_oracle_rejects_wrong_answer(self) -> None:
+        """Test that a candidate that runs but fails the user's tests is not accepted."""
+        wrong = "def add(a, b):\n    return a - b\n"
+        right = "def add(a, b):\n    return a + b\n"
+        run = make_runner({wrong: (True, ""), right: (True, "")})
+        oracle = TestOracle("assert add(2, 3) == 5\n", workers=1)
+        suggest = MagicMock(return_value=right)
+
+        result = run_debug_session(wrong, 3, suggest=suggest, run=run, oracle=oracle)
+
+        assert result.success is True
+        assert result.final_code == right
+        assert "AssertionError" in result.attempts[0].error
+
+    def test_speculative_alternative_skips_model_wait(self) -> None:
+        """Test that a failed candidate is followed by the alternative requested meanwhile."""
+        run = make_runner(
+            {
+                "print(x)": (False, "NameError"),
+                "print(y)": (False, "NameError"),
+                "print(1)": (True, "1\n"),
+            }
+        )
+        suggest = MagicMock(side_effect=["print(y)", "print(1)"])
+
+        result = run_debug_session("print(x)", 3, suggest=suggest, run=run, speculative_requests=1)
+
+        assert result.success is True
+        assert suggest.call_count == 2
+        assert [attempt.code for attempt in result.attempts] == ["print(y)", "print(1)"]
+        assert result.attempts[1].error == "NameError"
+
+    def test_speculative_alternative_dropped_after_progress(self) -> None:
+        """Test that the alternative is not used when the candidate got past the error."""
+        run = make_runner(
+            {
+                "print(x)": (False, "NameError"),
+                "print(y)": (False, "TypeError"),
+                "print(1)": (True, "1\n"),
+            }
+        )
+        suggest = MagicMock(side_effect=["print(y)", "print(2)", "print(1)"])
+
+        result = run_debug_session("print(x)", 3, suggest=suggest, run=run, speculative_requests=1)
+
+        assert result.success is True
+        assert suggest.call_count == 3
+        assert suggest.call_args_list[2].args == ("TypeError", "print(y)")
@@ -0,0 +1,99 @@
+"""
+Unit tests for project mode.
+
+Tests for failing-test selection, file bundling and the project fix loop.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import MagicMock, patch
+
+from autodebugger.project import (
+    bundle_files,
+    module_name,
+    run_project_session,
+    run_pytest,
+    tests_importing,
+    unbundle_files,
+)
+
+FILES: Dict[str, str] = {
+    "calc/__init__.py": "",
+    "calc/ops.py": "def add(a, b):\n    return a - b\n",
+    "calc/text.py": "def shout(s):\n    return s.upper()\n",
+    "tests/test_ops.py": "from calc.ops import add\n\ndef test_add():\n    assert add(1, 2) == 3\n",
+    "tests/test_text.py": "from calc import text\n\ndef test_shout():\n    assert text.shout('a') == 'A'\n",
+}
+
+
+def make_project(root: Path) -> str:
+    """Write a small package with one failing test."""
+    for path, content in FILES.items():
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+    return str(root)
+
+
+class TestHelpers:
+    """Test suite for the project mode helpers."""
+
+    def test_module_name(self) -> None:
+        """Test that paths map to dotted module names."""
+        assert module_name("src/pkg/calc.py") == "pkg.calc"
+        assert module_name(os.path.join("pkg", "__init__.py")) == "pkg"
+
+    def test_bundle_round_trip(self, tmp_path: Path) -> None:
+        """Test that bundled files can be split back, with fences removed."""
+        directory = make_project(tmp_path)
+        bundle = bundle_files(directory, ["calc/ops.py", "calc/text.py"])
+
+        files = unbundle_files(bundle.replace("return a - b", "```python\nreturn a + b"))
+
+        assert files["calc/text.py"] == FILES["calc/text.py"]
+        assert "a + b" in files["calc/ops.py"]
+
+    def test_tests_importing(self, tmp_path: Path) -> None:
+        """Test that only tests importing a changed module are selected."""
+        directory = make_project(tmp_path)
+
+        assert tests_importing(directory, ["calc/ops.py"]) == [os.path.join("tests", "test_ops.py")]
+
+
+class TestRunProjectSession:
+    """Test suite for the run_project_session function."""
+
+    def test_fixes_failing_test_and_reruns_selection(self, tmp_path: Path) -> None:
+        """Test that only failing and dependent tests are re-run after a fix."""
+        directory = make_project(tmp_path)
+        runs: List[List[str]] = []
+
+        def recording_run(workspace: str, targets=(), timeout: float = 60) -> object:
+            runs.append(list(targets))
+            return run_pytest(workspace, targets, timeout)
+
+        def suggest(error: str, code: str) -> str:
+            assert "test_add" in error
+            return code.replace("a - b", "a + b")
+
+        with patch("autodebugger.project.run_pytest", side_effect=recording_run):
+            result = run_project_session(directory, 3, suggest)
+
+        assert result.success is True
+        assert result.initial_failures == ["tests/test_ops.py::test_add"]
+        assert list(result.changes) == ["calc/ops.py"]
+        assert runs == [[], ["tests/test_ops.py::test_add", os.path.join("tests", "test_ops.py")]]
+        assert "+    return a + b" in result.diff()
+        assert (tmp_path / "calc/ops.py").read_text() == FILES["calc/ops.py"]
+
+    def test_unchanged_suggestion_stops(self, tmp_path: Path) -> None:
+        """Test that a suggestion changing nothing ends the session."""
+        directory = make_project(tmp_path)
+        suggest = MagicMock(side_effect=lambda error, code: code)
+
+        result = run_project_session(directory, 3, suggest)
+
+        assert result.success is False
+        assert result.stop_reason == "no-op suggestion"
+        assert suggest.call_count == 2
@@ -0,0 +1,72 @@
+"""
+Unit tests for rule-based quick fixes.
+
+Tests for the deterministic rewrites tried before the model is asked.
+"""
+
+from autodebugger.quickfix import quick_fix
+
+TRACEBACK = 'Traceback (most recent call last):\n  File "<string>", line 1, in <module>\n'
+
+
+class TestQuickFix:
+    """Test suite for the quick_fix function and its rules."""
+
+    def test_missing_stdlib_import(self) -> None:
+        """Test that an undefined stdlib module is imported."""
+        fix = quick_fix(
+            TRACEBACK + "NameError: name 'math' is not defined", "print(math.sqrt(16))\n"
+        )
+
+        assert fix is not None
+        assert fix.rule == "missing_stdlib_import"
+        assert fix.code == "import math\nprint(math.sqrt(16))\n"
+
+    def test_misspelled_name(self) -> None:
+        """Test that a name one edit away from a defined one is renamed."""
+        code = "value = 3\nprint(valeu, 'valeu')\n"
+        error = TRACEBACK + "NameError: name 'valeu' is not defined. Did you mean: 'value'?"
+
+        fix = quick_fix(error, code)
+
+        assert fix.rule == "misspelled_name"
+        assert fix.code == "value = 3\nprint(value, 'valeu')\n"
+
+    def test_misspelled_builtin(self) -> None:
+        """Test that a misspelled builtin is corrected."""
+        fix = quick_fix(TRACEBACK + "NameError: name 'pritn' is not defined", "pritn('typo')\n")
+
+        assert fix.code == "print('typo')\n"
+
+    def test_unclosed_bracket(self) -> None:
+        """Test that unclosed brackets are closed on the reported line or at the end."""
+        line_error = "  File \"<string>\", line 1\nSyntaxError: '[' was never closed"
+        end_error = "  File \"<string>\", line 1\nSyntaxError: '(' was never closed"
+
+        assert quick_fix(line_error, "x = [1, 2\nprint(x)\n").code == "x = [1, 2]\nprint(x)\n"
+        assert quick_fix(end_error, "foo = (1 +\n2\n").code == "foo = (1 +\n2)\n"
+
+    def test_mixed_tabs(self) -> None:
+        """Test that tab indentation is expanded."""
+        code = "if True:\n\tx = 1\n        print(x)\n"
+        error = '  File "<string>", line 3\nTabError: inconsistent use of tabs and spaces in indentation'
+
+        assert quick_fix(error, code).code == "if True:\n        x = 1\n        print(x)\n"
+
+    def test_python2_print(self) -> None:
+        """Test that print statements become calls."""
+        error = "SyntaxError: Missing parentheses in call to 'print'. Did you mean print(...)?"
+
+        fix = quick_fix(error, "for i in range(2):\n    print i, 'x'\nprint\n")
+
+        assert fix.code == "for i in range(2):\n    print(i, 'x')\nprint\n"
+
+    def test_no_rule_applies(self) -> None:
+        """Test that unknown errors are left to the model."""
+        assert (
+            quick_fix(TRACEBACK + "ZeroDivisionError: division by zero", "print(1 / 0)\n") is None
+        )
+        assert (
+            quick_fix(TRACEBACK + "NameError: name 'y' is not defined", "x = 10\nprint(x + y)\n")
+            is None
+        )
@@ -0,0 +1,130 @@
+"""
+Unit tests for the resilience layer.
+
+Tests for the token bucket, circuit breaker, error classification and the
+retrying caller used around model requests.
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from autodebugger.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResilientCaller,
+    ServiceError,
+    TokenBucket,
+    is_retryable,
+)
+
+
+def make_caller(**overrides: float) -> ResilientCaller:
+    """Build a caller with tiny delays suitable for tests."""
+    options = {
+        "max_retries": 3,
+        "backoff_base": 0.001,
+        "backoff_max": 0.01,
+        "call_timeout": None,
+    }
+    options.update(overrides)
+    return ResilientCaller(**options)  # type: ignore[arg-type]
+
+
+class TestErrorClassification:
+    """Test suite for is_retryable."""
+
+    def test_throttling_and_server_errors_are_retryable(self) -> None:
+        """Test that 429 and 5xx errors are retried."""
+        assert is_retryable(ServiceError("throttled", status_code=429))
+        assert is_retryable(Exception("Failure during generate. Status code: 503"))
+        assert is_retryable(TimeoutError())
+
+    def test_client_errors_are_not_retryable(self) -> None:
+        """Test that authentication errors are not retried."""
+        assert not is_retryable(ServiceError("unauthorized", status_code=401))
+        assert not is_retryable(ValueError("bad prompt"))
+
+
+class TestTokenBucket:
+    """Test suite for the TokenBucket rate limiter."""
+
+    def test_burst_then_throttle(self) -> None:
+        """Test that calls beyond the burst wait for new tokens."""
+        bucket = TokenBucket(rate=1.0, capacity=2)
+
+        assert bucket.acquire(timeout=0)
+        assert bucket.acquire(timeout=0)
+        assert not bucket.acquire(timeout=0.01)
+
+    def test_disabled_limiter(self) -> None:
+        """Test that a rate of zero never blocks."""
+        bucket = TokenBucket(rate=0)
+
+        assert all(bucket.acquire(timeout=0) for _ in range(100))
+
+
+class TestCircuitBreaker:
+    """Test suite for the CircuitBreaker."""
+
+    def test_opens_after_threshold_and_recovers(self) -> None:
+        """Test the closed -> open -> half-open -> closed cycle."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert not breaker.allow()  # only one trial call while half-open
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestResilientCaller:
+    """Test suite for the ResilientCaller."""
+
+    def test_retries_throttled_calls(self) -> None:
+        """Test that a throttled call is retried until it succeeds."""
+        func = MagicMock(side_effect=[ServiceError("429", status_code=429), "ok"])
+
+        assert make_caller().call(func, "prompt") == "ok"
+        assert func.call_count == 2
+
+    def test_does_not_retry_client_errors(self) -> None:
+        """Test that non-retryable errors are raised immediately."""
+        func = MagicMock(side_effect=ServiceError("401", status_code=401))
+
+        with pytest.raises(ServiceError):
+            make_caller().call(func)
+        assert func.call_count == 1
+
+    def test_gives_up_after_max_retries(self) -> None:
+        """Test that retries are bounded."""
+        func = MagicMock(side_effect=ServiceError("503", status_code=503))
+
+        with pytest.raises(ServiceError):
+            make_caller(max_retries=2, failure_threshold=10).call(func)
+        assert func.call_count == 3
+
+    def test_call_timeout(self) -> None:
+        """Test that a slow call is abandoned after its deadline."""
+        caller = make_caller(max_retries=0, call_timeout=0.05)
+
+        with pytest.raises(DeadlineExceededError):
+            caller.call(time.sleep, 1)
+
+    def test_open_circuit_rejects_calls(self) -> None:
+        """Test that an open breaker stops calls to a failing provider."""
+        func = MagicMock(side_effect=ServiceError("500", status_code=500))
+        caller = make_caller(max_retries=0, failure_threshold=1, reset_timeout=60)
+
+        with pytest.raises(ServiceError):
+            caller.call(func)
+        with pytest.raises(CircuitOpenError):
+            caller.call(func)
+        assert func.call_count == 1
@@ -0,0 +1,131 @@
+"""
+Unit tests for the language runners.
+
+Tests for the runner registry, the build cache and the C, C++ and JavaScript
+runners (skipped where the toolchain is not installed).
+"""
+
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from autodebugger import runners
+from autodebugger.runners import (
+    TOOLCHAIN_MISSING,
+    BuildCache,
+    find_compiler,
+    get_runner,
+    run_c,
+    run_code,
+)
+from autodebugger.triage import MISSING_TOOLCHAIN, classify_error
+
+needs_cc = pytest.mark.skipif(find_compiler("c") is None, reason="no C compiler")
+needs_cxx = pytest.mark.skipif(find_compiler("cpp") is None, reason="no C++ compiler")
+needs_node = pytest.mark.skipif(shutil.which("node") is None, reason="no Node.js")
+
+
+@pytest.fixture
+def build_cache(tmp_path: Path):
+    """Use an empty build cache in a temporary directory."""
+    cache = BuildCache(str(tmp_path / "builds"))
+    with patch.object(runners, "_build_cache", cache):
+        yield cache
+
+
+class TestGetRunner:
+    """Test suite for the get_runner function."""
+
+    def test_language_names_and_aliases(self) -> None:
+        """Test that display names and aliases resolve to the same runner."""
+        assert get_runner("Python") is run_code
+        assert get_runner("C++") is get_runner("cpp")
+        assert get_runner("JS") is get_runner("JavaScript")
+
+    def test_unknown_language(self) -> None:
+        """Test that an unknown language raises ValueError."""
+        with pytest.raises(ValueError):
+            get_runner("COBOL")
+
+
+class TestBuildCache:
+    """Test suite for the BuildCache class."""
+
+    def test_least_recently_used_builds_are_removed(self, tmp_path: Path) -> None:
+        """Test that the cache keeps at most max_entries programs."""
+        cache = BuildCache(str(tmp_path), max_entries=2)
+        for index, key in enumerate(["a", "b", "c"]):
+            built = tmp_path / f"built-{key}"
+            built.write_text(key)
+            path = cache.put(key, str(built))
+            os.utime(path, (index, index))
+
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+
+
+class TestCompiledRunners:
+    """Test suite for the C and C++ runners."""
+
+    @needs_cc
+    def test_c_program_runs(self, build_cache: BuildCache) -> None:
+        """Test that a C program is compiled and its output captured."""
+        code = '#include <stdio.h>\nint main(void) { printf("%d\\n", 6 * 7); return 0; }\n'
+
+        assert run_c(code, 30) == (True, "42\n")
+
+    @needs_cc
+    def test_unchanged_code_is_not_rebuilt(self, build_cache: BuildCache) -> None:
+        """Test that a second run of the same code reuses the cached program."""
+        code = "int main(void) { return 0; }\n"
+        run_c(code, 30)
+
+        with patch.object(runners, "SANDBOX_BUILD_SECONDS") as build_seconds:
+            assert run_c(code, 30) == (True, "")
+
+        build_seconds.observe.assert_not_called()
+        assert len(os.listdir(build_cache.directory)) == 1
+
+    @needs_cc
+    def test_compile_error_is_reported(self, build_cache: BuildCache) -> None:
+        """Test that compiler diagnostics are returned as the error."""
+        success, output = run_c("int main(void) { return x; }\n", 30)
+
+        assert success is False
+        assert "error" in output and "x" in output
+
+    @needs_cxx
+    def test_cpp_program_runs(self, build_cache: BuildCache) -> None:
+        """Test that a C++ program is compiled and run."""
+        code = '#include <iostream>\nint main() { std::cout << "hi" << std::endl; }\n'
+
+        assert get_runner("C++")(code, 60) == (True, "hi\n")
+
+    def test_missing_compiler_is_unfixable(self, build_cache: BuildCache) -> None:
+        """Test that a missing toolchain ends the session instead of asking the model."""
+        with patch.dict(os.environ, {"CC": "zzqx-no-such-cc"}):
+            success, output = run_c("int main(void) { return 0; }\n", 30)
+
+        assert success is False
+        assert output.startswith(TOOLCHAIN_MISSING)
+        assert classify_error(output).category == MISSING_TOOLCHAIN
+
+
+class TestJavaScriptRunner:
+    """Test suite for the JavaScript runner."""
+
+    @needs_node
+    def test_javascript_program_runs(self) -> None:
+        """Test that a JavaScript program runs with Node.js."""
+        assert get_runner("JavaScript")("console.log(1 + 1)", 30) == (True, "2\n")
+
+    @needs_node
+    def test_javascript_error_is_reported(self) -> None:
+        """Test that an uncaught exception is reported as the error."""
+        success, output = get_runner("JavaScript")("console.log(y)", 30)
+
+        assert success is False
+        assert "ReferenceError" in output
@@ -0,0 +1,91 @@
+"""
+Unit tests for sandboxed code execution.
+
+Tests for running code in a subprocess and reporting its outcome.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from autodebugger.sandbox import run_code
+
+
+class TestRunCode:
+    """Test suite for the run_code function."""
+
+    @patch("autodebugger.sandbox.subprocess.Popen")
+    def test_run_code_success(self, mock_popen: MagicMock) -> None:
+        """Test successful code execution."""
+        mock_process = MagicMock()
+        mock_process.returncode = 0
+        mock_process.communicate.return_value = ("Hello World\n", "")
+        mock_popen.return_value = mock_process
+
+        success, output = run_code("print('Hello World')")
+
+        assert success is True
+        assert output == "Hello World\n"
+
+    @patch("autodebugger.sandbox.subprocess.Popen")
+    def test_run_code_failure(self, mock_popen: MagicMock) -> None:
+        """Test failed code execution with error."""
+        mock_process = MagicMock()
+        mock_process.returncode = 1
+        mock_process.communicate.return_value = ("", "NameError: name 'x' is not defined")
+        mock_popen.return_value = mock_process
+
+        success, output = run_code("print(x)")
+
+        assert success is False
+        assert "NameError" in output
+
+    @patch("autodebugger.sandbox.subprocess.Popen")
+    def test_run_code_timeout(self, mock_popen: MagicMock) -> None:
+        """Test code execution timeout."""
+        import subprocess
+
+        mock_process = MagicMock()
+        mock_process.communicate.side_effect = [subprocess.TimeoutExpired("python", 30), ("", "")]
+        mock_popen.return_value = mock_process
+
+        success, output = run_code("while True: pass")
+
+        assert success is False
+        assert "timed out" in output
+        mock_process.kill.assert_called_once()
+
+    @patch("autodebugger.sandbox.subprocess.Popen")
+    def test_code_is_sent_through_stdin(self, mock_popen: MagicMock) -> None:
+        """Test that the code is not passed on the command line."""
+        mock_process = MagicMock()
+        mock_process.returncode = 0
+        mock_process.communicate.return_value = ("", "")
+        mock_popen.return_value = mock_process
+
+        run_code("print('secret')")
+
+        assert "print('secret')" not in mock_popen.call_args.args[0]
+        assert mock_process.communicate.call_args.kwargs["input"] == "print('secret')"
+
+    def test_large_source_runs(self) -> None:
+        """Test that code larger than the argument length limit runs."""
+        code = "x = 0\n" + "x += 1\n" * 40000 + "print(x)\n"
+
+        assert run_code(code) == (True, "40000\n")
+
+    def test_traceback_matches_python_c(self) -> None:
+        """Test that tracebacks name the code "<string>" without the loader frame."""
+        success, output = run_code("x = 1\nprint(y)\n")
+
+        assert success is False
+        assert output.splitlines()[:2] == [
+            "Traceback (most recent call last):",
+            '  File "<string>", line 2, in <module>',
+        ]
+
+    def test_syntax_error_has_no_traceback(self) -> None:
+        """Test that a syntax error is reported like ``python -c`` does."""
+        success, output = run_code("x = (1,\n")
+
+        assert success is False
+        assert output.startswith('  File "<string>", line 1')
+        assert "SyntaxError" in output
@@ -0,0 +1,129 @@
+"""
+Unit tests for the fair scheduler.
+
+Tests for fair ordering, quotas, admission control and wait notifications.
+"""
+
+import threading
+from typing import List, Tuple
+
+import pytest
+
+from autodebugger.scheduler import FairScheduler, SchedulerOverloadedError, parse_weights
+
+
+def queue_request(
+    scheduler: FairScheduler, user: str, granted: List[str], tenant: str = "default"
+) -> threading.Thread:
+    """Start a thread taking a slot for a user and wait until it is queued or granted."""
+    queued = threading.Event()
+
+    def take() -> None:
+        request = scheduler.acquire("sandbox", user, tenant, on_wait=lambda p, w: queued.set())
+        granted.append(user)
+        queued.set()
+        scheduler.release(request, 0.0)
+
+    thread = threading.Thread(target=take)
+    thread.start()
+    assert queued.wait(5)
+    return thread
+
+
+class TestParseWeights:
+    """Test suite for the parse_weights function."""
+
+    def test_pairs(self) -> None:
+        """Test that tenant=weight pairs are parsed."""
+        assert parse_weights("research=2, students=0.5,") == {"research": 2.0, "students": 0.5}
+
+
+class TestFairScheduler:
+    """Test suite for the FairScheduler class."""
+
+    def test_free_slot_is_granted_immediately(self) -> None:
+        """Test that a request does not wait while slots are free."""
+        scheduler = FairScheduler({"sandbox": 1})
+        waits: List[Tuple[int, float]] = []
+
+        with scheduler.slot("sandbox", "alice", on_wait=lambda p, w: waits.append((p, w))):
+            pass
+
+        assert waits == []
+
+    def test_light_user_overtakes_heavy_user(self) -> None:
+        """Test that a new user is served before a user who already queued several requests."""
+        scheduler = FairScheduler({"sandbox": 1})
+        granted: List[str] = []
+        holder = scheduler.acquire("sandbox", "heavy")
+        threads = [queue_request(scheduler, "heavy", granted) for _ in range(2)]
+        threads.append(queue_request(scheduler, "light", granted))
+
+        scheduler.release(holder, 0.0)
+        for thread in threads:
+            thread.join(5)
+
+        assert granted == ["light", "heavy", "heavy"]
+
+    def test_tenant_weight_gives_larger_share(self) -> None:
+        """Test that a tenant with twice the weight is served twice as often."""
+        scheduler = FairScheduler({"sandbox": 1}, weights={"gold": 2.0})
+        granted: List[str] = []
+        holder = scheduler.acquire("sandbox", "setup")
+        threads = [queue_request(scheduler, "bronze", granted) for _ in range(3)]
+        threads += [queue_request(scheduler, "gold", granted, tenant="gold") for _ in range(3)]
+
+        scheduler.release(holder, 0.0)
+        for thread in threads:
+            thread.join(5)
+
+        assert granted[:3].count("gold") == 2
+
+    def test_user_quota_lets_other_users_through(self) -> None:
+        """Test that a user at its quota waits while other users get free slots."""
+        scheduler = FairScheduler({"sandbox": 2}, user_quota=1)
+        granted: List[str] = []
+        holder = scheduler.acquire("sandbox", "alice")
+        waiting = queue_request(scheduler, "alice", granted)
+        queue_request(scheduler, "bob", granted).join(5)
+
+        assert granted == ["bob"]
+        scheduler.release(holder, 0.0)
+        waiting.join(5)
+        assert granted == ["bob", "alice"]
+
+    def test_full_queue_rejects_requests(self) -> None:
+        """Test that admission control rejects requests beyond max_queue."""
+        scheduler = FairScheduler({"sandbox": 1}, max_queue=1)
+        granted: List[str] = []
+        holder = scheduler.acquire("sandbox", "alice")
+        waiting = queue_request(scheduler, "bob", granted)
+
+        with pytest.raises(SchedulerOverloadedError):
+            scheduler.acquire("sandbox", "carol")
+
+        scheduler.release(holder, 0.0)
+        waiting.join(5)
+
+    def test_wait_is_reported(self) -> None:
+        """Test that a waiting request is told its position and estimated wait."""
+        scheduler = FairScheduler({"sandbox": 1}, service_time=4.0)
+        holder = scheduler.acquire("sandbox", "alice")
+        reports: List[Tuple[int, float]] = []
+        reported = threading.Event()
+
+        def on_wait(position: int, wait: float) -> None:
+            reports.append((position, wait))
+            reported.set()
+
+        thread = threading.Thread(
+            target=lambda: scheduler.release(
+                scheduler.acquire("sandbox", "bob", on_wait=on_wait), 0
+            )
+        )
+        thread.start()
+        assert reported.wait(5)
+        scheduler.release(holder, 0.0)
+        thread.join(5)
+
+        assert reports[0] == (1, 4.0)
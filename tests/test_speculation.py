@@ -0,0 +1,58 @@
+"""
+Unit tests for speculative fix requests.
+
+Tests for the request budget, matching of alternatives and cancellation.
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+from autodebugger.speculation import Speculation
+
+
+class TestSpeculation:
+    """Test suite for the Speculation class."""
+
+    def test_disabled_by_default(self) -> None:
+        """Test that no request is made without a budget."""
+        suggest = MagicMock()
+        speculation = Speculation(suggest, max_requests=0)
+
+        speculation.start("NameError", "print(x)")
+
+        assert speculation.pending is False
+        suggest.assert_not_called()
+
+    def test_budget_limits_requests(self) -> None:
+        """Test that no more requests are made than the budget allows."""
+        suggest = MagicMock(return_value="print(1)")
+        speculation = Speculation(suggest, max_requests=1)
+
+        speculation.start("NameError", "print(x)")
+        assert speculation.take("print(x)", "NameError") == "print(1)"
+        speculation.start("NameError", "print(x)")
+
+        assert speculation.pending is False
+        assert suggest.call_count == 1
+        speculation.close()
+
+    def test_alternative_for_other_error_is_dropped(self) -> None:
+        """Test that an alternative is only returned for the error it was requested for."""
+        speculation = Speculation(MagicMock(return_value="print(1)"), max_requests=1)
+
+        speculation.start("NameError: name 'x' is not defined", "print(x)")
+
+        assert speculation.take("print(x)", "TypeError: bad operand") is None
+        assert speculation.pending is False
+        speculation.close()
+
+    def test_close_does_not_wait_for_request(self) -> None:
+        """Test that closing abandons a request still in flight."""
+        release = threading.Event()
+        speculation = Speculation(lambda error, code: release.wait(5) and "print(1)", 1)
+
+        speculation.start("NameError", "print(x)")
+        speculation.close()
+
+        assert speculation.pending is False
+        release.set()
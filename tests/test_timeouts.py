@@ -0,0 +1,69 @@
+"""
+Unit tests for adaptive execution timeouts.
+
+Tests for the per-family timeout policy used by the debugging pipeline.
+"""
+
+import pytest
+
+from autodebugger.timeouts import AdaptiveTimeouts, family_key
+
+
+class TestFamilyKey:
+    """Test suite for the family_key function."""
+
+    def test_ignores_trailing_whitespace(self) -> None:
+        """Test that formatting noise does not change the family."""
+        assert family_key("print(1)  \n\n") == family_key("print(1)")
+        assert family_key("print(1)") != family_key("print(2)")
+
+
+class TestAdaptiveTimeouts:
+    """Test suite for the AdaptiveTimeouts policy."""
+
+    def test_unknown_family_gets_ceiling(self) -> None:
+        """Test that a family without history gets the full ceiling."""
+        timeouts = AdaptiveTimeouts(floor=1, ceiling=30)
+
+        assert timeouts.timeout_for("new") == 30
+
+    def test_learns_from_observed_runtimes(self) -> None:
+        """Test that the timeout follows the slowest observed runtime."""
+        timeouts = AdaptiveTimeouts(floor=1, ceiling=30, multiplier=4, margin=0)
+
+        timeouts.record("f", 0.5, 30)
+        timeouts.record("f", 1.0, 30)
+
+        assert timeouts.timeout_for("f") == pytest.approx(4.0)
+
+    def test_clamped_to_floor_and_ceiling(self) -> None:
+        """Test that learned timeouts stay within the configured bounds."""
+        timeouts = AdaptiveTimeouts(floor=2, ceiling=10, multiplier=5, margin=0)
+
+        timeouts.record("fast", 0.01, 10)
+        timeouts.record("slow", 8.0, 10)
+
+        assert timeouts.timeout_for("fast") == 2
+        assert timeouts.timeout_for("slow") == 10
+
+    def test_escalates_after_timeout(self) -> None:
+        """Test that a timed-out family gets twice the expired timeout next."""
+        timeouts = AdaptiveTimeouts(floor=1, ceiling=30, multiplier=2, margin=0)
+        timeouts.record("f", 1.0, 30)
+
+        timeouts.record("f", 2.0, 2.0)
+
+        assert timeouts.timeout_for("f") == pytest.approx(4.0)
+
+    def test_compile_errors_are_not_samples(self) -> None:
+        """Test that syntax errors do not shrink the timeout."""
+        timeouts = AdaptiveTimeouts(floor=1, ceiling=30)
+
+        timeouts.record("f", 0.02, 30, "  File x\nSyntaxError: invalid syntax")
+
+        assert timeouts.timeout_for("f") == 30
+
+    def test_rejects_inverted_bounds(self) -> None:
+        """Test that a floor above the ceiling is refused."""
+        with pytest.raises(ValueError):
+            AdaptiveTimeouts(floor=10, ceiling=5)
@@ -0,0 +1,69 @@
+"""
+Unit tests for token budget planning.
+
+Tests for token estimates, output caps and splitting of oversized code.
+"""
+
+import pytest
+
+from autodebugger.tokens import (
+    PromptTooLargeError,
+    TokenBudget,
+    TokenCounter,
+    estimate_tokens,
+    split_for_error,
+)
+
+
+class TestTokenCounter:
+    """Test suite for estimate_tokens and TokenCounter."""
+
+    def test_estimate_grows_with_text(self) -> None:
+        """Test that the estimate counts words, numbers and symbols."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("print(x)") == 5
+        assert estimate_tokens("x = 1\n" * 10) > estimate_tokens("x = 1\n")
+
+    def test_calibration_and_tokenizer(self) -> None:
+        """Test that reported counts calibrate the estimate and a tokenizer wins."""
+        counter = TokenCounter(smoothing=1.0)
+        counter.calibrate("print(x)", 8)
+
+        assert counter.count("print(x)") == 8
+        assert TokenCounter(tokenize=len).count("abc") == 3
+
+
+class TestTokenBudget:
+    """Test suite for the TokenBudget planner."""
+
+    def test_cap_scales_with_code(self) -> None:
+        """Test that the output cap follows the code size within its bounds."""
+        budget = TokenBudget(context_window=4096, max_new_tokens=1000, min_new_tokens=64)
+
+        _, small = budget.plan("fix: print(x)", "print(x)")
+        _, large = budget.plan("fix: " + "x = 1\n" * 100, "x = 1\n" * 100)
+
+        assert small == 64
+        assert 64 < large <= 1000
+
+    def test_oversized_requests_are_rejected(self) -> None:
+        """Test that prompts exceeding the context window are refused."""
+        budget = TokenBudget(context_window=100, min_new_tokens=20)
+
+        with pytest.raises(PromptTooLargeError):
+            budget.plan("word " * 200, "print(x)")
+
+
+class TestSplitForError:
+    """Test suite for the split_for_error function."""
+
+    def test_selects_enclosing_block(self) -> None:
+        """Test that the top-level block containing the failing line is selected."""
+        code = "import os\n\n@decorator\ndef f():\n    return y\n\nprint(f())\n"
+        error = '  File "<string>", line 5, in f\nNameError'
+
+        assert split_for_error(code, error) == (2, 5)
+
+    def test_without_line_number(self) -> None:
+        """Test that errors without a line number cannot be split."""
+        assert split_for_error("print(x)\n", "NameError") is None
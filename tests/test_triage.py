@@ -0,0 +1,73 @@
+"""
+Unit tests for error triage.
+
+Tests for the classification of errors that no code edit can fix.
+"""
+
+from autodebugger.triage import (
+    MISSING_FILE,
+    MISSING_MODULE,
+    NETWORK,
+    PERMISSION,
+    classify_error,
+    parse_exception,
+)
+
+TRACEBACK = 'Traceback (most recent call last):\n  File "<string>", line 1, in <module>\n'
+
+
+class TestParseException:
+    """Test suite for the parse_exception function."""
+
+    def test_qualified_exception_type(self) -> None:
+        """Test that module-qualified exception names are unqualified."""
+        output = TRACEBACK + "socket.gaierror: [Errno -2] Name or service not known"
+
+        assert parse_exception(output) == ("gaierror", "[Errno -2] Name or service not known")
+
+    def test_no_exception(self) -> None:
+        """Test that output without an exception line is not parsed."""
+        assert parse_exception("Code execution timed out (30 seconds)") is None
+
+
+class TestClassifyError:
+    """Test suite for the classify_error function."""
+
+    def test_missing_module(self) -> None:
+        """Test that an uninstalled module stops the session."""
+        output = TRACEBACK + "ModuleNotFoundError: No module named 'zzqx_not_a_module'"
+
+        verdict = classify_error(output)
+
+        assert verdict is not None
+        assert verdict.category == MISSING_MODULE
+
+    def test_misspelled_module_is_fixable(self) -> None:
+        """Test that a typo in a stdlib module name is left to the model."""
+        assert (
+            classify_error(TRACEBACK + "ModuleNotFoundError: No module named 'colections'") is None
+        )
+
+    def test_missing_file(self, tmp_path) -> None:
+        """Test that a missing input file stops the session unless it exists."""
+        missing = tmp_path / "data.csv"
+        output = TRACEBACK + f"FileNotFoundError: [Errno 2] No such file or directory: '{missing}'"
+
+        assert classify_error(output).category == MISSING_FILE
+        missing.write_text("a,b\n")
+        assert classify_error(output) is None
+
+    def test_network_and_permission(self) -> None:
+        """Test that network and permission failures are unfixable."""
+        network = (
+            TRACEBACK + "urllib.error.URLError: <urlopen error [Errno 111] Connection refused>"
+        )
+        permission = TRACEBACK + "PermissionError: [Errno 13] Permission denied: '/root/x'"
+
+        assert classify_error(network).category == NETWORK
+        assert classify_error(permission).category == PERMISSION
+
+    def test_code_errors_are_fixable(self) -> None:
+        """Test that ordinary programming errors are sent to the model."""
+        assert classify_error(TRACEBACK + "NameError: name 'x' is not defined") is None
+        assert classify_error(TRACEBACK + "ZeroDivisionError: division by zero") is None
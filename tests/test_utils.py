@@ -10,7 +10,16 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from autodebugger.utils import generate_code, get_bearer, get_chatbot_suggestion
+from autodebugger.tokens import PromptTooLargeError
+from autodebugger.utils import (
+    WatsonxHTTPModel,
+    generate_code,
+    get_bearer,
+    get_chatbot_suggestion,
+    get_iam_url,
+    get_watsonx_url,
+)
+from benchmarks.mock_watsonx import MockConfig, start_mock_server
 
 
 class TestGetBearer:
@@ -51,6 +60,85 @@ class TestGetBearer:
             get_bearer("test_api_key")
 
 
+class TestEndpoints:
+    """Test suite for configurable service endpoints."""
+
+    def test_default_endpoints(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test the public IBM Cloud endpoints are used by default."""
+        for name in ("IBM_IAM_URL", "WATSONX_URL", "IBM_CLOUD_REGION"):
+            monkeypatch.delenv(name, raising=False)
+
+        assert get_iam_url() == "https://iam.cloud.ibm.com/oidc/token"
+        assert get_watsonx_url() == "https://us-south.ml.cloud.ibm.com"
+
+    def test_region_and_overrides(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test endpoints can be changed through environment variables."""
+        monkeypatch.delenv("WATSONX_URL", raising=False)
+        monkeypatch.setenv("IBM_CLOUD_REGION", "eu-de")
+        assert get_watsonx_url() == "https://eu-de.ml.cloud.ibm.com"
+
+        monkeypatch.setenv("WATSONX_URL", "http://127.0.0.1:8080/")
+        monkeypatch.setenv("IBM_IAM_URL", "http://127.0.0.1:8080/identity/token")
+        assert get_watsonx_url() == "http://127.0.0.1:8080"
+        assert get_iam_url() == "http://127.0.0.1:8080/identity/token"
+
+    @patch("autodebugger.utils.requests.post")
+    def test_get_bearer_uses_configured_url(
+        self, mock_post: MagicMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the token request goes to IBM_IAM_URL."""
+        monkeypatch.setenv("IBM_IAM_URL", "http://localhost:9/identity/token")
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"access_token": "local_token"}
+        mock_post.return_value = mock_response
+
+        assert get_bearer("test_api_key") == "local_token"
+        assert mock_post.call_args[0][0] == "http://localhost:9/identity/token"
+
+
+class TestWatsonxHTTPModel:
+    """Test suite for the REST client against the local mock server."""
+
+    def make_model(self, monkeypatch: pytest.MonkeyPatch, config: MockConfig) -> WatsonxHTTPModel:
+        """Start a mock server and return a client pointed at it."""
+        server = start_mock_server(config)
+        url = f"http://127.0.0.1:{server.server_port}"
+        monkeypatch.setenv("IBM_IAM_URL", f"{url}/identity/token")
+        return WatsonxHTTPModel(
+            url=url,
+            model_id="meta-llama/llama-2-70b-chat",
+            params={"max_new_tokens": 100},
+            project_id="test_project",
+            api_key="test_api_key",
+        )
+
+    def test_generate_through_mock_server(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test the full token exchange and generation round trip."""
+        model = self.make_model(monkeypatch, MockConfig())
+
+        result = model.generate(["The following is input code: pritn('typo')."])
+
+        assert isinstance(result, list)
+        assert result[0]["results"][0]["generated_text"] == "print('typo')"
+
+    def test_throttled_request_raises(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a throttled request surfaces the 429 status."""
+        model = self.make_model(monkeypatch, MockConfig(rate_limit=0.001, burst=1))
+
+        model.generate("first request")
+        with pytest.raises(Exception, match="429"):
+            model.generate("second request")
+
+    def test_tokenize_through_mock_server(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that prompts can be measured with the tokenization endpoint."""
+        model = self.make_model(monkeypatch, MockConfig())
+
+        result = model.tokenize("x" * 40)
+
+        assert result["result"]["token_count"] == 10
+
+
 class TestGenerateCode:
     """Test suite for the generate_code function."""
 
@@ -70,6 +158,25 @@ class TestGenerateCode:
         assert result == "print('Fixed code')"
         mock_model.generate.assert_called_once()
 
+    @patch("autodebugger.utils.llm_model")
+    def test_output_cap_follows_input_size(self, mock_model: MagicMock) -> None:
+        """Test that MAX_NEW_TOKENS is planned per request from the code size."""
+        mock_model.generate.return_value = [{"results": [{"generated_text": "print(1)"}]}]
+
+        generate_code(code="print(x)", message_error="NameError")
+        small = mock_model.generate.call_args.kwargs["params"]["max_new_tokens"]
+        generate_code(code="x = 1\n" * 200, message_error="NameError")
+        large = mock_model.generate.call_args.kwargs["params"]["max_new_tokens"]
+
+        assert small < large <= 1000
+
+    @patch("autodebugger.utils.llm_model")
+    def test_oversized_request_is_rejected(self, mock_model: MagicMock) -> None:
+        """Test that code too large for the context window is not sent."""
+        with pytest.raises(PromptTooLargeError):
+            generate_code(code="x = 1\n" * 5000, message_error="NameError")
+        mock_model.generate.assert_not_called()
+
     @patch("autodebugger.utils.llm_model")
     def test_generate_code_without_error(self, mock_model: MagicMock) -> None:
         """Test code generation without an error message."""
@@ -86,6 +193,21 @@ class TestGenerateCode:
         assert result == "print('Optimized code')"
         mock_model.generate.assert_called_once()
 
+    @patch("autodebugger.utils.llm_model")
+    def test_recorded_calls_replay_offline(self, mock_model: MagicMock, tmp_path) -> None:
+        """Test that calls recorded to a cassette are replayed without the model."""
+        mock_model.generate.return_value = [{"results": [{"generated_text": "print(1)"}]}]
+        cassette = {"LLM_CASSETTE": str(tmp_path / "calls.jsonl"), "LLM_CASSETTE_LATENCY": "0"}
+
+        with patch.dict(os.environ, {**cassette, "LLM_CASSETTE_MODE": "record"}):
+            recorded = generate_code(code="print(x)", message_error="NameError")
+        mock_model.generate.reset_mock()
+        with patch.dict(os.environ, {**cassette, "LLM_CASSETTE_MODE": "replay"}):
+            replayed = generate_code(code="print(x)", message_error="NameError")
+
+        assert replayed == recorded == "print(1)"
+        mock_model.generate.assert_not_called()
+
     @patch("autodebugger.utils.llm_model")
     def test_generate_code_custom_language(self, mock_model: MagicMock) -> None:
         """Test code generation with a custom programming language."""
@@ -121,3 +243,15 @@ class TestGetChatbotSuggestion:
             language="Python",
             message_error="NameError: name 'x' is not defined",
         )
+
+    @patch("autodebugger.utils.generate_code")
+    def test_oversized_code_is_split(self, mock_generate: MagicMock) -> None:
+        """Test that only the failing block of oversized code is sent and spliced back."""
+        code = "def f():\n    return 1\n\ndef g():\n    return y\n\nprint(g())\n"
+        error = 'Traceback:\n  File "<string>", line 5, in g\nNameError: y'
+        mock_generate.side_effect = [PromptTooLargeError("too large"), "def g():\n    return 2"]
+
+        result = get_chatbot_suggestion(error, code)
+
+        assert mock_generate.call_args.kwargs["code"] == "def g():\n    return y\n"
+        assert result == "def f():\n    return 1\n\ndef g():\n    return 2\n\nprint(g())\n"
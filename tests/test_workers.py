@@ -0,0 +1,159 @@
+"""
+Unit tests for remote sandbox workers.
+
+Tests for the worker daemon, the JSON-lines protocol and the client pool's
+load balancing, health checks and failover, using local worker processes and
+threads listening on Unix sockets.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List
+from unittest.mock import patch
+
+import pytest
+
+from autodebugger.runners import get_runner
+from autodebugger.workers import (
+    NO_WORKER,
+    SandboxWorker,
+    WorkerError,
+    WorkerPool,
+    parse_address,
+    request,
+)
+
+
+@pytest.fixture
+def workers(tmp_path: Path) -> Iterator[List[SandboxWorker]]:
+    """Start two workers of capacity 1 on Unix sockets."""
+    started = [SandboxWorker(f"unix://{tmp_path}/worker{index}.sock") for index in range(2)]
+    for worker in started:
+        threading.Thread(target=worker.serve_forever, daemon=True).start()
+    yield started
+    for worker in started:
+        worker.shutdown()
+
+
+def address(worker: SandboxWorker) -> str:
+    """Return the address string of a worker."""
+    return f"unix://{worker.address}"
+
+
+class TestParseAddress:
+    """Test suite for the parse_address function."""
+
+    def test_formats(self) -> None:
+        """Test Unix, TCP URL and host:port addresses."""
+        assert parse_address("unix:///run/worker.sock") == "/run/worker.sock"
+        assert parse_address("tcp://10.0.0.2:7070") == ("10.0.0.2", 7070)
+        assert parse_address("localhost:7070") == ("localhost", 7070)
+
+    def test_missing_port(self) -> None:
+        """Test that an address without a port raises ValueError."""
+        with pytest.raises(ValueError):
+            parse_address("localhost")
+
+
+class TestSandboxWorker:
+    """Test suite for the SandboxWorker daemon."""
+
+    def test_health(self, workers: List[SandboxWorker]) -> None:
+        """Test that a worker reports its capacity and load."""
+        status = request(workers[0].address, {"op": "health"}, 5)
+
+        assert status == {"ok": True, "capacity": 1, "active": 0}
+
+    def test_run(self, workers: List[SandboxWorker]) -> None:
+        """Test that a worker runs code with the local runner."""
+        response = request(workers[0].address, {"op": "run", "code": "print(6 * 7)"}, 30)
+
+        assert response == {"success": True, "output": "42\n"}
+
+    def test_token_is_required(self, tmp_path: Path) -> None:
+        """Test that a worker with a token rejects requests without it."""
+        worker = SandboxWorker(f"unix://{tmp_path}/secure.sock", token="s3cret")
+        threading.Thread(target=worker.serve_forever, daemon=True).start()
+        try:
+            with pytest.raises(WorkerError, match="unauthorized"):
+                request(worker.address, {"op": "health"}, 5)
+        finally:
+            worker.shutdown()
+
+
+class TestWorkerPool:
+    """Test suite for the WorkerPool client."""
+
+    def test_runs_spread_across_workers(self, workers: List[SandboxWorker]) -> None:
+        """Test that concurrent runs go to different workers instead of queueing."""
+        pool = WorkerPool([address(worker) for worker in workers])
+        results: List[tuple] = []
+        code = "import time\ntime.sleep(0.5)\nprint('done')"
+
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=lambda: results.append(pool.run(code, 10))) for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert results == [(True, "done\n"), (True, "done\n")]
+        assert time.perf_counter() - start < 2 * 0.5 + 0.4
+
+    def test_down_worker_is_skipped(self, workers: List[SandboxWorker], tmp_path: Path) -> None:
+        """Test that a run fails over from an unreachable worker."""
+        pool = WorkerPool([f"unix://{tmp_path}/missing.sock", address(workers[0])])
+
+        assert pool.run("print(1)", 10) == (True, "1\n")
+        assert pool.workers[0].healthy is False
+
+    def test_busy_worker_without_alternative(self, workers: List[SandboxWorker]) -> None:
+        """Test that a run is refused when the only worker is busy."""
+        pool = WorkerPool([address(workers[0])], max_retries=0, health_interval=60)
+        pool.check(pool.workers[0])
+        blocker = threading.Thread(
+            target=request,
+            args=(workers[0].address, {"op": "run", "code": "import time; time.sleep(1)"}, 10),
+        )
+        blocker.start()
+        while workers[0].active == 0:
+            time.sleep(0.01)
+
+        success, output = pool.run("print(1)", 10)
+        blocker.join(10)
+
+        assert success is False
+        assert output.startswith(NO_WORKER)
+
+    def test_get_runner_targets_configured_workers(self, workers: List[SandboxWorker]) -> None:
+        """Test that SANDBOX_WORKERS sends runs to the workers."""
+        with patch.dict(os.environ, {"SANDBOX_WORKERS": address(workers[1])}):
+            assert get_runner("python")("print('remote')", 10) == (True, "remote\n")
+
+
+class TestWorkerProcess:
+    """Test suite for the worker command line."""
+
+    def test_worker_process_serves_runs(self, tmp_path: Path) -> None:
+        """Test that a worker started with python -m autodebugger.workers runs code."""
+        socket_path = tmp_path / "process.sock"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "autodebugger.workers", "--listen", f"unix://{socket_path}"],
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 20
+            while not socket_path.exists() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            pool = WorkerPool([f"unix://{socket_path}"])
+
+            assert pool.run("print(2 + 2)", 10) == (True, "4\n")
+        finally:
+            process.terminate()
+            process.wait(10)